@@ -661,6 +661,217 @@ print(f"  Hit Rate: {cache_embeddings.hit_rate:.2%}")
 print(f"  Cache actual: {list(cache_embeddings.cache.keys())}")
 
 
+print("\n--- LRU Cache particionado (sharded), thread-safe y con presupuesto en bytes ---")
+
+"""
+El LRUCache anterior tiene DOS limitaciones cuando lo usamos dentro de workers
+de inferencia multi-hilo:
+
+1. NO tiene lock. Dos hilos haciendo put() a la vez pueden corromper el orden
+   del OrderedDict (move_to_end + popitem no son una operación atómica).
+   La solución ingenua es un único threading.Lock global... pero entonces
+   TODAS las peticiones se serializan en ese lock (contención).
+
+2. Limita por NÚMERO de entradas, no por MEMORIA. Un embedding de 4096 floats
+   en float32 ocupa 16 KB; uno de 384 dims ocupa 1.5 KB. "capacidad=1000" no
+   dice nada sobre cuánta RAM vamos a consumir.
+
+SOLUCIÓN: SHARDING (particionado por hash).
+- Creamos N "shards" independientes, cada uno con su OrderedDict y su Lock.
+- hash(key) % N decide a qué shard va cada clave. Dos hilos que tocan claves
+  de shards distintos NO compiten por el mismo lock.
+- El presupuesto total de bytes se reparte a partes iguales entre shards.
+  Cada shard expulsa LRU hasta volver a caber en su parte del presupuesto.
+- El tamaño de cada valor se mide con `.nbytes` si es un ndarray (buffer real
+  de datos) o con sys.getsizeof() en caso contrario (solo la cabecera del
+  objeto, NO recursivo: para listas es una cota inferior).
+
+Todas las operaciones siguen siendo O(1) amortizado: hash → shard → dict.
+Los contadores hits/misses/evictions son por shard (se actualizan dentro del
+lock del shard, sin un contador global compartido que vuelva a serializar).
+
+NOTA SOBRE EL GIL: en CPython el GIL ya serializa la ejecución de bytecode,
+así que el sharding NO acelera código puramente Python. Lo que evita es que
+un hilo bloqueado en el lock (por ejemplo, mientras otro calcula el tamaño de
+un objeto grande o la liberación de memoria de una expulsión) frene a todos
+los demás. Con builds free-threaded (PEP 703) la diferencia es mucho mayor.
+"""
+
+import threading
+
+
+class _CacheShard:
+    """Un shard: OrderedDict + Lock propio + contadores + bytes ocupados."""
+    __slots__ = ("datos", "lock", "bytes_usados", "max_bytes",
+                 "hits", "misses", "evictions")
+
+    def __init__(self, max_bytes: int):
+        self.datos = OrderedDict()   # key -> (valor, tamaño_en_bytes)
+        self.lock = threading.Lock()
+        self.bytes_usados = 0
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class ShardedLRUCache:
+    """
+    Cache LRU thread-safe particionado en N shards con presupuesto total en bytes.
+    Cada clave vive en el shard hash(key) % n_shards, protegido por su propio lock.
+    """
+    def __init__(self, max_bytes: int, n_shards: int = 16):
+        if n_shards < 1:
+            raise ValueError("n_shards debe ser >= 1")
+        self.max_bytes = max_bytes
+        self.n_shards = n_shards
+        bytes_por_shard = max_bytes // n_shards
+        self._shards = [_CacheShard(bytes_por_shard) for _ in range(n_shards)]
+
+    @staticmethod
+    def tamano_bytes(valor) -> int:
+        # ndarray (o cualquier objeto tipo buffer con .nbytes): tamaño real de datos
+        nbytes = getattr(valor, "nbytes", None)
+        if isinstance(nbytes, int):
+            return nbytes
+        return sys.getsizeof(valor)
+
+    def _shard(self, key) -> _CacheShard:
+        return self._shards[hash(key) % self.n_shards]
+
+    def get(self, key, default=None):
+        shard = self._shard(key)
+        with shard.lock:
+            entrada = shard.datos.get(key)
+            if entrada is None:
+                shard.misses += 1
+                return default
+            shard.datos.move_to_end(key)
+            shard.hits += 1
+            return entrada[0]
+
+    def put(self, key, value):
+        tamano = self.tamano_bytes(value)
+        shard = self._shard(key)
+        with shard.lock:
+            if tamano > shard.max_bytes:
+                # Un valor más grande que el shard entero nunca cabe: no lo cacheamos
+                return False
+            anterior = shard.datos.pop(key, None)
+            if anterior is not None:
+                shard.bytes_usados -= anterior[1]
+            shard.datos[key] = (value, tamano)
+            shard.bytes_usados += tamano
+            # Expulsar LRU hasta volver a caber en el presupuesto del shard
+            while shard.bytes_usados > shard.max_bytes:
+                _, (_, tamano_expulsado) = shard.datos.popitem(last=False)
+                shard.bytes_usados -= tamano_expulsado
+                shard.evictions += 1
+            return True
+
+    def __len__(self):
+        return sum(len(s.datos) for s in self._shards)
+
+    @property
+    def bytes_usados(self) -> int:
+        return sum(s.bytes_usados for s in self._shards)
+
+    def stats(self) -> list:
+        """Contadores por shard (lectura bajo el lock de cada shard)."""
+        resultado = []
+        for i, s in enumerate(self._shards):
+            with s.lock:
+                resultado.append({
+                    "shard": i, "entradas": len(s.datos), "bytes": s.bytes_usados,
+                    "hits": s.hits, "misses": s.misses, "evictions": s.evictions,
+                })
+        return resultado
+
+    @property
+    def hit_rate(self):
+        hits = sum(s.hits for s in self._shards)
+        total = hits + sum(s.misses for s in self._shards)
+        return hits / total if total else 0.0
+
+
+# Presupuesto: 64 KB repartidos en 8 shards. Embeddings simulados de distintos tamaños.
+cache_sharded = ShardedLRUCache(max_bytes=64 * 1024, n_shards=8)
+random.seed(7)
+for i in range(2000):
+    tok = f"tok_{random.randint(0, 400)}"
+    emb = cache_sharded.get(tok)
+    if emb is None:
+        dims = random.choice([16, 64, 256])
+        cache_sharded.put(tok, [0.0] * dims)
+
+print(f"\nShardedLRUCache (64 KB, 8 shards):")
+print(f"  Entradas: {len(cache_sharded)}, Bytes usados: {cache_sharded.bytes_usados:,} / {cache_sharded.max_bytes:,}")
+print(f"  Hit Rate global: {cache_sharded.hit_rate:.2%}")
+for st in cache_sharded.stats()[:3]:
+    print(f"  shard {st['shard']}: entradas={st['entradas']:>3} bytes={st['bytes']:>6} "
+          f"hits={st['hits']:>3} misses={st['misses']:>3} evictions={st['evictions']:>3}")
+print(f"  ... ({cache_sharded.n_shards} shards en total)")
+
+
+print("\n--- Benchmark: LRUCache + lock global vs ShardedLRUCache (1/4/16 hilos) ---")
+
+class LRUCacheConLock(LRUCache):
+    """El LRUCache original protegido por UN lock global (la opción ingenua)."""
+    def __init__(self, capacidad: int):
+        super().__init__(capacidad)
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            return super().get(key)
+
+    def put(self, key, value):
+        with self.lock:
+            super().put(key, value)
+
+
+def _benchmark_cache(cache, n_hilos: int, ops_totales: int = 40_000) -> float:
+    """Devuelve operaciones/segundo con n_hilos haciendo get+put (80/20)."""
+    ops_por_hilo = ops_totales // n_hilos
+    valor = [0.0] * 32
+
+    def worker(semilla):
+        rng = random.Random(semilla)
+        for _ in range(ops_por_hilo):
+            k = rng.randint(0, 2000)
+            if rng.random() < 0.8:
+                cache.get(k)
+            else:
+                cache.put(k, valor)
+
+    hilos = [threading.Thread(target=worker, args=(s,)) for s in range(n_hilos)]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    return ops_por_hilo * n_hilos / (time.perf_counter() - inicio)
+
+
+print(f"\n  {'Hilos':>5} | {'LRU + lock global':>18} | {'Sharded (16)':>14}")
+for n_hilos in (1, 4, 16):
+    qps_global = _benchmark_cache(LRUCacheConLock(capacidad=1000), n_hilos)
+    qps_sharded = _benchmark_cache(ShardedLRUCache(max_bytes=1000 * 400, n_shards=16), n_hilos)
+    print(f"  {n_hilos:>5} | {qps_global:>12,.0f} ops/s | {qps_sharded:>8,.0f} ops/s")
+
+"""
+LECTURA DEL BENCHMARK:
+- Con 1 hilo el sharded es algo MÁS LENTO: paga hash() % N y el cálculo del
+  tamaño en bytes en cada put. El sharding no es gratis.
+- Con 4/16 hilos en CPython con GIL, ambos rinden parecido (el GIL manda).
+  La ventaja real aparece cuando el trabajo dentro del lock libera el GIL
+  (numpy, I/O) o en intérpretes free-threaded: un lock global serializa
+  TODO, N locks independientes dividen la contención por ~N.
+- Lo que SÍ ganamos siempre: un límite de memoria real en bytes y
+  métricas por shard para detectar shards "calientes" (claves mal repartidas).
+"""
+
+
 # ╔══════════════════════════════════════════════════════════════════════════╗
 # ║                                                                        ║
 # ║   PARTE 5: collections.ChainMap — CAPAS DE CONFIGURACIÓN              ║
@@ -1017,6 +1228,8 @@ RESUMEN DEFINITIVO DEL MÓDULO COLLECTIONS PARA INGENIERÍA IA:
 4. OrderedDict sigue vivo en 2026 por move_to_end() y popitem(last=False),
    que permiten implementar LRU Caches en pocas líneas. PyTorch state_dict()
    lo usa internamente.
+   Para caches compartidos entre hilos: N shards con lock propio y un
+   presupuesto en BYTES (nbytes / getsizeof), no en número de entradas.
 
 5. ChainMap implementa búsqueda en cascada sobre múltiples dicts sin fusionarlos.
    Es el patrón estándar para sistemas de configuración multi-nivel en MLOps.
@@ -750,6 +750,278 @@ for t in scheduler.completed:
     print(f"  ✓ {t.nombre}")
 
 
+print("\n--- Scheduler indexado por clase de recurso (dispatch O(log n)) ---")
+
+"""
+MLScheduler.next_task tiene un coste oculto: saca TODAS las tareas del heap
+y vuelve a meter las rechazadas. Cada dispatch es O(n log n) aunque la
+primera tarea quepa. Con miles de trabajos en cola, el scheduler se
+convierte en el cuello de botella.
+
+Diseño alternativo:
+1. UN HEAP POR CLASE DE RECURSO: (necesita GPU, bucket de RAM) con buckets
+   potencia de 2 (<=1 GB, <=2 GB, <=4 GB, ...). Hay pocas clases (~2 x 8),
+   así que dispatch = mirar la CABEZA de cada heap compatible y hacer un
+   único heappop. O(clases + log n).
+   - Si el bucket cabe entero en la RAM libre, su cabeza cabe seguro.
+   - En el bucket "frontera" (RAM libre dentro de su rango) la cabeza puede
+     no caber: se miran primero `lookahead` tareas de ese heap y, si ninguna
+     cabe, se recorre el bucket entero. Nunca se deja sin despachar una
+     tarea que cabe.
+   - Una tarea que no cabría ni con el clúster vacío se rechaza en submit().
+2. CANCELACIÓN con tombstones (como LazyHeap, capítulo 14): cancelar marca
+   la entrada; se descarta al llegar a la cabeza. O(1).
+3. AGING sin reordenar: la prioridad efectiva es
+       prioridad - tasa_aging * (ahora - t_envío)
+   Como `ahora` es igual para todas las tareas, el orden entre dos tareas
+   solo depende de  prioridad + tasa_aging * t_envío,  que es FIJO. Se usa
+   esa clave en el heap y el envejecimiento sale gratis: una tarea de baja
+   prioridad acaba adelantando a las urgentes que llegan mucho después.
+4. THREAD-SAFE: un threading.Condition protege el estado. Los workers
+   pueden bloquear en next_task(timeout=...) hasta que haya una tarea
+   ejecutable; complete() y submit() los despiertan.
+"""
+
+import math
+import threading
+
+
+class ResourceAwareScheduler:
+    """Scheduler de tareas ML con un heap por clase de recurso, cancelación y aging."""
+
+    CANCELADA = None
+
+    def __init__(self, gpu_count: int = 1, ram_gb: float = 16.0, tasa_aging: float = 0.0,
+                 lookahead: int = 8, reloj=time.monotonic):
+        self.gpu_count = gpu_count
+        self.ram_gb = ram_gb
+        self.tasa_aging = tasa_aging      # puntos de prioridad ganados por segundo de espera
+        self.lookahead = lookahead
+        self.reloj = reloj
+        self.gpu_used = 0
+        self.ram_used = 0.0
+        self.completed = []
+        self._heaps = defaultdict(list)   # (gpu_required, bucket) -> [[clave, n, task], ...]
+        self._entradas = {}               # task_id -> entrada (para cancelar)
+        self._counter = 0
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def _bucket(ram_gb: float) -> int:
+        """Bucket potencia de 2: la tarea cabe en (2^(b-1), 2^b] GB."""
+        return max(0, math.ceil(math.log2(ram_gb))) if ram_gb > 0 else 0
+
+    def submit(self, task: MLTask) -> int:
+        """Encola una tarea y devuelve su id (para cancel)."""
+        if task.ram_gb > self.ram_gb or (task.gpu_required and self.gpu_count == 0):
+            raise ValueError(f"'{task.nombre}' nunca cabe: pide {task.ram_gb} GB"
+                             f"{' + GPU' if task.gpu_required else ''}, el clúster tiene "
+                             f"{self.ram_gb} GB y {self.gpu_count} GPU")
+        with self._cond:
+            clave = task.prioridad + self.tasa_aging * self.reloj()
+            task_id = self._counter
+            entrada = [clave, task_id, task]
+            self._counter += 1
+            self._entradas[task_id] = entrada
+            heapq.heappush(self._heaps[(task.gpu_required, self._bucket(task.ram_gb))], entrada)
+            self._cond.notify()
+            return task_id
+
+    def cancel(self, task_id: int) -> bool:
+        """Cancela una tarea pendiente (tombstone). True si estaba en cola."""
+        with self._cond:
+            entrada = self._entradas.pop(task_id, None)
+            if entrada is None:
+                return False
+            entrada[-1] = self.CANCELADA
+            return True
+
+    def _cabeza(self, heap: list):
+        # Descarta tombstones acumulados en la cabeza
+        while heap and heap[0][-1] is self.CANCELADA:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def _candidata(self, clase, heap, ram_libre):
+        """(entrada, posición) de la mejor tarea ejecutable de un heap."""
+        cabeza = self._cabeza(heap)
+        if cabeza is None:
+            return None, None
+        if 2 ** clase[1] <= ram_libre or cabeza[-1].ram_gb <= ram_libre:
+            return cabeza, 0
+        # Bucket frontera: recorremos el heap "best-first" (hijos 2i+1, 2i+2)
+        # visitando como mucho `lookahead` nodos, en orden de prioridad.
+        frontera = [(cabeza, 0)]
+        for _ in range(self.lookahead):
+            if not frontera:
+                break
+            entrada, pos = heapq.heappop(frontera)
+            tarea = entrada[-1]
+            if tarea is not self.CANCELADA and tarea.ram_gb <= ram_libre:
+                return entrada, pos
+            for hijo in (2 * pos + 1, 2 * pos + 2):
+                if hijo < len(heap):
+                    heapq.heappush(frontera, (heap[hijo], hijo))
+        # Lookahead sin éxito: recorrido completo del bucket, O(tamaño del bucket)
+        mejor, pos_mejor = None, None
+        for pos, entrada in enumerate(heap):
+            tarea = entrada[-1]
+            if (tarea is not self.CANCELADA and tarea.ram_gb <= ram_libre
+                    and (mejor is None or entrada[:2] < mejor[:2])):
+                mejor, pos_mejor = entrada, pos
+        return mejor, pos_mejor
+
+    def _siguiente(self) -> Optional[MLTask]:
+        ram_libre = self.ram_gb - self.ram_used
+        gpu_libre = self.gpu_used < self.gpu_count
+        elegida, pos_elegida, heap_elegido = None, None, None
+        for clase, heap in self._heaps.items():
+            gpu_required, bucket = clase
+            if gpu_required and not gpu_libre:
+                continue
+            if bucket > 0 and 2 ** (bucket - 1) >= ram_libre:
+                continue   # nada de este bucket puede caber
+            entrada, pos = self._candidata(clase, heap, ram_libre)
+            if entrada is not None and (elegida is None or entrada[:2] < elegida[:2]):
+                elegida, pos_elegida, heap_elegido = entrada, pos, heap
+        if elegida is None:
+            return None
+        task = elegida[-1]
+        if pos_elegida == 0:
+            heapq.heappop(heap_elegido)
+        else:
+            # Elegida por lookahead: tombstone en su sitio (se limpia al llegar a la cabeza)
+            elegida[-1] = self.CANCELADA
+        del self._entradas[elegida[1]]
+        if task.gpu_required:
+            self.gpu_used += 1
+        self.ram_used += task.ram_gb
+        return task
+
+    def next_task(self, timeout: Optional[float] = 0.0) -> Optional[MLTask]:
+        """
+        Siguiente tarea ejecutable (prioridad efectiva, luego FIFO).
+        timeout=0: no bloquea. timeout=None: espera indefinidamente.
+        """
+        with self._cond:
+            if timeout == 0.0:
+                return self._siguiente()
+            resultado = None
+
+            def hay_tarea():
+                nonlocal resultado
+                resultado = self._siguiente()
+                return resultado is not None
+
+            self._cond.wait_for(hay_tarea, timeout=timeout)
+            return resultado
+
+    def complete(self, task: MLTask):
+        """Marca una tarea como completada, libera recursos y despierta a los workers."""
+        with self._cond:
+            if task.gpu_required:
+                self.gpu_used -= 1
+            self.ram_used -= task.ram_gb
+            self.completed.append(task)
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def status(self):
+        print(f"  Pendientes: {len(self)} | Completadas: {len(self.completed)} | "
+              f"GPU: {self.gpu_used}/{self.gpu_count} | RAM: {self.ram_used:.1f}/{self.ram_gb:.1f} GB")
+
+
+# Mismo workload que antes: mismo orden de ejecución
+scheduler_rc = ResourceAwareScheduler(gpu_count=2, ram_gb=32.0)
+for t in tareas_ml:
+    scheduler_rc.submit(t)
+orden_rc = []
+while (task := scheduler_rc.next_task()) is not None:
+    orden_rc.append(task.nombre)
+    scheduler_rc.complete(task)
+print(f"  Mismo orden que MLScheduler: {orden_rc == [t.nombre for t in scheduler.completed]}")
+
+# Cancelación + aging con un reloj simulado
+reloj_simulado = [0.0]
+sched_aging = ResourceAwareScheduler(gpu_count=1, ram_gb=16.0, tasa_aging=0.1,
+                                     reloj=lambda: reloj_simulado[0])
+id_vieja = sched_aging.submit(MLTask("reindexar_vieja", 5, "preprocess"))
+reloj_simulado[0] = 60.0   # llegan urgentes 60 s después
+sched_aging.submit(MLTask("inference_urgente", 1, "inference"))
+id_cancelada = sched_aging.submit(MLTask("evaluar_descartada", 1, "evaluate"))
+sched_aging.cancel(id_cancelada)
+print(f"  Con aging (0.1/s) la tarea de prioridad 5 esperando 60 s va primero: "
+      f"{sched_aging.next_task().nombre}")
+print(f"  Pendientes tras cancelar 'evaluar_descartada': {len(sched_aging)}")
+
+# Bucket frontera con la única tarea ejecutable más allá del lookahead
+sched_frontera = ResourceAwareScheduler(gpu_count=0, ram_gb=32.0, lookahead=8)
+sched_frontera.submit(MLTask("ocupa_20gb", 1, "train", ram_gb=20.0))
+sched_frontera.next_task()
+for i in range(20):
+    sched_frontera.submit(MLTask(f"grande_{i}", 1, "train", ram_gb=16.0))
+sched_frontera.submit(MLTask("mediana_9gb", 2, "train", ram_gb=9.0))
+print(f"  12 GB libres, 20 tareas de 16 GB delante: despacha "
+      f"'{sched_frontera.next_task().nombre}'")
+try:
+    sched_frontera.submit(MLTask("imposible", 1, "train", ram_gb=64.0))
+except ValueError as e:
+    print(f"  submit rechaza: {e}")
+
+# Workers concurrentes
+sched_hilos = ResourceAwareScheduler(gpu_count=2, ram_gb=32.0)
+ejecutadas = []
+
+def worker_scheduler():
+    while (task := sched_hilos.next_task(timeout=0.05)) is not None:
+        ejecutadas.append(task.nombre)
+        sched_hilos.complete(task)
+
+for i in range(200):
+    sched_hilos.submit(MLTask(f"job_{i}", random.randint(1, 5), "inference",
+                              gpu_required=random.random() < 0.3, ram_gb=random.choice([1, 2, 4, 8])))
+workers = [threading.Thread(target=worker_scheduler) for _ in range(4)]
+for w in workers:
+    w.start()
+for w in workers:
+    w.join()
+print(f"  4 workers concurrentes: {len(ejecutadas)}/200 tareas ejecutadas, "
+      f"recursos liberados: GPU={sched_hilos.gpu_used}, RAM={sched_hilos.ram_used:.1f}")
+
+
+print("\n--- Benchmark: workload simulado con miles de tareas en cola ---")
+
+def simular_workload(clase_scheduler, n_tareas: int, seed: int = 0) -> float:
+    """Encola n_tareas y las despacha con hasta 8 en ejecución. Devuelve segundos en dispatch."""
+    rng = random.Random(seed)
+    sched = clase_scheduler(gpu_count=4, ram_gb=64.0)
+    for i in range(n_tareas):
+        sched.submit(MLTask(f"job_{i}", rng.randint(1, 5), "train",
+                            gpu_required=rng.random() < 0.4,
+                            ram_gb=rng.choice([0.5, 1, 2, 4, 8, 16, 24])))
+    en_ejecucion = []
+    t_dispatch = 0.0
+    while True:
+        inicio = time.perf_counter()
+        task = sched.next_task()
+        t_dispatch += time.perf_counter() - inicio
+        if task is not None:
+            en_ejecucion.append(task)
+        if task is None or len(en_ejecucion) >= 8:
+            if not en_ejecucion:
+                break
+            sched.complete(en_ejecucion.pop(0))
+    return t_dispatch
+
+for n_tareas in (500, 1_000, 3_000):
+    t_simple = simular_workload(MLScheduler, n_tareas)
+    t_rc = simular_workload(ResourceAwareScheduler, n_tareas)
+    print(f"  {n_tareas:>6} tareas: MLScheduler {t_simple*1000:9.1f} ms | "
+          f"ResourceAwareScheduler {t_rc*1000:7.1f} ms (~{t_simple/t_rc:.0f}x)")
+
+
 print("\n" + "=" * 80)
 print("=== CAPÍTULO 13: DIJKSTRA SIMPLIFICADO CON HEAP ===")
 print("=" * 80)
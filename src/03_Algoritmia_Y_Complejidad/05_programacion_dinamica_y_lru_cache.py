@@ -683,26 +683,146 @@ Esto es una aplicación directa de Edit Distance + DP.
 
 print("\n--- Spell Checker ---")
 
+class BKTree:
+    """
+    Burkhard-Keller tree: árbol métrico para búsquedas por edit distance.
+    Cada hijo cuelga de su padre por la distancia exacta al padre. Por la
+    desigualdad triangular, si d(query, nodo) = d, solo los hijos con
+    clave en [d - max_d, d + max_d] pueden contener resultados.
+    """
+    
+    def __init__(self, distancia=None):
+        self.distancia = distancia or edit_distance_optimizado
+        self.raiz = None          # (palabra, {dist: hijo})
+        self.comparaciones = 0    # contador para medir cuánto se poda
+    
+    def insertar(self, palabra: str):
+        if self.raiz is None:
+            self.raiz = (palabra, {})
+            return
+        nodo = self.raiz
+        while True:
+            d = self.distancia(palabra, nodo[0])
+            if d == 0:
+                return  # ya está
+            hijo = nodo[1].get(d)
+            if hijo is None:
+                nodo[1][d] = (palabra, {})
+                return
+            nodo = hijo
+    
+    def buscar(self, palabra: str, max_d: int) -> list[tuple[str, int]]:
+        resultados = []
+        pendientes = [self.raiz] if self.raiz else []
+        while pendientes:
+            termino, hijos = pendientes.pop()
+            d = self.distancia(palabra, termino)
+            self.comparaciones += 1
+            if d <= max_d:
+                resultados.append((termino, d))
+            for clave, hijo in hijos.items():
+                if d - max_d <= clave <= d + max_d:
+                    pendientes.append(hijo)
+        return resultados
+
+
+def _borrados(palabra: str, max_d: int) -> set[str]:
+    """Todas las variantes de `palabra` con hasta max_d caracteres borrados."""
+    resultado = {palabra}
+    frontera = {palabra}
+    for _ in range(max_d):
+        frontera = {p[:i] + p[i + 1:] for p in frontera for i in range(len(p))}
+        resultado |= frontera
+    return resultado
+
+
+class SymSpellIndex:
+    """
+    Índice de borrados (SymSpell). Si lev(a, b) <= k, existe una cadena a la
+    que se llega borrando <= k caracteres de a Y <= k de b (una sustitución
+    es un borrado en cada lado; una inserción, un borrado en el otro).
+    Precomputamos los borrados del diccionario; en la consulta generamos los
+    del query y solo verificamos con edit distance exacta los que coinciden.
+    Consulta muy rápida a cambio de memoria: ~C(len, k) entradas por palabra.
+    """
+    
+    def __init__(self, max_d: int = 2):
+        self.max_d = max_d
+        self.borrados = {}        # variante -> set de palabras
+        self.comparaciones = 0
+    
+    def insertar(self, palabra: str):
+        for variante in _borrados(palabra, self.max_d):
+            self.borrados.setdefault(variante, set()).add(palabra)
+    
+    def buscar(self, palabra: str, max_d: int) -> list[tuple[str, int]]:
+        candidatos = set()
+        for variante in _borrados(palabra, max_d):
+            candidatos |= self.borrados.get(variante, set())
+        resultados = []
+        for candidato in candidatos:
+            if abs(len(candidato) - len(palabra)) > max_d:
+                continue
+            self.comparaciones += 1
+            d = edit_distance_optimizado(palabra, candidato)
+            if d <= max_d:
+                resultados.append((candidato, d))
+        return resultados
+
+
 class SpellChecker:
-    """Corrector ortográfico basado en Edit Distance."""
+    """Corrector ortográfico basado en Edit Distance (con índice opcional)."""
     
-    def __init__(self, diccionario: list[str]):
+    def __init__(self, diccionario: list[str], indice: Optional[str] = None,
+                 max_distancia_indice: int = 2):
         self.diccionario = diccionario
+        self.max_distancia_indice = max_distancia_indice
+        self.indice = None
+        if indice is not None:
+            # Las búsquedas son en minúsculas; guardamos qué entradas originales
+            # corresponden a cada forma en minúsculas.
+            self._originales = {}
+            for palabra_dict in diccionario:
+                self._originales.setdefault(palabra_dict.lower(), []).append(palabra_dict)
+            if indice == "bktree":
+                self.indice = BKTree()
+            elif indice == "symspell":
+                self.indice = SymSpellIndex(max_distancia_indice)
+            else:
+                raise ValueError(f"Índice desconocido: {indice!r} (usa 'bktree' o 'symspell')")
+            for forma in self._originales:
+                self.indice.insertar(forma)
     
     def corregir(self, palabra: str, max_distancia: int = 3, 
                  top_k: int = 5) -> list[tuple[str, int]]:
         """
         Retorna las top_k palabras más cercanas con distancia <= max_distancia.
         """
-        candidatos = []
-        for palabra_dict in self.diccionario:
-            d = edit_distance_optimizado(palabra.lower(), palabra_dict.lower())
-            if d <= max_distancia:
-                candidatos.append((palabra_dict, d))
+        if self.indice is not None and max_distancia <= self.max_distancia_indice:
+            candidatos = [(original, d)
+                          for forma, d in self.indice.buscar(palabra.lower(), max_distancia)
+                          for original in self._originales[forma]]
+        else:
+            candidatos = []
+            for palabra_dict in self.diccionario:
+                d = edit_distance_optimizado(palabra.lower(), palabra_dict.lower())
+                if d <= max_distancia:
+                    candidatos.append((palabra_dict, d))
         
         # Ordenar por distancia, luego alfabéticamente
         candidatos.sort(key=lambda x: (x[1], x[0]))
         return candidatos[:top_k]
+    
+    def corregir_lote(self, tokens: list[str], max_distancia: int = 2,
+                      top_k: int = 1) -> list[list[tuple[str, int]]]:
+        """Corrige un stream de tokens; cada token distinto se busca una sola vez."""
+        memo = {}
+        resultados = []
+        for token in tokens:
+            if token not in memo:
+                memo[token] = self.corregir(token, max_distancia, top_k)
+            resultados.append(memo[token])
+        return resultados
 
 # Diccionario de términos ML
 diccionario_ml = [
@@ -735,6 +855,68 @@ for palabra in palabras_con_error:
         print("Sin sugerencias")
 
 
+print("\n--- Índices BK-tree y SymSpell para vocabularios grandes ---")
+
+"""
+corregir() sin índice calcula la edit distance contra TODO el diccionario:
+con 500K términos son 500K DPs de O(N×M) por cada tecla pulsada.
+Para autocorrección en vivo (max_distancia <= 2) construimos el índice UNA
+vez y cada consulta solo toca una fracción mínima del vocabulario, con
+exactamente la misma salida ordenada (palabra, distancia).
+"""
+
+for nombre_indice in ("bktree", "symspell"):
+    checker_idx = SpellChecker(diccionario_ml, indice=nombre_indice)
+    iguales = all(checker_idx.corregir(p, max_distancia=2) == checker.corregir(p, max_distancia=2)
+                  for p in palabras_con_error)
+    print(f"  {nombre_indice:<8}: mismas sugerencias que el escaneo completo: {iguales}")
+
+print(f"\n  Lote: {SpellChecker(diccionario_ml, indice='symspell').corregir_lote(['pyton', 'modl', 'pyton', 'batchh'])}")
+
+import random
+
+def _con_errata(palabra: str, rng: random.Random) -> str:
+    """Aplica 1-2 ediciones aleatorias (borrado, inserción o sustitución)."""
+    letras = "abcdefghijklmnopqrstuvwxyz"
+    for _ in range(rng.randint(1, 2)):
+        i = rng.randrange(len(palabra))
+        op = rng.choice(("del", "ins", "sub"))
+        if op == "del" and len(palabra) > 3:
+            palabra = palabra[:i] + palabra[i + 1:]
+        elif op == "ins":
+            palabra = palabra[:i] + rng.choice(letras) + palabra[i:]
+        else:
+            palabra = palabra[:i] + rng.choice(letras) + palabra[i + 1:]
+    return palabra
+
+rng_sc = random.Random(7)
+vocab_grande = sorted({"".join(rng_sc.choices("abcdefghijklmnopqrstuvwxyz", k=rng_sc.randint(5, 10)))
+                       for _ in range(10_000)})
+queries_sc = [_con_errata(rng_sc.choice(vocab_grande), rng_sc) for _ in range(100)]
+
+print(f"\n  Vocabulario sintético: {len(vocab_grande):,} términos, {len(queries_sc)} queries con 1-2 erratas")
+escaneo = SpellChecker(vocab_grande)
+inicio = time.perf_counter()
+referencia = [escaneo.corregir(q, max_distancia=2) for q in queries_sc[:5]]
+t_escaneo = (time.perf_counter() - inicio) / 5
+print(f"  {'escaneo':<9} construcción      -    | {t_escaneo*1000:8.2f} ms/query | "
+      f"comparaciones/query: {len(vocab_grande):,}")
+
+# El BK-tree poda peor con strings aleatorios (las distancias se concentran en
+# un rango estrecho) que con vocabulario real; por eso medimos menos queries.
+for nombre_indice, n_queries in (("bktree", 10), ("symspell", len(queries_sc))):
+    inicio = time.perf_counter()
+    checker_idx = SpellChecker(vocab_grande, indice=nombre_indice)
+    t_build = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    resultados_idx = [checker_idx.corregir(q, max_distancia=2) for q in queries_sc[:n_queries]]
+    t_query = (time.perf_counter() - inicio) / n_queries
+    assert resultados_idx[:5] == referencia
+    comparaciones = checker_idx.indice.comparaciones / n_queries
+    print(f"  {nombre_indice:<9} construcción {t_build:5.1f}s | {t_query*1000:8.2f} ms/query | "
+          f"comparaciones/query: {comparaciones:,.0f} ({comparaciones/len(vocab_grande):.1%})")
+
+
 print("\n" + "=" * 80)
 print("=== CAPÍTULO 11: MAXIMUM SUBARRAY (KADANE'S ALGORITHM) ===")
 print("=" * 80)
@@ -991,6 +1173,8 @@ RESUMEN DE PROGRAMACIÓN DINÁMICA PARA INGENIERÍA IA:
 3. Fibonacci: el ejemplo canónico. 2^N -> N. lru_cache lo hace trivial.
 
 4. Edit Distance (Levenshtein): O(N×M). Fundamental en NLP.
+   Con vocabularios grandes: índice SymSpell/BK-tree construido una vez,
+   y solo se verifica con DP una fracción mínima del diccionario.
 
 5. LCS: base de ROUGE-L. Knapsack: feature selection con budget.
 
@@ -383,43 +383,237 @@ print("=" * 80)
 """
 lru_cache no tiene TTL (Time To Live). A veces necesitas que 
 los resultados cacheados EXPIREN después de un tiempo.
+
+Una versión ingenua (dict + timestamp) tiene tres problemas en producción:
+
+1. EXPULSIÓN O(maxsize): buscar "la entrada más antigua" con
+   min(cache, key=...) recorre TODO el cache en cada inserción con el cache lleno.
+   Solución: dos OrderedDict. Uno en ORDEN DE EXPIRACIÓN (como el TTL es
+   constante, el orden de inserción ES el orden de expiración: la cabeza es
+   siempre la siguiente en caducar) y otro en ORDEN LRU (move_to_end en cada
+   acceso). Purgar caducadas = mirar solo la cabeza. Expulsar por tamaño =
+   popitem(last=False) del LRU. Todo O(1) amortizado.
+
+2. ESTAMPIDA (cache stampede / thundering herd): cuando una clave caliente
+   expira, los N hilos que la piden a la vez fallan TODOS y ejecutan la función
+   costosa N veces en paralelo. Solución: SINGLE-FLIGHT. El primer hilo que
+   falla registra un "vuelo" en curso para esa clave; los demás esperan en un
+   threading.Event a que termine y reutilizan su resultado (o su excepción).
+
+3. LATENCIA EN LA EXPIRACIÓN: incluso con single-flight, alguien paga el
+   recálculo. Con STALE-WHILE-REVALIDATE, durante `stale_seconds` después de
+   caducar devolvemos el valor viejo al instante y lanzamos el recálculo en
+   segundo plano (una sola vez, también single-flight).
+
+El mismo decorador detecta si la función es una corrutina (async def) y
+aplica las mismas políticas con asyncio.Future en lugar de threading.Event.
+cache_info() devuelve las mismas estadísticas que functools.lru_cache.
 """
 
-def cache_con_ttl(ttl_seconds: float = 60.0, maxsize: int = 128):
-    """Cache que expira entries después de ttl_seconds."""
+import asyncio
+import inspect
+import threading
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class _AlmacenTTL:
+    """Estructuras O(1) del cache: orden LRU + orden de expiración."""
+    def __init__(self, ttl_seconds: float, maxsize: int, stale_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self.stale_seconds = stale_seconds
+        self.lru = OrderedDict()             # key -> (resultado, expira_en), orden de uso
+        self.por_expiracion = OrderedDict()  # key -> expira_en, orden de caducidad
+        self.hits = 0
+        self.misses = 0   # misses = llamadas reales a la función
+        self.lock = threading.Lock()
+
+    def _purgar(self, ahora: float):
+        # Solo miramos la CABEZA. Cada entrada se purga como mucho una vez,
+        # así que el coste es O(1) amortizado por operación.
+        limite = ahora - self.stale_seconds
+        while self.por_expiracion:
+            key, expira_en = next(iter(self.por_expiracion.items()))
+            if expira_en > limite:
+                break
+            del self.por_expiracion[key]
+            del self.lru[key]
+
+    def buscar(self, key) -> tuple:
+        """Devuelve (estado, resultado) con estado en 'fresco' | 'stale' | 'miss'."""
+        ahora = time.monotonic()
+        self._purgar(ahora)
+        entrada = self.lru.get(key)
+        if entrada is None:
+            return "miss", None
+        self.lru.move_to_end(key)
+        resultado, expira_en = entrada
+        return ("fresco" if ahora < expira_en else "stale"), resultado
+
+    def guardar(self, key, resultado):
+        # monotonic() bajo el lock: las expiraciones se insertan en orden creciente
+        expira_en = time.monotonic() + self.ttl_seconds
+        self.por_expiracion.pop(key, None)
+        self.por_expiracion[key] = expira_en
+        self.lru[key] = (resultado, expira_en)
+        self.lru.move_to_end(key)
+        while len(self.lru) > self.maxsize:
+            expulsada, _ = self.lru.popitem(last=False)
+            del self.por_expiracion[expulsada]
+
+    def clear(self):
+        self.lru.clear()
+        self.por_expiracion.clear()
+        self.hits = self.misses = 0
+
+
+class _Vuelo:
+    """Cálculo en curso de una clave (single-flight en la versión síncrona)."""
+    __slots__ = ("evento", "resultado", "error")
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+def cache_con_ttl(ttl_seconds: float = 60.0, maxsize: int = 128,
+                  stale_seconds: float = 0.0):
+    """
+    Cache TTL + LRU con expulsión O(1), protección contra estampidas
+    (single-flight) y stale-while-revalidate opcional. Soporta async def.
+    """
     def decorador(func):
-        cache = {}
-        
+        almacen = _AlmacenTTL(ttl_seconds, maxsize, stale_seconds)
+        en_vuelo = {}
+
+        def _clave(args, kwargs):
+            return (args, tuple(sorted(kwargs.items())))
+
+        def _calcular(key, vuelo, args, kwargs):
+            try:
+                vuelo.resultado = func(*args, **kwargs)
+            except BaseException as e:  # se propaga a TODOS los que esperan
+                vuelo.error = e
+            with almacen.lock:
+                if vuelo.error is None:
+                    almacen.guardar(key, vuelo.resultado)
+                del en_vuelo[key]
+            vuelo.evento.set()
+
+        def _revalidar(key, vuelo, args, kwargs):
+            _calcular(key, vuelo, args, kwargs)
+            if vuelo.error is not None:
+                logging.warning("Revalidación de %s falló: %r", func.__name__, vuelo.error)
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            key = (args, tuple(sorted(kwargs.items())))
-            ahora = time.time()
-            
-            if key in cache:
-                resultado, timestamp = cache[key]
-                if ahora - timestamp < ttl_seconds:
-                    return resultado
+            key = _clave(args, kwargs)
+            revalidar = None
+            with almacen.lock:
+                estado, resultado = almacen.buscar(key)
+                if estado != "miss":
+                    almacen.hits += 1
+                    if estado == "stale" and key not in en_vuelo:
+                        revalidar = en_vuelo[key] = _Vuelo()
+                        almacen.misses += 1
+                    if revalidar is None:
+                        return resultado
                 else:
-                    del cache[key]
-            
-            # Evitar que la caché crezca sin límite
-            if len(cache) >= maxsize:
-                # Eliminar la entrada más antigua
-                oldest_key = min(cache, key=lambda k: cache[k][1])
-                del cache[oldest_key]
-            
-            resultado = func(*args, **kwargs)
-            cache[key] = (resultado, ahora)
+                    vuelo = en_vuelo.get(key)
+                    es_lider = vuelo is None
+                    if es_lider:
+                        vuelo = en_vuelo[key] = _Vuelo()
+                        almacen.misses += 1
+                    else:
+                        almacen.hits += 1  # no ejecuta func: reutiliza el vuelo
+            if revalidar is not None:
+                threading.Thread(target=_revalidar, args=(key, revalidar, args, kwargs),
+                                 daemon=True).start()
+                return resultado
+            if es_lider:
+                _calcular(key, vuelo, args, kwargs)
+            else:
+                vuelo.evento.wait()
+            if vuelo.error is not None:
+                raise vuelo.error
+            return vuelo.resultado
+
+        tareas_fondo = set()  # referencias fuertes a las revalidaciones async
+
+        async def _calcular_async(key, futuro, args, kwargs):
+            try:
+                resultado = await func(*args, **kwargs)
+            except BaseException as e:
+                en_vuelo.pop(key, None)
+                if isinstance(e, asyncio.CancelledError):
+                    futuro.cancel()
+                else:
+                    futuro.set_exception(e)
+                    futuro.exception()  # marcada como recuperada: sin warning si nadie espera
+                raise
+            with almacen.lock:
+                almacen.guardar(key, resultado)
+            en_vuelo.pop(key, None)
+            futuro.set_result(resultado)
             return resultado
-        
-        wrapper.cache = cache
-        wrapper.cache_clear = lambda: cache.clear()
-        return wrapper
+
+        def _fin_revalidacion(tarea):
+            tareas_fondo.discard(tarea)
+            if not tarea.cancelled() and tarea.exception() is not None:
+                logging.warning("Revalidación de %s falló: %r", func.__name__, tarea.exception())
+
+        @functools.wraps(func)
+        async def wrapper_async(*args, **kwargs):
+            key = _clave(args, kwargs)
+            with almacen.lock:
+                estado, resultado = almacen.buscar(key)
+                if estado != "miss":
+                    almacen.hits += 1
+                    if estado == "stale" and key not in en_vuelo:
+                        almacen.misses += 1
+                        futuro = en_vuelo[key] = asyncio.get_running_loop().create_future()
+                        tarea = asyncio.ensure_future(_calcular_async(key, futuro, args, kwargs))
+                        tareas_fondo.add(tarea)
+                        tarea.add_done_callback(_fin_revalidacion)
+                    return resultado
+                futuro = en_vuelo.get(key)
+                if futuro is None:
+                    almacen.misses += 1
+                    futuro = en_vuelo[key] = asyncio.get_running_loop().create_future()
+                    es_lider = True
+                else:
+                    almacen.hits += 1
+                    es_lider = False
+            if es_lider:
+                return await _calcular_async(key, futuro, args, kwargs)
+            # shield: si cancelan a un seguidor, el cálculo del líder sigue
+            return await asyncio.shield(futuro)
+
+        def cache_info():
+            with almacen.lock:
+                return CacheInfo(almacen.hits, almacen.misses, maxsize, len(almacen.lru))
+
+        def cache_clear():
+            with almacen.lock:
+                almacen.clear()
+
+        envoltorio = wrapper_async if inspect.iscoroutinefunction(func) else wrapper
+        envoltorio.cache = almacen.lru
+        envoltorio.cache_info = cache_info
+        envoltorio.cache_clear = cache_clear
+        return envoltorio
     return decorador
 
+llamadas_reales = 0
+
 @cache_con_ttl(ttl_seconds=0.1)  # TTL de 100ms
 def embedding_costoso(texto: str) -> list:
     """Simula un cómputo costoso de embedding."""
+    global llamadas_reales
+    llamadas_reales += 1
     time.sleep(0.01)
     return [hash(texto) % 100 / 100]
 
@@ -439,6 +633,62 @@ t1 = time.perf_counter()
 embedding_costoso("hola mundo")
 print(f"  3ª llamada: {(time.perf_counter()-t1)*1000:.1f}ms (cache expiró)")
 
+print("\n--- Single-flight: 16 hilos fallan la misma clave a la vez ---")
+time.sleep(0.11)  # forzar expiración
+llamadas_reales = 0
+hilos = [threading.Thread(target=embedding_costoso, args=("hola mundo",)) for _ in range(16)]
+for h in hilos:
+    h.start()
+for h in hilos:
+    h.join()
+print(f"  Ejecuciones reales de la función: {llamadas_reales} (sin single-flight serían 16)")
+print(f"  {embedding_costoso.cache_info()}")
+
+print("\n--- Expulsión LRU O(1) con maxsize ---")
+
+@cache_con_ttl(ttl_seconds=60, maxsize=3)
+def cuadrado(x):
+    return x * x
+
+for x in [1, 2, 3, 1, 4]:   # el 1 se reutiliza, así que el expulsado es el 2
+    cuadrado(x)
+print(f"  Claves en cache (orden LRU): {[k[0][0] for k in cuadrado.cache]}")
+
+print("\n--- Stale-while-revalidate ---")
+
+@cache_con_ttl(ttl_seconds=0.05, stale_seconds=1.0)
+def config_remota(nombre):
+    time.sleep(0.02)
+    return time.monotonic()
+
+v1 = config_remota("modelo")
+time.sleep(0.06)  # caducado, pero dentro de la ventana stale
+t1 = time.perf_counter()
+v2 = config_remota("modelo")
+print(f"  Tras expirar: {(time.perf_counter()-t1)*1000:.2f}ms, valor viejo servido: {v1 == v2}")
+time.sleep(0.05)  # la revalidación en segundo plano ya terminó
+print(f"  Siguiente llamada ya ve el valor nuevo: {config_remota('modelo') != v1}")
+
+print("\n--- Versión async (corrutinas) ---")
+
+llamadas_async = 0
+
+@cache_con_ttl(ttl_seconds=5)
+async def embedding_remoto(texto: str) -> list:
+    global llamadas_async
+    llamadas_async += 1
+    await asyncio.sleep(0.01)
+    return [len(texto) / 10]
+
+async def _demo_async():
+    resultados = await asyncio.gather(*(embedding_remoto("hola") for _ in range(50)))
+    return resultados
+
+resultados_async = asyncio.run(_demo_async())
+print(f"  50 corrutinas concurrentes -> {llamadas_async} ejecución real, "
+      f"resultados iguales: {len(set(map(tuple, resultados_async))) == 1}")
+print(f"  {embedding_remoto.cache_info()}")
+
 
 print("\n" + "=" * 80)
 print("=== CAPÍTULO 10: DECORADOR SINGLEDISPATCH ===")
@@ -1044,7 +1294,7 @@ RESUMEN DE DECORADORES PARA INGENIERIA IA:
    - @retry: reintentar llamadas a APIs/DBs.
    - @log_calls: trazabilidad de pipelines.
    - @validar_tipos: validar inputs en runtime.
-   - @cache_con_ttl: cache con expiracion.
+   - @cache_con_ttl: cache TTL+LRU O(1) con single-flight (sync y async).
    - @rate_limit: limitar calls a APIs externas.
    - @deprecated: marcar funciones obsoletas.
    - @profile: medir tiempo + memoria.
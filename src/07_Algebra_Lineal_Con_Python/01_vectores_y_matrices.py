@@ -524,17 +524,221 @@ print("=" * 80)
 """
 Construir un mini motor de busqueda usando embeddings y
 similaridad coseno. Esto es la BASE de RAG.
+
+La busqueda por fuerza bruta (embeddings @ q + argsort completo) cuesta
+O(N*d + N log N) por query y obliga a tener todos los embeddings en RAM
+en float64. Para millones de documentos se usan INDICES APROXIMADOS
+(ANN, Approximate Nearest Neighbours), con la misma idea que FAISS:
+
+1. FlatIndex: exacto. float32 (mitad de memoria que float64) y
+   np.argpartition para el top-k: O(N) en vez de O(N log N).
+
+2. IVFIndex (Inverted File): k-means agrupa los vectores en `nlist`
+   celdas. Cada query solo compara contra los vectores de las `nprobe`
+   celdas con centroide mas parecido. Coste ~ N * nprobe / nlist.
+
+3. IVFPQIndex (IVF + Product Quantization): ademas comprime el residuo
+   (vector - centroide) partiendolo en `m` subvectores y guardando, para
+   cada uno, el indice (uint8) de su centroide mas cercano de entre 256.
+   Un vector de 64 floats32 (256 bytes) pasa a ocupar m=8 bytes.
+   La similitud se aproxima con una tabla de consulta (m x 256) que se
+   calcula UNA vez por query:
+       q . x  ~=  q . c_lista  +  sum_j  LUT[j, codigo_j]
+
+Los tres comparten la misma interfaz: add(X), search(Q, k) -> (scores, ids),
+con Q como batch de queries. Metrica: producto interno sobre vectores
+normalizados (= similaridad coseno).
 """
 
+def _top_k_filas(scores: np.ndarray, k: int):
+    """Top-k (mayor score) por fila con argpartition: O(N) + O(k log k)."""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((scores.shape[0], 0), scores.dtype), np.empty((scores.shape[0], 0), np.int64)
+    parte = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    parte_scores = np.take_along_axis(scores, parte, axis=1)
+    orden = np.argsort(-parte_scores, axis=1)
+    return np.take_along_axis(parte_scores, orden, axis=1), np.take_along_axis(parte, orden, axis=1)
+
+
+def _kmeans_simple(X: np.ndarray, k: int, n_iter: int = 20, seed: int = 0) -> np.ndarray:
+    """Lloyd basico en float32 para entrenar cuantizadores (centroides)."""
+    rng = np.random.default_rng(seed)
+    centroides = X[rng.choice(len(X), size=k, replace=len(X) < k)].copy()
+    for _ in range(n_iter):
+        # argmin ||x - c||^2 = argmin (||c||^2 - 2 x.c)
+        asignacion = np.argmin((centroides ** 2).sum(axis=1) - 2 * X @ centroides.T, axis=1)
+        sumas = np.zeros_like(centroides)
+        np.add.at(sumas, asignacion, X)
+        cuentas = np.bincount(asignacion, minlength=k)
+        vivos = cuentas > 0
+        centroides[vivos] = sumas[vivos] / cuentas[vivos, None]
+    return centroides
+
+
+class FlatIndex:
+    """Indice exacto: producto interno contra todos los vectores, top-k con argpartition."""
+
+    necesita_entrenamiento = False
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._bloques = []
+        self._datos = np.empty((0, dim), np.float32)
+
+    def add(self, X: np.ndarray):
+        # Los bloques se concatenan en la siguiente busqueda (add incremental barato)
+        self._bloques.append(np.asarray(X, dtype=np.float32))
+
+    @property
+    def ntotal(self) -> int:
+        return len(self._datos) + sum(len(b) for b in self._bloques)
+
+    def search(self, Q: np.ndarray, k: int):
+        if self._bloques:
+            self._datos = np.concatenate([self._datos] + self._bloques)
+            self._bloques = []
+        scores = np.asarray(Q, dtype=np.float32) @ self._datos.T
+        return _top_k_filas(scores, k)
+
+
+class IVFIndex:
+    """Inverted File: k-means grueso en nlist celdas, cada query explora nprobe celdas."""
+
+    necesita_entrenamiento = True
+
+    def __init__(self, dim: int, nlist: int = 64, nprobe: int = 8):
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.centroides = None
+        self._ids = [[] for _ in range(nlist)]     # bloques pendientes por lista
+        self._vecs = [[] for _ in range(nlist)]
+        self._ntotal = 0
+
+    @property
+    def entrenado(self) -> bool:
+        return self.centroides is not None
+
+    @property
+    def ntotal(self) -> int:
+        return self._ntotal
+
+    def train(self, X: np.ndarray):
+        self.centroides = _kmeans_simple(np.asarray(X, dtype=np.float32), self.nlist)
+
+    def _asignar(self, X: np.ndarray) -> np.ndarray:
+        return np.argmax(X @ self.centroides.T, axis=1)
+
+    def _codificar(self, X: np.ndarray, listas: np.ndarray) -> np.ndarray:
+        return X  # IVF "plano": guarda el vector completo
+
+    def add(self, X: np.ndarray):
+        if not self.entrenado:
+            raise RuntimeError("Llama a train() antes de add()")
+        X = np.asarray(X, dtype=np.float32)
+        listas = self._asignar(X)
+        ids = np.arange(self._ntotal, self._ntotal + len(X))
+        codigos = self._codificar(X, listas)
+        orden = np.argsort(listas, kind="stable")
+        cortes = np.searchsorted(listas[orden], np.arange(self.nlist + 1))
+        for lista in np.flatnonzero(np.diff(cortes)):
+            sel = orden[cortes[lista]:cortes[lista + 1]]
+            self._ids[lista].append(ids[sel])
+            self._vecs[lista].append(codigos[sel])
+        self._ntotal += len(X)
+
+    def _lista(self, lista: int):
+        # Consolida los bloques de una lista en un unico array (perezoso)
+        if len(self._ids[lista]) > 1:
+            self._ids[lista] = [np.concatenate(self._ids[lista])]
+            self._vecs[lista] = [np.concatenate(self._vecs[lista])]
+        if not self._ids[lista]:
+            return None, None
+        return self._ids[lista][0], self._vecs[lista][0]
+
+    def _scores_lista(self, q: np.ndarray, lista: int, codigos: np.ndarray, contexto) -> np.ndarray:
+        return codigos @ q
+
+    def _contexto_query(self, q: np.ndarray):
+        return None
+
+    def search(self, Q: np.ndarray, k: int):
+        Q = np.asarray(Q, dtype=np.float32)
+        # Celdas a explorar para TODO el batch de una vez
+        _, probes = _top_k_filas(Q @ self.centroides.T, self.nprobe)
+        scores_out = np.full((len(Q), k), -np.inf, dtype=np.float32)
+        ids_out = np.full((len(Q), k), -1, dtype=np.int64)
+        for i, q in enumerate(Q):
+            contexto = self._contexto_query(q)
+            ids_cand, scores_cand = [], []
+            for lista in probes[i]:
+                ids, codigos = self._lista(lista)
+                if ids is not None:
+                    ids_cand.append(ids)
+                    scores_cand.append(self._scores_lista(q, lista, codigos, contexto))
+            if not ids_cand:
+                continue
+            scores = np.concatenate(scores_cand)[None, :]
+            top_s, top_pos = _top_k_filas(scores, k)
+            n = top_s.shape[1]
+            scores_out[i, :n] = top_s[0]
+            ids_out[i, :n] = np.concatenate(ids_cand)[top_pos[0]]
+        return scores_out, ids_out
+
+
+class IVFPQIndex(IVFIndex):
+    """IVF + Product Quantization: residuos comprimidos en m codigos uint8 por vector."""
+
+    def __init__(self, dim: int, nlist: int = 64, nprobe: int = 8, m: int = 8):
+        if dim % m:
+            raise ValueError(f"dim={dim} debe ser divisible por m={m}")
+        super().__init__(dim, nlist, nprobe)
+        self.m = m
+        self.dsub = dim // m
+        self.codebooks = None  # (m, 256, dsub)
+        self._offsets_lut = np.arange(m) * 256
+
+    def train(self, X: np.ndarray):
+        X = np.asarray(X, dtype=np.float32)
+        super().train(X)
+        residuos = X - self.centroides[self._asignar(X)]
+        self.codebooks = np.stack([
+            _kmeans_simple(residuos[:, j * self.dsub:(j + 1) * self.dsub], 256, n_iter=10, seed=j)
+            for j in range(self.m)
+        ])
+
+    def _codificar(self, X: np.ndarray, listas: np.ndarray) -> np.ndarray:
+        residuos = X - self.centroides[listas]
+        codigos = np.empty((len(X), self.m), dtype=np.uint8)
+        for j in range(self.m):
+            sub = residuos[:, j * self.dsub:(j + 1) * self.dsub]
+            cb = self.codebooks[j]
+            codigos[:, j] = np.argmin((cb ** 2).sum(axis=1) - 2 * sub @ cb.T, axis=1)
+        return codigos
+
+    def _contexto_query(self, q: np.ndarray):
+        # LUT[j, c] = q_j . codebook_j[c]: una vez por query, valida para todas las listas
+        return np.einsum("jd,jcd->jc", q.reshape(self.m, self.dsub), self.codebooks)
+
+    def _scores_lista(self, q, lista, codigos, lut):
+        # Indexacion plana sobre la LUT: fila j empieza en j*256
+        return q @ self.centroides[lista] + lut.ravel()[codigos + self._offsets_lut].sum(axis=1)
+
+    @property
+    def bytes_por_vector(self) -> int:
+        return self.m
+
+
 print("\n--- Mini search engine ---")
 
 class SemanticSearch:
-    """Motor de busqueda basado en embeddings."""
+    """Motor de busqueda basado en embeddings, con indice vectorial intercambiable."""
     
-    def __init__(self, embed_dim: int = 16):
+    def __init__(self, embed_dim: int = 16, index=None):
         self.embed_dim = embed_dim
         self.documentos = []
-        self.embeddings = None
+        self.index = index if index is not None else FlatIndex(embed_dim)
         self.rng = np.random.RandomState(42)
     
     def _embed(self, texto: str) -> np.ndarray:
@@ -542,26 +746,28 @@ class SemanticSearch:
         np.random.seed(hash(texto) % 2**31)
         return np.random.randn(self.embed_dim)
     
+    def _embed_normalizado(self, textos: list[str]) -> np.ndarray:
+        embs = np.array([self._embed(t) for t in textos], dtype=np.float32)
+        return embs / np.linalg.norm(embs, axis=1, keepdims=True)
+    
     def indexar(self, documentos: list[str]):
-        """Indexar documentos."""
-        self.documentos = documentos
-        embs = np.array([self._embed(doc) for doc in documentos])
-        norms = np.linalg.norm(embs, axis=1, keepdims=True)
-        self.embeddings = embs / norms  # Normalizar
-        print(f"  Indexados {len(documentos)} documentos ({self.embeddings.shape})")
+        """Indexar documentos (incremental: se anaden a los ya indexados)."""
+        embs = self._embed_normalizado(documentos)
+        if self.index.necesita_entrenamiento and not self.index.entrenado:
+            self.index.train(embs)
+        self.index.add(embs)
+        self.documentos.extend(documentos)
+        print(f"  Indexados {len(documentos)} documentos (total={self.index.ntotal}, dim={self.embed_dim})")
+    
+    def buscar_batch(self, queries: list[str], top_k: int = 3) -> list:
+        """Buscar varias queries en una sola llamada al indice."""
+        scores, ids = self.index.search(self._embed_normalizado(queries), top_k)
+        return [[(self.documentos[i], float(s)) for s, i in zip(fila_s, fila_i) if i >= 0]
+                for fila_s, fila_i in zip(scores, ids)]
     
     def buscar(self, query: str, top_k: int = 3) -> list:
         """Buscar documentos similares."""
-        q_emb = self._embed(query)
-        q_emb = q_emb / np.linalg.norm(q_emb)
-        
-        # Similaridad coseno: dot con embeddings normalizados
-        scores = self.embeddings @ q_emb
-        
-        # Top-K
-        top_idx = np.argsort(scores)[::-1][:top_k]
-        
-        return [(self.documentos[i], float(scores[i])) for i in top_idx]
+        return self.buscar_batch([query], top_k)[0]
 
 search = SemanticSearch(embed_dim=32)
 
@@ -585,6 +791,55 @@ for q in queries:
     for doc, score in resultados:
         print(f"    [{score:.3f}] {doc}")
 
+search.indexar(["Kubernetes orquesta contenedores en produccion"])
+print(f"  Tras indexar 1 doc mas: {search.buscar('orquestacion de contenedores', top_k=1)}")
+
+
+print("\n--- Indices vectoriales: recall@k y QPS por backend ---")
+
+def evaluar_indice(index, X_base: np.ndarray, Q: np.ndarray, k: int = 10) -> dict:
+    """Recall@k frente a la busqueda exacta y queries por segundo (batch)."""
+    _, exactos = _top_k_filas(Q @ X_base.T, k)
+    start = time.perf_counter()
+    _, ids = index.search(Q, k)
+    segundos = time.perf_counter() - start
+    aciertos = sum(len(np.intersect1d(a, b)) for a, b in zip(ids, exactos))
+    return {"recall": aciertos / exactos.size, "qps": len(Q) / segundos}
+
+# Embeddings sinteticos con estructura de clusters (como los reales)
+rng_ann = np.random.default_rng(0)
+n_base, dim_ann = 20_000, 64
+centros_ann = rng_ann.standard_normal((100, dim_ann)).astype(np.float32)
+X_ann = centros_ann[rng_ann.integers(0, 100, n_base)] + 0.5 * rng_ann.standard_normal((n_base, dim_ann)).astype(np.float32)
+X_ann /= np.linalg.norm(X_ann, axis=1, keepdims=True)
+Q_ann = X_ann[rng_ann.choice(n_base, 200, replace=False)] + 0.1 * rng_ann.standard_normal((200, dim_ann)).astype(np.float32)
+Q_ann /= np.linalg.norm(Q_ann, axis=1, keepdims=True)
+
+backends = [("Flat (exacto)", FlatIndex(dim_ann), 4 * dim_ann)]
+for nprobe in (4, 16):
+    backends.append((f"IVF nlist=128 nprobe={nprobe}", IVFIndex(dim_ann, nlist=128, nprobe=nprobe), 4 * dim_ann))
+backends.append(("IVF-PQ m=8 nprobe=16", IVFPQIndex(dim_ann, nlist=128, nprobe=16, m=8), 8))
+
+print(f"  Base: {n_base} vectores x {dim_ann}D, 200 queries, k=10")
+print(f"  {'Backend':<24} {'recall@10':>9} {'QPS':>9} {'bytes/vec':>9}")
+for nombre, index, bytes_vec in backends:
+    if index.necesita_entrenamiento:
+        index.train(X_ann[:5000])
+    # Indexado incremental en dos lotes (sin reconstruir)
+    index.add(X_ann[:n_base // 2])
+    index.add(X_ann[n_base // 2:])
+    m = evaluar_indice(index, X_ann, Q_ann, k=10)
+    print(f"  {nombre:<24} {m['recall']:>9.3f} {m['qps']:>9.0f} {bytes_vec:>9}")
+
+"""
+Como elegir: Flat si N es pequeno o el recall debe ser 1.0; IVF subiendo
+nprobe hasta el recall objetivo; IVF-PQ cuando la RAM es el limite
+(32x menos memoria) aceptando perder recall (se suele re-rankear el top-100
+de PQ con los vectores exactos guardados en disco).
+Con 20K vectores Flat sigue siendo competitivo (un unico matmul BLAS); la
+ventaja de IVF crece con N, porque su coste es ~N*nprobe/nlist por query.
+"""
+
 
 print("\n" + "=" * 80)
 print("=== CAPITULO 10: BENCHMARK NUMPY VS PYTHON ===")
@@ -769,38 +1024,163 @@ KNN implementado con operaciones vectorizadas de NumPy.
 Demuestra como el algebra lineal permite ML eficiente.
 """
 
+print("\n--- Motor de distancias por bloques (memoria acotada) ---")
+
+"""
+La version "todo de golpe" de KNN calcula la matriz completa de distancias
+(n_queries x n_train) y despues hace argsort de cada fila. Con 50K puntos
+son 2.5e9 floats = 20 GB en float64 (y varios temporales de ese tamano):
+OOM garantizado.
+
+Motor por bloques (tiling):
+1. Se parte Q en bloques de filas y R en bloques de columnas de forma que
+   cada bloque (bq x br) quepa en `memoria_mb`.
+2. Cada bloque se calcula con la identidad ||a||^2 + ||b||^2 - 2 a.b:
+   el termino a.b es un np.matmul (BLAS) escrito en un buffer reutilizado.
+3. Para KNN se mantiene un top-k "corriente" por query: se concatena el
+   mejor top-k hasta ahora con el bloque nuevo y se aplica argpartition.
+   Nunca existe mas de un bloque en memoria.
+4. float32 por defecto si la entrada no es float64 (mitad de memoria y
+   matmul ~2x mas rapido). Los bloques de queries son independientes:
+   se pueden repartir en un ThreadPool (matmul libera el GIL).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _tamano_bloques(n_q: int, n_r: int, itemsize: int, memoria_mb: float) -> tuple:
+    """Filas de Q y columnas de R por bloque para que bq*br*itemsize <= memoria_mb."""
+    presupuesto = max(1, int(memoria_mb * 2**20 // itemsize))
+    br = min(n_r, max(1, presupuesto // 64))   # bloques de R anchos...
+    bq = min(n_q, max(1, presupuesto // br))   # ...y tantas filas de Q como quepan
+    return bq, br
+
+
+def _por_bloques_de_queries(fn, n_q: int, bq: int, n_hilos: int):
+    """Ejecuta fn(inicio, fin) para cada bloque de queries, opcionalmente en hilos."""
+    inicios = range(0, n_q, bq)
+    if n_hilos > 1:
+        with ThreadPoolExecutor(max_workers=n_hilos) as pool:
+            list(pool.map(lambda i: fn(i, min(i + bq, n_q)), inicios))
+    else:
+        for i in inicios:
+            fn(i, min(i + bq, n_q))
+
+
+def _dist_sq_bloque(Qb, Rb, q_sq, r_sq, out):
+    """||q||^2 + ||r||^2 - 2 q.r en `out`, in-place."""
+    np.matmul(Qb, Rb.T, out=out)
+    out *= -2
+    out += q_sq[:, None]
+    out += r_sq[None, :]
+    np.maximum(out, 0, out=out)   # negativos por redondeo
+    return out
+
+
+def _preparar(X, dtype, centro, filas: int = 4096):
+    """
+    X - centro en `dtype`, por bloques de filas, y sus normas al cuadrado.
+
+    Centrar (en float64) antes de la identidad evita la cancelacion
+    catastrofica de ||q||^2 + ||r||^2 - 2 q.r cuando las features estan
+    lejos de 0: en float32 con offset 1e3 casi ningun top-k sale bien.
+    Solo se materializa la copia en `dtype` (+ un bloque de filas float64).
+    """
+    X = np.asarray(X)
+    dtype = np.result_type(X.dtype, np.float32) if dtype is None else np.dtype(dtype)
+    C = np.empty(X.shape, dtype=dtype)
+    for s in range(0, len(X), filas):
+        np.subtract(X[s:s + filas], centro, out=C[s:s + filas], casting="unsafe")
+    return C, np.einsum("ij,ij->i", C, C)
+
+
+def pairwise_distances_bloques(X, Y=None, memoria_mb: float = 64, dtype=None,
+                               n_hilos: int = 1, out=None):
+    """
+    Distancias euclideas X vs Y (Y=X por defecto) calculadas por bloques.
+    Solo ocupa la salida + un bloque. `out` puede ser un np.memmap en disco.
+    """
+    centro = np.asarray(X if Y is None else Y).mean(axis=0, dtype=np.float64)
+    X, x_sq = _preparar(X, dtype, centro)
+    Y, y_sq = (X, x_sq) if Y is None else _preparar(Y, X.dtype, centro)
+    if out is None:
+        out = np.empty((len(X), len(Y)), dtype=X.dtype)
+    bq, br = _tamano_bloques(len(X), len(Y), X.dtype.itemsize, memoria_mb)
+
+    def bloque(i, fin):
+        buffer = np.empty((fin - i, br), dtype=X.dtype)
+        for j in range(0, len(Y), br):
+            fin_j = min(j + br, len(Y))
+            tile = _dist_sq_bloque(X[i:fin], Y[j:fin_j], x_sq[i:fin], y_sq[j:fin_j],
+                                   buffer[:, :fin_j - j])
+            np.sqrt(tile, out=out[i:fin, j:fin_j])
+
+    _por_bloques_de_queries(bloque, len(X), bq, n_hilos)
+    return out
+
+
+def kneighbors_bloques(Q, R, k: int, memoria_mb: float = 64, dtype=None, n_hilos: int = 1):
+    """
+    Los k vecinos mas cercanos de cada fila de Q en R, sin materializar la
+    matriz completa. Devuelve (distancias, indices), ambos (n_q, k), ordenados.
+    """
+    centro = np.asarray(R).mean(axis=0, dtype=np.float64)
+    Q, q_sq = _preparar(Q, dtype, centro)
+    R, r_sq = _preparar(R, Q.dtype, centro)
+    k = min(k, len(R))
+    dist = np.empty((len(Q), k), dtype=Q.dtype)
+    idx = np.empty((len(Q), k), dtype=np.int64)
+    bq, br = _tamano_bloques(len(Q), len(R), Q.dtype.itemsize, memoria_mb)
+
+    def bloque(i, fin):
+        n = fin - i
+        buffer = np.empty((n, k + br), dtype=Q.dtype)   # [top-k actual | bloque nuevo]
+        buffer_idx = np.empty((n, k + br), dtype=np.int64)
+        mejor_d = np.full((n, k), np.inf, dtype=Q.dtype)
+        mejor_i = np.zeros((n, k), dtype=np.int64)
+        for j in range(0, len(R), br):
+            fin_j = min(j + br, len(R))
+            ancho = k + fin_j - j
+            buffer[:, :k] = mejor_d
+            buffer_idx[:, :k] = mejor_i
+            _dist_sq_bloque(Q[i:fin], R[j:fin_j], q_sq[i:fin], r_sq[j:fin_j], buffer[:, k:ancho])
+            buffer_idx[:, k:ancho] = np.arange(j, fin_j)
+            sel = np.argpartition(buffer[:, :ancho], k - 1, axis=1)[:, :k]
+            mejor_d = np.take_along_axis(buffer[:, :ancho], sel, axis=1)
+            mejor_i = np.take_along_axis(buffer_idx[:, :ancho], sel, axis=1)
+        orden = np.argsort(mejor_d, axis=1, kind="stable")
+        dist[i:fin] = np.sqrt(np.take_along_axis(mejor_d, orden, axis=1))
+        idx[i:fin] = np.take_along_axis(mejor_i, orden, axis=1)
+
+    _por_bloques_de_queries(bloque, len(Q), bq, n_hilos)
+    return dist, idx
+
+
 print("\n--- KNN desde cero ---")
 
 class KNNClassifier:
-    """KNN usando distancia euclidea con NumPy vectorizado."""
+    """KNN usando distancia euclidea con NumPy vectorizado (motor por bloques)."""
     
-    def __init__(self, k: int = 3):
+    def __init__(self, k: int = 3, memoria_mb: float = 64, n_hilos: int = 1):
         self.k = k
+        self.memoria_mb = memoria_mb
+        self.n_hilos = n_hilos
     
     def fit(self, X: np.ndarray, y: np.ndarray):
         self.X_train = X
         self.y_train = y
+        # Etiquetas como codigos 0..C-1 para votar con bincount/argmax
+        self.clases_, self._codigos = np.unique(y, return_inverse=True)
     
     def predict(self, X: np.ndarray) -> np.ndarray:
-        # Calcular distancias: ||a - b||^2 = ||a||^2 + ||b||^2 - 2*a·b
-        # Esto es mucho mas rapido que loops
-        dists_sq = (
-            np.sum(X**2, axis=1, keepdims=True)    # ||a||^2
-            + np.sum(self.X_train**2, axis=1)       # ||b||^2
-            - 2 * X @ self.X_train.T                # -2*a·b
-        )
+        # ||a - b||^2 = ||a||^2 + ||b||^2 - 2*a·b por bloques + top-k con argpartition
+        _, k_nearest = kneighbors_bloques(X, self.X_train, self.k,
+                                          memoria_mb=self.memoria_mb, n_hilos=self.n_hilos)
         
-        # K vecinos mas cercanos
-        k_nearest = np.argsort(dists_sq, axis=1)[:, :self.k]
-        
-        # Voto mayoritario
-        preds = []
-        for neighbors in k_nearest:
-            labels = self.y_train[neighbors]
-            values, counts = np.unique(labels, return_counts=True)
-            preds.append(values[np.argmax(counts)])
-        
-        return np.array(preds)
+        # Voto mayoritario vectorizado (empate -> clase menor, como np.unique + argmax)
+        votos = np.zeros((len(X), len(self.clases_)), dtype=np.int64)
+        np.add.at(votos, (np.arange(len(X))[:, None], self._codigos[k_nearest]), 1)
+        return self.clases_[np.argmax(votos, axis=1)]
     
     def score(self, X: np.ndarray, y: np.ndarray) -> float:
         preds = self.predict(X)
@@ -966,14 +1346,10 @@ Fundamental en clustering (K-means), KNN, DBSCAN.
 
 print("\n--- Distancia pairwise vectorizada ---")
 
-def pairwise_distances(X):
-    """Distancia euclidea entre todos los pares. O(N^2)."""
-    # ||a - b||^2 = ||a||^2 + ||b||^2 - 2*a·b
-    sq_norms = np.sum(X**2, axis=1)
-    dists_sq = sq_norms[:, None] + sq_norms[None, :] - 2 * X @ X.T
-    # Corregir posibles negativos por precision numerica
-    dists_sq = np.maximum(dists_sq, 0)
-    return np.sqrt(dists_sq)
+def pairwise_distances(X, memoria_mb: float = 64, n_hilos: int = 1):
+    """Distancia euclidea entre todos los pares. O(N^2), calculada por bloques."""
+    # ||a - b||^2 = ||a||^2 + ||b||^2 - 2*a·b, un bloque cada vez
+    return pairwise_distances_bloques(X, memoria_mb=memoria_mb, n_hilos=n_hilos)
 
 np.random.seed(42)
 X_dist = np.random.randn(100, 10)
@@ -989,6 +1365,30 @@ print(f"  D[0,0] = {D[0,0]:.4f} (auto-distancia)")
 print(f"  D[0,1] = {D[0,1]:.4f}")
 print(f"  Simetrica: {np.allclose(D, D.T)}")
 
+print("\n--- Memoria: matriz completa vs motor por bloques ---")
+
+def pairwise_distances_ingenua(X):
+    sq_norms = np.sum(X**2, axis=1)
+    return np.sqrt(np.maximum(sq_norms[:, None] + sq_norms[None, :] - 2 * X @ X.T, 0))
+
+import tracemalloc
+X_knn_grande = np.random.randn(8_000, 32).astype(np.float32)
+for nombre, fn in [("Ingenua (N x N + temporales)", lambda: np.argsort(pairwise_distances_ingenua(X_knn_grande), axis=1)[:, :10]),
+                   ("Bloques top-k (16 MB)", lambda: kneighbors_bloques(X_knn_grande, X_knn_grande, 10, memoria_mb=16)[1]),
+                   ("Bloques top-k, 4 hilos", lambda: kneighbors_bloques(X_knn_grande, X_knn_grande, 10, memoria_mb=16, n_hilos=4)[1])]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    vecinos = fn()
+    t = time.perf_counter() - start
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"  {nombre:<30} {t*1000:8.1f} ms | pico {pico / 2**20:8.1f} MB")
+print(f"  (8000 puntos: la matriz completa ya son {8000**2 * 4 / 2**20:.0f} MB en float32;"
+      f" con 50K serian {50_000**2 * 4 / 2**30:.1f} GB)")
+# Con hilos cada bloque reserva sus propios buffers (pico x n_hilos). Si NumPy
+# ya usa un BLAS multihilo, el matmul de cada bloque ocupa todos los cores y
+# n_hilos>1 apenas gana: es util con BLAS de un hilo (OPENBLAS_NUM_THREADS=1).
+
 
 print("\n" + "=" * 80)
 print("=== CONCLUSION ARQUITECTONICA ===")
@@ -1012,10 +1412,11 @@ RESUMEN DE VECTORES Y MATRICES:
 7. Indexacion: slicing, boolean, fancy. Embedding lookup.
 
 8. Similaridad coseno: base de busqueda semantica y RAG.
+   A escala: indices Flat / IVF / IVF-PQ (recall vs QPS vs memoria).
 
 9. einsum: notacion Einstein para operaciones tensoriales.
 
-10. KNN vectorizado: distancias sin loops.
+10. KNN vectorizado: distancias sin loops, por bloques con top-k corriente.
 
 11. Sparse matrices: TF-IDF, one-hot, grafos.
 
@@ -369,22 +369,73 @@ print("\n\n" + "=" * 80)
 print("=== CAPITULO 6: PCA — IMPLEMENTACION COMPLETA ===")
 print("=" * 80)
 
+def randomized_svd(A, k, n_oversamples=10, n_iter=4, seed=None):
+    """
+    SVD truncada aleatorizada (Halko, Martinsson, Tropp).
+
+    Idea: si A tiene rango efectivo ~k, A @ Omega con Omega aleatoria
+    (d x (k+p)) ya "ve" casi todo su espacio columna. Se ortonormaliza
+    (QR) → Q, y el problema se reduce a la SVD de B = Q^T A, de solo
+    k+p filas.
+
+    Power iterations: Q ← qr(A @ qr(A^T @ Q)) eleva los valores singulares a
+    2q+1, amplificando la separacion entre los k primeros y el resto.
+    El QR intermedio evita perder precision (sobre todo en float32).
+
+    Coste: O(n·d·(k+p)) por pasada frente a O(n·d·min(n,d)) de la SVD completa.
+    """
+    rng = np.random.default_rng(seed)
+    l = min(k + n_oversamples, *A.shape)
+    Omega = rng.standard_normal((A.shape[1], l)).astype(A.dtype, copy=False)
+    Q, _ = np.linalg.qr(A @ Omega)
+    for _ in range(n_iter):
+        Q, _ = np.linalg.qr(A.T @ Q)
+        Q, _ = np.linalg.qr(A @ Q)
+    U_b, S, Vt = np.linalg.svd(Q.T @ A, full_matrices=False)
+    return (Q @ U_b)[:, :k], S[:k], Vt[:k]
+
+
 class PCA:
-    """PCA implementado desde cero con NumPy."""
+    """
+    PCA implementado desde cero con NumPy.
+
+    svd_solver='full': SVD completa de X centrada.
+    svd_solver='randomized': randomized_svd, solo los n_components primeros
+    (exige n_components). dtype=np.float32 para matrices grandes.
+    """
     
-    def __init__(self, n_components: int = None, variance_threshold: float = None):
+    def __init__(self, n_components: int = None, variance_threshold: float = None,
+                 svd_solver: str = 'full', n_iter: int = 4, seed=None, dtype=None):
         self.n_components = n_components
         self.variance_threshold = variance_threshold
+        self.svd_solver = svd_solver
+        self.n_iter = n_iter
+        self.seed = seed
+        self.dtype = dtype
         self.components_ = None
         self.mean_ = None
         self.eigenvalues_ = None
         self.explained_variance_ratio_ = None
     
     def fit(self, X):
+        if self.dtype is not None:
+            X = np.asarray(X, dtype=self.dtype)
         n, d = X.shape
         self.mean_ = X.mean(axis=0)
         X_c = X - self.mean_
         
+        if self.svd_solver == 'randomized':
+            if self.n_components is None or self.variance_threshold is not None:
+                raise ValueError("svd_solver='randomized' necesita n_components fijo")
+            _, S, Vt = randomized_svd(X_c, self.n_components, n_iter=self.n_iter,
+                                      seed=self.seed)
+            # Varianza total = traza de la covarianza = ||X_c||_F^2 / (n-1)
+            total_var = np.einsum('ij,ij->', X_c, X_c) / (n - 1)
+            self.eigenvalues_ = (S ** 2) / (n - 1)
+            self.explained_variance_ratio_ = self.eigenvalues_ / total_var
+            self.components_ = Vt
+            return self
+        
         # SVD
         U, S, Vt = np.linalg.svd(X_c, full_matrices=False)
         
@@ -445,6 +496,37 @@ X_auto99 = pca_auto99.fit_transform(X)
 print(f"  PCA con 99% varianza: {X_auto99.shape[1]} componentes")
 
 
+print("\n--- PCA randomizado (Halko) ---")
+
+# Espectro con decaimiento lento: el caso dificil para el metodo aleatorio
+rng_rsvd = np.random.default_rng(0)
+n_r, d_r, k_r = 2_000, 1_500, 20
+U_r, _ = np.linalg.qr(rng_rsvd.standard_normal((n_r, d_r)))
+V_r, _ = np.linalg.qr(rng_rsvd.standard_normal((d_r, d_r)))
+A_r = (U_r * (1.0 / np.arange(1, d_r + 1) ** 0.5)) @ V_r.T
+
+start = time.perf_counter()
+S_exact = np.linalg.svd(A_r, compute_uv=False)[:k_r]
+t_exact = time.perf_counter() - start
+print(f"  A: {n_r} x {d_r}, top-{k_r} valores singulares (SVD completa: {t_exact:.2f}s)")
+for q in (0, 1, 4):
+    start = time.perf_counter()
+    _, S_q, _ = randomized_svd(A_r, k_r, n_iter=q, seed=0)
+    t_q = time.perf_counter() - start
+    err = np.max(np.abs(S_q - S_exact) / S_exact)
+    print(f"    n_iter={q}: error relativo max = {err:.1e}, {t_q:.3f}s")
+
+A_r32 = A_r.astype(np.float32)
+_, S_32, _ = randomized_svd(A_r32, k_r, n_iter=4, seed=0)
+print(f"    float32 (n_iter=4): error = {np.max(np.abs(S_32 - S_exact) / S_exact):.1e}, "
+      f"dtype={S_32.dtype}, {A_r32.nbytes / 1e6:.0f} MB vs {A_r.nbytes / 1e6:.0f} MB")
+
+pca_rand = PCA(n_components=2, svd_solver='randomized', seed=0)
+X_rand = pca_rand.fit_transform(X)
+print(f"  PCA randomized (n_components=2): varianza {pca_rand.explained_variance_ratio_}, "
+      f"misma proyeccion: {np.allclose(np.abs(X_rand), np.abs(X_pca))}")
+
+
 # =====================================================================
 #   PARTE 7: APLICACIONES AVANZADAS
 # =====================================================================
@@ -1070,6 +1152,7 @@ RESUMEN DE EIGENVALUES, SVD Y PCA:
 3. SVD: A = U @ S @ V^T. Funciona para CUALQUIER matriz.
 
 4. PCA: eigenvectors de covarianza = componentes principales.
+   A escala: SVD aleatorizada (Halko) + power iterations, O(n·d·k).
 
 5. Whitening: normalizar covarianza a identidad.
 
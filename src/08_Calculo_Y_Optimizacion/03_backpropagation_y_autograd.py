@@ -174,18 +174,26 @@ class Value:
         return out
     
     def backward(self):
-        """Backpropagation usando ordenamiento topologico."""
-        topo = []
-        visited = set()
-        
-        def build_topo(v):
-            if v not in visited:
-                visited.add(v)
-                for child in v._prev:
-                    build_topo(child)
-                topo.append(v)
-        
-        build_topo(self)
+        """
+        Backpropagation usando ordenamiento topologico.
+        DFS iterativo (grafos profundos no agotan la pila de recursion) y
+        orden cacheado en el nodo: un segundo backward no lo reconstruye.
+        """
+        topo = getattr(self, '_topo', None)
+        if topo is None:
+            topo = []
+            visited = set()
+            stack = [(self, False)]
+            while stack:
+                v, hijos_listos = stack.pop()
+                if hijos_listos:
+                    topo.append(v)
+                elif v not in visited:
+                    visited.add(v)
+                    stack.append((v, True))
+                    stack.extend((child, False) for child in v._prev
+                                 if child not in visited)
+            self._topo = topo
         
         self.grad = 1.0
         for node in reversed(topo):
@@ -406,6 +414,339 @@ print(f"  dL/dW:\n{W.grad}")
 print(f"  dL/db: {b.grad}")
 
 
+# --- Tape autograd: tensores NumPy, orden de la cinta = orden topologico ---
+print("\n--- Tape autograd (vectorizado) ---")
+
+"""
+Value crea un objeto Python y un closure POR ESCALAR: un MLP pequeño ya son
+cientos de miles de nodos. Tensor de arriba solo cubre matmul/add/relu/MSE y
+propaga recursivamente.
+
+TapeTensor opera sobre arrays completos (un nodo por operacion de tensor) y
+anota cada op en una Tape. El orden de ejecucion del forward YA es un orden
+topologico, asi que backward recorre la cinta al reves: iterativo, sin
+recursion ni sort. Cada gradiente intermedio y los buffers que guardo la op
+se liberan en cuanto se consumen.
+
+    with Tape() as tape:
+        loss = cross_entropy(relu(X @ W1 + b1) @ W2 + b2, y)
+    tape.backward(loss)          # W1.grad, b1.grad, ...
+
+Fuera de un `with Tape()` no se anota nada (modo inferencia).
+"""
+
+_TAPE_ACTIVO = []
+
+
+def _unbroadcast(grad, shape):
+    """Suma el gradiente sobre los ejes que el broadcasting expandio."""
+    while grad.ndim > len(shape):
+        grad = grad.sum(axis=0)
+    for i, s in enumerate(shape):
+        if s == 1 and grad.shape[i] != 1:
+            grad = grad.sum(axis=i, keepdims=True)
+    return grad
+
+
+class Tape:
+    """Cinta de operaciones de TapeTensor."""
+
+    def __init__(self):
+        self.entries = []
+
+    def __enter__(self):
+        _TAPE_ACTIVO.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        _TAPE_ACTIVO.pop()
+
+    def record(self, out, parents, backward_fn):
+        self.entries.append((out, parents, backward_fn))
+
+    def backward(self, loss, retain_graph=False):
+        grads = {id(loss): np.ones_like(loss.data)}
+        leaves = {}
+        entries = self.entries
+        for i in range(len(entries) - 1, -1, -1):
+            out, parents, backward_fn = entries[i]
+            if not retain_graph:
+                entries[i] = None  # libera out y lo que guardo el closure
+            g = grads.pop(id(out), None)
+            if g is None:
+                continue
+            for p, gp in zip(parents, backward_fn(g)):
+                # Constantes (requires_grad=False): ni gradiente ni .grad
+                if gp is None or not p.requires_grad:
+                    continue
+                k = id(p)
+                # Nunca in-place: varias ramas pueden compartir el mismo array
+                grads[k] = grads[k] + gp if k in grads else gp
+                if p._leaf:
+                    leaves[k] = p
+        for k, p in leaves.items():
+            p.grad = grads[k] if p.grad is None else p.grad + grads[k]
+        if not retain_graph:
+            self.entries = []
+
+
+def _resultado(data, parents, backward_fn):
+    out = TapeTensor(data)
+    out._leaf = False
+    out.requires_grad = any(p.requires_grad for p in parents)
+    if out.requires_grad and _TAPE_ACTIVO:
+        _TAPE_ACTIVO[-1].record(out, parents, backward_fn)
+    return out
+
+
+class TapeTensor:
+    """Tensor NumPy con autograd por cinta (broadcasting incluido)."""
+
+    __array_priority__ = 100  # ndarray op TapeTensor → usa los __r*__ de aqui
+
+    def __init__(self, data, requires_grad=False):
+        self.data = np.asarray(data, dtype=np.float64)
+        self.requires_grad = requires_grad
+        self.grad = None
+        self._leaf = True
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def __repr__(self):
+        return f"TapeTensor(shape={self.shape}, requires_grad={self.requires_grad})"
+
+    def zero_grad(self):
+        self.grad = None
+
+    @staticmethod
+    def _wrap(x):
+        return x if isinstance(x, TapeTensor) else TapeTensor(x)
+
+    # -- Elementwise ---------------------------------------------------
+
+    def __add__(self, other):
+        a, b = self, self._wrap(other)
+
+        def _backward(g):
+            return (_unbroadcast(g, a.shape) if a.requires_grad else None,
+                    _unbroadcast(g, b.shape) if b.requires_grad else None)
+        return _resultado(a.data + b.data, (a, b), _backward)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return _resultado(-self.data, (self,), lambda g: (-g,))
+
+    def __sub__(self, other):
+        return self + (-self._wrap(other))
+
+    def __rsub__(self, other):
+        return self._wrap(other) + (-self)
+
+    def __mul__(self, other):
+        a, b = self, self._wrap(other)
+
+        def _backward(g):
+            return (_unbroadcast(g * b.data, a.shape) if a.requires_grad else None,
+                    _unbroadcast(g * a.data, b.shape) if b.requires_grad else None)
+        return _resultado(a.data * b.data, (a, b), _backward)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        a, b = self, self._wrap(other)
+
+        def _backward(g):
+            return (_unbroadcast(g / b.data, a.shape) if a.requires_grad else None,
+                    _unbroadcast(-g * a.data / b.data ** 2, b.shape) if b.requires_grad else None)
+        return _resultado(a.data / b.data, (a, b), _backward)
+
+    def __rtruediv__(self, other):
+        return self._wrap(other) / self
+
+    def __pow__(self, n):
+        assert isinstance(n, (int, float))
+        x = self.data
+        return _resultado(x ** n, (self,), lambda g: (g * n * x ** (n - 1),))
+
+    def exp(self):
+        e = np.exp(self.data)
+        return _resultado(e, (self,), lambda g: (g * e,))
+
+    def log(self):
+        x = self.data
+        return _resultado(np.log(x), (self,), lambda g: (g / x,))
+
+    def relu(self):
+        mask = self.data > 0
+        return _resultado(self.data * mask, (self,), lambda g: (g * mask,))
+
+    def tanh(self):
+        t = np.tanh(self.data)
+        return _resultado(t, (self,), lambda g: (g * (1 - t ** 2),))
+
+    def sigmoid(self):
+        s = 1 / (1 + np.exp(-self.data))
+        return _resultado(s, (self,), lambda g: (g * s * (1 - s),))
+
+    # -- Algebra lineal y forma ----------------------------------------
+
+    def __matmul__(self, other):
+        a, b = self, self._wrap(other)
+
+        def _backward(g):
+            return (_unbroadcast(g @ np.swapaxes(b.data, -1, -2), a.shape) if a.requires_grad else None,
+                    _unbroadcast(np.swapaxes(a.data, -1, -2) @ g, b.shape) if b.requires_grad else None)
+        return _resultado(a.data @ b.data, (a, b), _backward)
+
+    def __rmatmul__(self, other):
+        return self._wrap(other) @ self
+
+    def reshape(self, *shape):
+        original = self.shape
+        return _resultado(self.data.reshape(*shape), (self,),
+                          lambda g: (g.reshape(original),))
+
+    def transpose(self, *axes):
+        axes = axes or tuple(range(self.data.ndim))[::-1]
+        inversa = np.argsort(axes)
+        return _resultado(self.data.transpose(axes), (self,),
+                          lambda g: (g.transpose(inversa),))
+
+    @property
+    def T(self):
+        return self.transpose()
+
+    def __getitem__(self, idx):
+        shape = self.shape
+
+        def _backward(g):
+            full = np.zeros(shape)
+            np.add.at(full, idx, g)  # indices repetidos acumulan
+            return (full,)
+        return _resultado(self.data[idx], (self,), _backward)
+
+    # -- Reducciones -----------------------------------------------------
+
+    def _expandir(self, g, axis, keepdims):
+        """Gradiente de una reduccion → forma de la entrada."""
+        if axis is not None and not keepdims:
+            g = np.expand_dims(g, axis)
+        return np.broadcast_to(g, self.shape)
+
+    def sum(self, axis=None, keepdims=False):
+        return _resultado(self.data.sum(axis=axis, keepdims=keepdims), (self,),
+                          lambda g: (self._expandir(g, axis, keepdims),))
+
+    def mean(self, axis=None, keepdims=False):
+        total = self.sum(axis=axis, keepdims=keepdims)
+        return total * (total.data.size / self.data.size)
+
+    def max(self, axis=None, keepdims=False):
+        m = self.data.max(axis=axis, keepdims=True)
+        mask = self.data == m
+        mask = mask / mask.sum(axis=axis, keepdims=True)  # empates: reparto
+        out = m if keepdims else (m.reshape(()) if axis is None else np.squeeze(m, axis))
+        return _resultado(out, (self,),
+                          lambda g: (mask * self._expandir(g, axis, keepdims),))
+
+
+def relu(x):
+    return x.relu()
+
+
+def softmax(x, axis=-1):
+    e = np.exp(x.data - x.data.max(axis=axis, keepdims=True))
+    s = e / e.sum(axis=axis, keepdims=True)
+    return _resultado(s, (x,),
+                      lambda g: (s * (g - (g * s).sum(axis=axis, keepdims=True)),))
+
+
+def log_softmax(x, axis=-1):
+    z = x.data - x.data.max(axis=axis, keepdims=True)
+    ls = z - np.log(np.exp(z).sum(axis=axis, keepdims=True))
+    return _resultado(ls, (x,),
+                      lambda g: (g - np.exp(ls) * g.sum(axis=axis, keepdims=True),))
+
+
+def cross_entropy(logits, targets):
+    """CE media con targets enteros; fusionada: dL/dlogits = (p - onehot) / n."""
+    n = logits.shape[0]
+    z = logits.data - logits.data.max(axis=1, keepdims=True)
+    ls = z - np.log(np.exp(z).sum(axis=1, keepdims=True))
+    filas = np.arange(n)
+    loss = -ls[filas, targets].mean()
+
+    def _backward(g):
+        d = np.exp(ls)
+        d[filas, targets] -= 1
+        return (d * (g / n),)
+    return _resultado(loss, (logits,), _backward)
+
+
+print("\n--- Test tape autograd ---")
+rng_tape = np.random.default_rng(0)
+
+
+
+def gradiente_numerico(f, x, h=1e-6):
+    g = np.zeros_like(x)
+    for i in range(x.size):
+        x_p, x_m = x.copy(), x.copy()
+        x_p.flat[i] += h
+        x_m.flat[i] -= h
+        g.flat[i] = (f(x_p) - f(x_m)) / (2 * h)
+    return g
+
+
+# Mismo grafo que el test de Tensor: ReLU(X @ W + b) + MSE
+def mse_relu(W_np):
+    return float((((TapeTensor(X.data) @ TapeTensor(W_np) + b.data).relu()
+                   - y_true.data) ** 2).mean().data)
+
+
+# W fijo (no el W aleatorio de arriba): con X > 0 y W pequeño todas las
+# ReLU pueden quedar muertas y el check compararia ceros con ceros. Aqui
+# 4 unidades activas y 2 muertas, todas lejos del pliegue en 0.
+W_check = np.array([[0.5, -0.3, 0.2],
+                    [0.1, 0.4, -0.6]])
+W_t = TapeTensor(W_check.copy(), requires_grad=True)
+with Tape() as tape:
+    loss_t = ((relu(TapeTensor(X.data) @ W_t + b.data) - y_true.data) ** 2).mean()
+tape.backward(loss_t)
+activas = int(((X.data @ W_check + b.data) > 0).sum())
+err = np.abs(W_t.grad - gradiente_numerico(mse_relu, W_check)).max()
+print(f"  Loss: {float(loss_t.data):.6f}, ReLU activas {activas}/6, "
+      f"|dL/dW|max={np.abs(W_t.grad).max():.3f}, vs numerico: max err = {err:.1e} "
+      f"{'PASS' if err < 1e-6 else 'FAIL'}")
+
+
+# Gradient check de ops con broadcasting, reducciones, indexado y softmax
+x0 = rng_tape.normal(size=(4, 5))
+c0 = rng_tape.normal(size=(1, 5))
+idx0 = np.array([0, 2, 2, 3])
+
+
+def grafo(x_np):
+    x = TapeTensor(x_np, requires_grad=True)
+    c = TapeTensor(c0)
+    h = (x * c + 1.0).tanh() / (x.sigmoid() + 1.0)
+    h = h - h.max(axis=1, keepdims=True) + softmax(h, axis=0) * 2.0
+    h = log_softmax(h, axis=1)[idx0] + (x.exp().sum(axis=0) ** 0.5).reshape(1, 5)
+    return x, h.mean() + cross_entropy(x, np.array([1, 0, 4, 4]))
+
+
+with Tape() as tape:
+    x_g, out_g = grafo(x0)
+tape.backward(out_g)
+num = gradiente_numerico(lambda v: float(grafo(v)[1].data), x0)
+err = np.abs(x_g.grad - num).max()
+print(f"  Gradient check (broadcast, max, softmax, log_softmax, indexado, CE): "
+      f"max err = {err:.1e} {'PASS' if err < 1e-6 else 'FAIL'}")
+
+
 # =====================================================================
 #   PARTE 5: BACKPROP PARA CAPAS COMUNES
 # =====================================================================
@@ -852,6 +1193,432 @@ error = np.linalg.norm(grad_W0_ana - grad_W0_num) / (
 print(f"  Gradient check W0: error = {error:.2e} {'PASS' if error < 1e-4 else 'FAIL'}")
 
 
+print("\n--- FullMLP: motor escalar (Value) vs tape autograd ---")
+
+# Mismos pesos iniciales para los tres caminos
+np.random.seed(7)
+mlp_ref = FullMLP([4, 32, 16, 3])
+params_tape = []
+for layer in mlp_ref.layers:
+    params_tape += [TapeTensor(layer.W.copy(), requires_grad=True),
+                    TapeTensor(layer.b.copy(), requires_grad=True)]
+
+
+def paso_tape(params, X, y, lr):
+    with Tape() as tape:
+        h = TapeTensor(X)
+        for i in range(0, len(params) - 2, 2):
+            h = relu(h @ params[i] + params[i + 1])
+        loss = cross_entropy(h @ params[-2] + params[-1], y)
+    tape.backward(loss)
+    for p in params:
+        p.data -= lr * p.grad
+        p.zero_grad()
+    return float(loss.data)
+
+
+def paso_value(params, X, y, lr):
+    """Mismo MLP con un nodo Value por escalar."""
+    total = 0
+    for x_row, target in zip(X, y):
+        h = [Value(v) for v in x_row]
+        for li, (W_v, b_v) in enumerate(params):
+            z = [sum((W_v[i][j] * h[i] for i in range(len(h))), b_v[j])
+                 for j in range(len(b_v))]
+            h = z if li == len(params) - 1 else [zj.relu() for zj in z]
+        m = max(zj.data for zj in h)
+        exps = [(zj - m).exp() for zj in h]
+        total = total + (-(exps[target] / sum(exps)).log())
+    loss = total / len(X)
+    loss.backward()
+    n_nodos = len(loss._topo)
+    for W_v, b_v in params:
+        for p in [w for fila in W_v for w in fila] + b_v:
+            p.data -= lr * p.grad
+            p.grad = 0.0
+    return loss.data, n_nodos
+
+
+params_value = [([[Value(w) for w in fila] for fila in l.W], [Value(v) for v in l.b])
+                for l in mlp_ref.layers]
+
+# 1) Gradientes identicos en el primer paso
+mlp_ref.forward(X_train)
+mlp_ref.backward(y_train)
+with Tape() as tape:
+    h = TapeTensor(X_train)
+    for i in range(0, 4, 2):
+        h = relu(h @ params_tape[i] + params_tape[i + 1])
+    loss_tape = cross_entropy(h @ params_tape[4] + params_tape[5], y_train)
+tape.backward(loss_tape)
+max_diff = max(np.abs(p.grad - g).max() for p, g in
+               zip(params_tape, [g for l in mlp_ref.layers for g in (l.dW, l.db)]))
+print(f"  Grad tape vs backward manual: max |diff| = {max_diff:.1e}")
+for p in params_tape:
+    p.zero_grad()
+
+# 2) Coste por epoch (full batch, 300 muestras). Value: se mide sobre 30
+#    muestras y se extrapola (la epoch completa tarda varios segundos)
+n_sub = 30
+inicio = time.perf_counter()
+loss_v, n_nodos = paso_value(params_value, X_train[:n_sub], y_train[:n_sub], lr=0.05)
+t_value = (time.perf_counter() - inicio) * len(X_train) / n_sub
+
+n_epochs = 300
+inicio = time.perf_counter()
+for _ in range(n_epochs):
+    loss_tp = paso_tape(params_tape, X_train, y_train, lr=0.05)
+t_tape = (time.perf_counter() - inicio) / n_epochs
+
+inicio = time.perf_counter()
+for _ in range(n_epochs):
+    mlp_ref.forward(X_train)
+    loss_m = mlp_ref.loss(y_train)
+    mlp_ref.backward(y_train)
+    mlp_ref.update(lr=0.05)
+t_manual = (time.perf_counter() - inicio) / n_epochs
+
+print(f"  Value (escalar):  {t_value * 1000:8.1f} ms/epoch, "
+      f"{n_nodos * len(X_train) // n_sub:,} nodos Python")
+print(f"  TapeTensor:       {t_tape * 1000:8.3f} ms/epoch → {t_value / t_tape:,.0f}x")
+print(f"  Backward manual:  {t_manual * 1000:8.3f} ms/epoch (referencia)")
+print(f"  Loss tras {n_epochs} epochs: tape={loss_tp:.6f}, manual={loss_m:.6f}")
+
+# 3) Grafo profundo: backward iterativo, sin limite de recursion
+import sys
+profundo = Value(1.0)
+for _ in range(sys.getrecursionlimit() * 5):
+    profundo = profundo * 1.0 + 0.0
+profundo.backward()
+print(f"  Value: cadena de {sys.getrecursionlimit() * 10:,} ops → backward sin RecursionError")
+
+
+print("\n--- Entrenamiento fusionado sin allocaciones ---")
+
+"""
+LinearLayer/BatchNormLayer/DropoutLayer crean arrays nuevos en cada forward
+y backward (X @ W + b, X - mean, mascaras, gradientes...) y clip_grad_norm
+construye otra lista. En CPU, con redes pequeñas, el allocator y el GC
+dominan el perfil.
+
+FusedMLP entrena el MISMO stack (Linear → [BatchNorm] → ReLU → [Dropout]
+... → Linear → softmax + CE) con:
+  - Parametros, gradientes y estado del optimizador en TRES buffers planos;
+    W, b, gamma, beta son vistas. Clipping = un solo dot sobre el buffer.
+  - Activaciones y gradientes preasignados por tamaño de batch (se crean
+    la primera vez que aparece ese tamaño).
+  - Todo el paso con ufuncs out= y np.matmul(..., out=): cero allocaciones
+    de arrays en el paso en regimen estacionario.
+"""
+
+
+class FusedMLP:
+    """MLP con paso de entrenamiento fusionado e in-place."""
+
+    def __init__(self, dims, batchnorm=False, dropout=0.0, lr=0.05,
+                 momentum=0.0, max_norm=None, eps=1e-5, bn_momentum=0.1, seed=None):
+        self.dims = list(dims)
+        self.batchnorm = batchnorm
+        self.dropout = dropout
+        self.lr, self.momentum, self.max_norm = lr, momentum, max_norm
+        self.eps, self.bn_momentum = eps, bn_momentum
+        self.rng = np.random.default_rng(seed)
+        n_layers = len(dims) - 1
+        hidden = dims[1:-1]
+
+        # Buffers planos: parametros, gradientes, velocidad (momentum) y scratch
+        sizes = [dims[i] * dims[i + 1] + dims[i + 1] for i in range(n_layers)]
+        if batchnorm:
+            sizes += [2 * d for d in hidden]
+        total = sum(sizes)
+        self.params = np.zeros(total)
+        self.grads = np.zeros(total)
+        self.velocity = np.zeros(total)
+        self._scratch = np.zeros(total)
+
+        offset = 0
+
+        def vistas(shape):
+            nonlocal offset
+            n = int(np.prod(shape))
+            p = self.params[offset:offset + n].reshape(shape)
+            g = self.grads[offset:offset + n].reshape(shape)
+            offset += n
+            return p, g
+
+        self.W, self.b, self.dW, self.db = [], [], [], []
+        for i in range(n_layers):
+            W, dW = vistas((dims[i], dims[i + 1]))
+            b, db = vistas((dims[i + 1],))
+            W[...] = self.rng.standard_normal(W.shape) * np.sqrt(2.0 / dims[i])
+            self.W.append(W); self.dW.append(dW)
+            self.b.append(b); self.db.append(db)
+
+        self.gamma, self.beta, self.dgamma, self.dbeta = [], [], [], []
+        self.running_mean = [np.zeros(d) for d in hidden]
+        self.running_var = [np.ones(d) for d in hidden]
+        if batchnorm:
+            for d in hidden:
+                gamma, dgamma = vistas((d,))
+                beta, dbeta = vistas((d,))
+                gamma[...] = 1.0
+                self.gamma.append(gamma); self.dgamma.append(dgamma)
+                self.beta.append(beta); self.dbeta.append(dbeta)
+
+        self._bufs = {}
+
+    def load_layers(self, linears, batchnorms=()):
+        """Copia pesos de LinearLayer/BatchNormLayer (para comparar)."""
+        for W, b, layer in zip(self.W, self.b, linears):
+            W[...] = layer.W
+            b[...] = layer.b
+        for i, bn in enumerate(batchnorms):
+            self.gamma[i][...] = bn.gamma
+            self.beta[i][...] = bn.beta
+            self.running_mean[i][...] = bn.running_mean
+            self.running_var[i][...] = bn.running_var
+
+    def _buffers(self, n):
+        """Activaciones y gradientes para un tamaño de batch (una vez)."""
+        buf = self._bufs.get(n)
+        if buf is None:
+            outs = self.dims[1:]
+            hidden = self.dims[1:-1]
+            buf = {
+                'z': [np.zeros((n, d)) for d in outs],          # pre/post activacion
+                'grad': [np.zeros((n, d)) for d in self.dims[:-1]],
+                'tmp': [np.zeros((n, d)) for d in hidden],
+                'xhat': [np.zeros((n, d)) for d in hidden] if self.batchnorm else [],
+                'mask': [np.zeros((n, d)) for d in hidden] if self.dropout > 0 else [],
+                'activa': [np.zeros((n, d), dtype=bool) for d in hidden],
+                'mean': [np.zeros(d) for d in hidden],
+                'var': [np.zeros(d) for d in hidden],
+                'std': [np.zeros(d) for d in hidden],
+                'vec': [np.zeros(d) for d in hidden],
+                'fila': np.zeros((n, 1)),
+                'rows': np.arange(n) * self.dims[-1],
+                'flat': np.zeros(n, dtype=np.intp),
+                'picked': np.zeros(n),
+            }
+            self._bufs[n] = buf
+        return buf
+
+    def forward(self, X, training=True):
+        n = X.shape[0]
+        buf = self._buffers(n)
+        h = X
+        last = len(self.W) - 1
+        for i in range(len(self.W)):
+            z = buf['z'][i]
+            np.matmul(h, self.W[i], out=z)
+            np.add(z, self.b[i], out=z)
+            if i == last:
+                break
+            if self.batchnorm:
+                xhat, tmp = buf['xhat'][i], buf['tmp'][i]
+                mean, var, std, vec = buf['mean'][i], buf['var'][i], buf['std'][i], buf['vec'][i]
+                if training:
+                    np.mean(z, axis=0, out=mean)
+                    np.subtract(z, mean, out=xhat)
+                    np.multiply(xhat, xhat, out=tmp)
+                    np.mean(tmp, axis=0, out=var)
+                    m = self.bn_momentum
+                    for running, stat in ((self.running_mean[i], mean), (self.running_var[i], var)):
+                        np.multiply(running, 1 - m, out=running)
+                        np.multiply(stat, m, out=vec)
+                        np.add(running, vec, out=running)
+                else:
+                    np.subtract(z, self.running_mean[i], out=xhat)
+                    var[...] = self.running_var[i]
+                np.add(var, self.eps, out=std)
+                np.sqrt(std, out=std)
+                np.divide(xhat, std, out=xhat)
+                np.multiply(xhat, self.gamma[i], out=z)
+                np.add(z, self.beta[i], out=z)
+            np.maximum(z, 0, out=z)
+            if training and self.dropout > 0:
+                mask = buf['mask'][i]
+                self.rng.random(out=mask)
+                np.greater(mask, self.dropout, out=mask)
+                np.multiply(mask, 1 / (1 - self.dropout), out=mask)
+                np.multiply(z, mask, out=z)
+            h = z
+
+        # Softmax in-place sobre los logits
+        fila = buf['fila']
+        np.max(z, axis=1, keepdims=True, out=fila)
+        np.subtract(z, fila, out=z)
+        np.exp(z, out=z)
+        np.sum(z, axis=1, keepdims=True, out=fila)
+        np.divide(z, fila, out=z)
+        return z
+
+    def train_step(self, X, y):
+        """forward + backward + clip + SGD(momentum), todo in-place. Devuelve la loss."""
+        n = X.shape[0]
+        buf = self._buffers(n)
+        probs = self.forward(X, training=True)
+
+        # Loss: -mean(log p[y]) con un gather plano a buffer
+        flat = buf['flat']
+        np.add(buf['rows'], y, out=flat)
+        picked = buf['picked']
+        np.take(probs.reshape(-1), flat, out=picked)
+        np.add(picked, 1e-15, out=picked)
+        np.log(picked, out=picked)
+        loss = -picked.mean()
+
+        # dL/dlogits = (probs - onehot) / n, sobre el mismo buffer
+        np.subtract.at(probs.reshape(-1), flat, 1.0)
+        np.divide(probs, n, out=probs)
+
+        g = probs
+        for i in range(len(self.W) - 1, -1, -1):
+            h = X if i == 0 else buf['z'][i - 1]
+            np.matmul(h.T, g, out=self.dW[i])
+            np.sum(g, axis=0, out=self.db[i])
+            if i == 0:
+                break
+            g_prev = buf['grad'][i]
+            np.matmul(g, self.W[i].T, out=g_prev)
+            j = i - 1
+            if self.dropout > 0:
+                np.multiply(g_prev, buf['mask'][j], out=g_prev)
+            activa = buf['activa'][j]
+            np.greater(h, 0, out=activa)
+            np.multiply(g_prev, activa, out=g_prev)
+            if self.batchnorm:
+                # dX = (n·dxhat - Σdxhat - xhat·Σ(dxhat·xhat)) / (n·std)
+                xhat, tmp, vec = buf['xhat'][j], buf['tmp'][j], buf['vec'][j]
+                np.multiply(g_prev, xhat, out=tmp)
+                np.sum(tmp, axis=0, out=self.dgamma[j])
+                np.sum(g_prev, axis=0, out=self.dbeta[j])
+                np.multiply(g_prev, self.gamma[j], out=g_prev)
+                np.multiply(g_prev, xhat, out=tmp)
+                np.sum(tmp, axis=0, out=vec)
+                np.multiply(xhat, vec, out=tmp)
+                np.sum(g_prev, axis=0, out=vec)
+                np.multiply(g_prev, n, out=g_prev)
+                np.subtract(g_prev, vec, out=g_prev)
+                np.subtract(g_prev, tmp, out=g_prev)
+                np.multiply(buf['std'][j], n, out=vec)
+                np.divide(g_prev, vec, out=g_prev)
+            g = g_prev
+
+        # Clipping sobre el buffer plano: una sola reduccion
+        if self.max_norm is not None:
+            total_norm = np.sqrt(np.dot(self.grads, self.grads))
+            clip_coeff = self.max_norm / (total_norm + 1e-6)
+            if clip_coeff < 1:
+                np.multiply(self.grads, clip_coeff, out=self.grads)
+
+        # SGD con momentum: v = mu·v + g ; p -= lr·v
+        paso = self.grads
+        if self.momentum:
+            np.multiply(self.velocity, self.momentum, out=self.velocity)
+            np.add(self.velocity, self.grads, out=self.velocity)
+            paso = self.velocity
+        np.multiply(paso, self.lr, out=self._scratch)
+        np.subtract(self.params, self._scratch, out=self.params)
+        return loss
+
+
+# 1) Mismo camino numerico que FullMLP (sin BN): losses identicas
+np.random.seed(11)
+mlp_a = FullMLP([4, 32, 16, 3])
+fused_a = FusedMLP([4, 32, 16, 3], lr=0.05)
+fused_a.load_layers(mlp_a.layers)
+diffs = []
+for _ in range(100):
+    mlp_a.forward(X_train)
+    loss_a = mlp_a.loss(y_train)
+    mlp_a.backward(y_train)
+    mlp_a.update(lr=0.05)
+    diffs.append(abs(loss_a - fused_a.train_step(X_train, y_train)))
+print(f"  FullMLP vs FusedMLP, 100 pasos: max |Δloss| = {max(diffs):.1e}")
+
+
+# 2) Stack Linear → BatchNorm → ReLU (+ clip_grad_norm) con las capas actuales
+def paso_capas(linears, bns, X, y, lr, max_norm):
+    h = X
+    cache = []
+    for lin, bn in zip(linears[:-1], bns):
+        z = bn.forward(lin.forward(h))
+        h = np.maximum(0, z)
+        cache.append(z)
+    logits = linears[-1].forward(h)
+    exp_logits = np.exp(logits - np.max(logits, axis=1, keepdims=True))
+    probs = exp_logits / exp_logits.sum(axis=1, keepdims=True)
+    n = len(y)
+    loss = -np.mean(np.log(probs[range(n), y] + 1e-15))
+    d = probs.copy()
+    d[range(n), y] -= 1
+    d /= n
+    d = linears[-1].backward(d)
+    for lin, bn, z in reversed(list(zip(linears[:-1], bns, cache))):
+        d = lin.backward(bn.backward(d * (z > 0)))
+    params = [p for lin in linears for p in (lin.W, lin.b)] + \
+             [p for bn in bns for p in (bn.gamma, bn.beta)]
+    grads = [g for lin in linears for g in (lin.dW, lin.db)] + \
+            [g for bn in bns for g in (bn.dgamma, bn.dbeta)]
+    grads, _ = clip_grad_norm(grads, max_norm)
+    for p, g in zip(params, grads):
+        p -= lr * g
+    return loss
+
+
+dims_bn = [64, 256, 256, 10]
+batch = 256
+rng_fused = np.random.default_rng(3)
+X_big = rng_fused.standard_normal((batch * 20, dims_bn[0]))
+y_big = (X_big[:, :dims_bn[-1]].argmax(axis=1)).astype(np.intp)
+
+
+def capas_nuevas():
+    np.random.seed(5)
+    linears = [LinearLayer(dims_bn[i], dims_bn[i + 1]) for i in range(len(dims_bn) - 1)]
+    return linears, [BatchNormLayer(d) for d in dims_bn[1:-1]]
+
+
+linears, bns = capas_nuevas()
+fused_bn = FusedMLP(dims_bn, batchnorm=True, lr=0.05, max_norm=1.0)
+fused_bn.load_layers(linears, bns)
+diffs = []
+for s in range(0, 20 * batch, batch):
+    Xb, yb = X_big[s:s + batch], y_big[s:s + batch]
+    diffs.append(abs(paso_capas(linears, bns, Xb, yb, 0.05, 1.0) - fused_bn.train_step(Xb, yb)))
+print(f"  Capas actuales vs FusedMLP (BN + clip), 20 pasos: max |Δloss| = {max(diffs):.1e}")
+
+# 3) Pasos/seg y pico de memoria (tracemalloc ve las allocaciones de NumPy)
+import tracemalloc
+
+
+def medir(paso, n_epochs):
+    inicio = time.perf_counter()
+    for _ in range(n_epochs):
+        for s in range(0, 20 * batch, batch):
+            paso(X_big[s:s + batch], y_big[s:s + batch])
+    pasos_seg = n_epochs * 20 / (time.perf_counter() - inicio)
+    tracemalloc.start()
+    for s in range(0, 20 * batch, batch):
+        paso(X_big[s:s + batch], y_big[s:s + batch])
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pasos_seg, pico
+
+
+linears, bns = capas_nuevas()
+ps_capas, pico_capas = medir(lambda Xb, yb: paso_capas(linears, bns, Xb, yb, 0.05, 1.0), 10)
+fused_bench = FusedMLP(dims_bn, batchnorm=True, dropout=0.1, lr=0.05, momentum=0.9,
+                       max_norm=1.0, seed=0)
+fused_bench.train_step(X_big[:batch], y_big[:batch])  # buffers del tamaño de batch
+ps_fused, pico_fused = medir(fused_bench.train_step, 10)
+print(f"  {dims_bn}, batch={batch}:")
+print(f"    Capas actuales: {ps_capas:7.0f} pasos/s, pico de memoria {pico_capas / 1e6:6.2f} MB")
+print(f"    FusedMLP:       {ps_fused:7.0f} pasos/s, pico de memoria {pico_fused / 1e6:6.2f} MB "
+      f"(+dropout y momentum)")
+
+
 # =====================================================================
 #   PARTE 9: LAYER NORMALIZATION BACKWARD
 # =====================================================================
@@ -1075,8 +1842,10 @@ RESUMEN DE BACKPROPAGATION:
 3. Value (micrograd): autograd para escalares.
 
 4. Tensor autograd: matmul, add, relu con backward.
+   Tape autograd: un nodo por op de tensor, backward = cinta al reves.
 
 5. Capas: Linear, BatchNorm, LayerNorm, Dropout.
+   FusedMLP: buffers planos + ufuncs out=, paso de entrenamiento sin allocaciones.
 
 6. Vanishing gradients: sigmoid/tanh saturan. Usar ReLU/GELU.
 
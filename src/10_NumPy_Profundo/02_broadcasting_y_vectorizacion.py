@@ -174,12 +174,60 @@ print(f"  Results match: {np.allclose(d_loop, d_vec)}")
 
 print("\n--- Pairwise distances (fully vectorized) ---")
 
-def pairwise_distances(X):
-    """Todas las distancias entre pares. O(n²) pero sin loops."""
-    # ||x-y||² = ||x||² + ||y||² - 2*x·y
-    sq_norms = np.sum(X**2, axis=1)
-    D = sq_norms[:, None] + sq_norms[None, :] - 2 * X @ X.T
-    return np.sqrt(np.maximum(D, 0))
+def pairwise_distances(X, Y=None, memoria_mb=64, dtype=None, n_hilos=1):
+    """
+    Todas las distancias entre pares. O(n²) pero sin loops... y sin temporales n×n.
+
+    La version directa crea ~4 matrices n×n temporales (broadcast de normas,
+    X @ X.T, resta, sqrt). Aqui se rellena la salida por bloques de filas y
+    columnas que caben en `memoria_mb`, reutilizando un unico buffer:
+    el pico de memoria es la salida + un bloque.
+
+    Los datos se centran (en float64, por bloques de filas) antes de la
+    identidad: con features lejos de 0 los tres terminos se cancelan y en
+    float32 se pierden casi todos los digitos.
+    """
+    # ||x-y||² = ||x||² + ||y||² - 2*x·y  (invariante a trasladar X e Y)
+    dtype = np.result_type(X.dtype, np.float32) if dtype is None else np.dtype(dtype)
+    centro = (X if Y is None else Y).mean(axis=0, dtype=np.float64)
+
+    def centrar(A, filas=4096):
+        C = np.empty(A.shape, dtype=dtype)
+        for s in range(0, len(A), filas):
+            np.subtract(A[s:s + filas], centro, out=C[s:s + filas], casting='unsafe')
+        return C
+
+    X = centrar(X)
+    Y = X if Y is None else centrar(Y)
+    x_sq = np.einsum('ij,ij->i', X, X)
+    y_sq = x_sq if Y is X else np.einsum('ij,ij->i', Y, Y)
+    D = np.empty((len(X), len(Y)), dtype=dtype)
+
+    presupuesto = max(1, int(memoria_mb * 2**20 // dtype.itemsize))
+    br = min(len(Y), max(1, presupuesto // 64))
+    bq = min(len(X), max(1, presupuesto // br))
+
+    def bloque(i):
+        fin = min(i + bq, len(X))
+        buffer = np.empty((fin - i, br), dtype=dtype)
+        for j in range(0, len(Y), br):
+            fin_j = min(j + br, len(Y))
+            tile = buffer[:, :fin_j - j]
+            np.matmul(X[i:fin], Y[j:fin_j].T, out=tile)   # BLAS
+            tile *= -2
+            tile += x_sq[i:fin, None]
+            tile += y_sq[None, j:fin_j]
+            np.maximum(tile, 0, out=tile)
+            np.sqrt(tile, out=D[i:fin, j:fin_j])
+
+    if n_hilos > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=n_hilos) as pool:
+            list(pool.map(bloque, range(0, len(X), bq)))
+    else:
+        for i in range(0, len(X), bq):
+            bloque(i)
+    return D
 
 X_small = np.random.randn(500, 10)
 start = time.perf_counter()
@@ -189,6 +237,15 @@ print(f"  500 points, 10D: {t:.4f}s")
 print(f"  D shape: {D.shape}")
 print(f"  D[0,0] = {D[0,0]:.6f} (should be 0)")
 
+X_medio = np.random.randn(4000, 32).astype(np.float32)
+D_f32 = pairwise_distances(X_medio, memoria_mb=8)
+D_ref = pairwise_distances(X_medio.astype(np.float64), memoria_mb=8)
+print(f"  4000 points float32 por bloques de 8 MB: dtype={D_f32.dtype}, "
+      f"max err vs float64 = {np.abs(D_f32 - D_ref).max():.2e}")
+D_off = pairwise_distances(X_medio[:1000] + np.float32(1e3), memoria_mb=8)
+print(f"  float32 con offset 1e3: max err = {np.abs(D_off - D_ref[:1000, :1000]).max():.2e} "
+      f"(se centra antes de ||x||² + ||y||² - 2x·y)")
+
 
 # =====================================================================
 #   PARTE 3: UFUNCS
@@ -184,12 +184,35 @@ PCA: proyectar datos en direcciones de maxima varianza.
 
 print("\n--- PCA implementacion ---")
 
-def pca(X, n_components):
-    """PCA desde cero."""
+def pca(X, n_components, method='eigh', n_iter=4, seed=None, dtype=None):
+    """
+    PCA desde cero.
+
+    method='eigh': covarianza d x d + eigh, O(d³).
+    method='randomized': range finder aleatorio + power iterations (Halko),
+    O(n·d·k), sin formar la covarianza. dtype=np.float32 para ahorrar memoria.
+    """
+    if dtype is not None:
+        X = X.astype(dtype, copy=False)
+
     # 1. Centrar
     mean = X.mean(axis=0)
     X_centered = X - mean
     
+    if method == 'randomized':
+        rng = np.random.default_rng(seed)
+        l = min(n_components + 10, *X.shape)
+        Q, _ = np.linalg.qr(X_centered @ rng.standard_normal((X.shape[1], l)).astype(X.dtype))
+        for _ in range(n_iter):
+            Q, _ = np.linalg.qr(X_centered.T @ Q)
+            Q, _ = np.linalg.qr(X_centered @ Q)
+        _, S, Vt = np.linalg.svd(Q.T @ X_centered, full_matrices=False)
+        components = Vt[:n_components].T
+        # Traza de la covarianza sin formarla: sum(x²) / (n-1)
+        total_var = np.einsum('ij,ij->', X_centered, X_centered) / (X.shape[0] - 1)
+        explained_variance = S[:n_components] ** 2 / (X.shape[0] - 1) / total_var
+        return X_centered @ components, components, explained_variance, mean
+
     # 2. Covarianza
     cov = (X_centered.T @ X_centered) / (X.shape[0] - 1)
     
@@ -229,6 +252,25 @@ for i, ev in enumerate(explained_var):
     print(f"    PC{i+1}: {ev:.4f} {bar}")
 print(f"  Total: {explained_var.sum():.4f}")
 
+print("\n--- PCA randomizado vs eigh ---")
+rng_pca = np.random.default_rng(0)
+n_big, d_big = 1_500, 1_000
+X_big = (rng_pca.standard_normal((n_big, 5)) @ rng_pca.standard_normal((5, d_big))
+         + 0.5 * rng_pca.standard_normal((n_big, d_big)))
+
+start = time.perf_counter()
+_, comp_eigh, ev_eigh, _ = pca(X_big, 5)
+t_eigh = time.perf_counter() - start
+start = time.perf_counter()
+_, comp_rand, ev_rand, _ = pca(X_big, 5, method='randomized', seed=0, dtype=np.float32)
+t_rand = time.perf_counter() - start
+# |cos| entre componentes emparejadas (el signo es arbitrario)
+cosenos = np.abs(np.sum(comp_eigh * comp_rand, axis=0))
+print(f"  {n_big} x {d_big}: eigh {t_eigh:.2f}s | randomized float32 {t_rand:.2f}s "
+      f"→ {t_eigh / t_rand:.0f}x")
+print(f"  Varianza explicada: eigh={ev_eigh.sum():.4f}, randomized={ev_rand.sum():.4f}")
+print(f"  |cos| componentes: min={cosenos.min():.5f}, dtype={comp_rand.dtype}")
+
 
 # =====================================================================
 #   PARTE 4: CONVOLUCION CON NUMPY
@@ -765,31 +807,52 @@ print("=" * 80)
 K-means completamente vectorizado con NumPy.
 """
 
-def kmeans(X, k, max_iters=100, tol=1e-4):
-    """K-means clustering."""
+def kmeans(X, k, max_iters=100, tol=1e-4, init='k-means++', chunk_size=65_536, dtype=None):
+    """
+    K-means clustering.
+    
+    init='k-means++' (por defecto) o 'random'. dtype=np.float32 reduce a la
+    mitad memoria y ancho de banda; la asignacion se hace por bloques de
+    chunk_size filas, asi que nunca se materializa la matriz n×k completa.
+    """
+    if dtype is not None:
+        X = X.astype(dtype, copy=False)
     n, d = X.shape
     rng = np.random.default_rng(42)
+    # ||x||² se calcula una vez, no en cada iteracion
+    X_sq = np.einsum('ij,ij->i', X, X)
     
-    # Inicializar centroides aleatoriamente
-    idx = rng.choice(n, k, replace=False)
-    centroids = X[idx].copy()
+    if init == 'k-means++':
+        # Distancia minima acumulada: un GEMV O(n·d) por centroide
+        centroids = np.empty((k, d), dtype=X.dtype)
+        centroids[0] = X[rng.integers(n)]
+        min_d = np.maximum(X_sq - 2 * X @ centroids[0] + centroids[0] @ centroids[0], 0)
+        for j in range(1, k):
+            p = min_d / min_d.sum()
+            centroids[j] = X[rng.choice(n, p=p)]
+            d_j = X_sq - 2 * X @ centroids[j] + centroids[j] @ centroids[j]
+            np.minimum(min_d, np.maximum(d_j, 0), out=min_d)
+    else:
+        # Inicializar centroides aleatoriamente
+        idx = rng.choice(n, k, replace=False)
+        centroids = X[idx].copy()
     
+    labels = np.empty(n, dtype=np.intp)
     for iteration in range(max_iters):
-        # Asignar clusters (pairwise distances vectorizadas)
+        # Asignar clusters (pairwise distances vectorizadas, por bloques)
         # ||x - c||² = ||x||² + ||c||² - 2*x·c
-        X_sq = np.sum(X**2, axis=1, keepdims=True)
-        C_sq = np.sum(centroids**2, axis=1, keepdims=True)
-        dists = X_sq + C_sq.T - 2 * X @ centroids.T
-        labels = np.argmin(dists, axis=1)
+        C_sq = np.einsum('ij,ij->i', centroids, centroids)
+        for s in range(0, n, chunk_size):
+            dists = X_sq[s:s + chunk_size, None] + C_sq - 2 * X[s:s + chunk_size] @ centroids.T
+            labels[s:s + chunk_size] = np.argmin(dists, axis=1)
         
-        # Actualizar centroides
-        new_centroids = np.empty_like(centroids)
-        for j in range(k):
-            mask = labels == j
-            if mask.sum() > 0:
-                new_centroids[j] = X[mask].mean(axis=0)
-            else:
-                new_centroids[j] = centroids[j]
+        # Actualizar centroides: sumas por cluster con bincount (sin mascaras)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.stack([np.bincount(labels, weights=X[:, c], minlength=k)
+                         for c in range(d)], axis=1)
+        new_centroids = centroids.copy()
+        vivos = counts > 0
+        new_centroids[vivos] = (sums[vivos] / counts[vivos, None]).astype(X.dtype)
         
         # Convergencia
         shift = np.linalg.norm(new_centroids - centroids)
@@ -798,7 +861,8 @@ def kmeans(X, k, max_iters=100, tol=1e-4):
         if shift < tol:
             break
     
-    inertia = sum(np.sum((X[labels == j] - centroids[j])**2) for j in range(k))
+    inertia = sum(float(np.sum((X[s:s + chunk_size] - centroids[labels[s:s + chunk_size]])**2))
+                  for s in range(0, n, chunk_size))
     return labels, centroids, inertia, iteration + 1
 
 # Test
@@ -818,6 +882,23 @@ print(f"  Inertia: {inertia:.2f}")
 print(f"  Converged in {iters} iterations")
 
 
+print("\n--- K-means a escala: float32 + chunks ---")
+
+rng_km = np.random.default_rng(7)
+n_km = 50_000
+centros_km = rng_km.uniform(-10, 10, (8, 16))
+X_km_big = (centros_km[rng_km.integers(0, 8, n_km)]
+            + rng_km.standard_normal((n_km, 16))).astype(np.float32)
+
+for init in ('random', 'k-means++'):
+    start = time.perf_counter()
+    _, _, inertia_big, iters_big = kmeans(X_km_big, 8, init=init, chunk_size=16_384)
+    print(f"  {n_km:,} x 16 float32, init={init:<9}: {time.perf_counter() - start:.2f}s, "
+          f"{iters_big} iters, inertia={inertia_big:,.0f}")
+print(f"  Memoria: X {X_km_big.nbytes / 1e6:.1f} MB (float64: {X_km_big.nbytes / 5e5:.1f} MB); "
+      f"distancias por bloque {16_384 * 8 * 4 / 1e6:.1f} MB vs {n_km * 8 * 4 / 1e6:.1f} MB completa")
+
+
 # =====================================================================
 #   PARTE 15: GRADIENT CLIPPING
 # =====================================================================
@@ -990,6 +1071,7 @@ RESUMEN DE LINALG Y APLICACIONES ML:
 2. Ridge regression: regularizacion con λI.
 
 3. PCA: centrar + covarianza + eigendecomposition.
+   d grande: randomized (QR + power iterations), sin covarianza.
 
 4. Convolucion: base de CNNs.
 
@@ -1004,6 +1086,7 @@ RESUMEN DE LINALG Y APLICACIONES ML:
 9. Losses vectorizados: CE, MSE sin loops.
 
 10. Best practices: vectorizar siempre.
+    K-means a escala: k-means++, float32, asignacion por bloques, bincount.
 
 FIN DEL MODULO 10: NUMPY PROFUNDO.
 """
@@ -26,6 +26,7 @@
 import numpy as np
 import time
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 
 # =====================================================================
@@ -150,6 +151,19 @@ Criterio de split:
   - Gini impurity: 1 - sum(p_i^2)
   - Entropy: -sum(p_i * log(p_i))
   - Information Gain: entropy(parent) - weighted_avg(entropy(children))
+
+splitter='exact' prueba cada valor unico de cada feature y recalcula la
+impureza con mascaras: O(features x uniques x N) por nodo.
+
+splitter='hist' (como LightGBM / HistGradientBoosting):
+  1. Discretiza cada feature UNA vez en <= 255 bins por cuantiles (uint8),
+     estimados sobre una submuestra de como mucho 200K filas.
+  2. Por nodo: histograma (feature, bin, clase) con un solo bincount, O(N x F).
+  3. Cumsum sobre bins = conteos del hijo izquierdo para TODOS los cortes;
+     derecho = total - izquierdo. Mejor split en O(F x bins x clases).
+  4. Truco de la resta: solo se construye el histograma del hijo pequeno;
+     el del hermano = padre - hijo.
+  5. n_jobs > 1 reparte histogramas y escaneo por features en un ThreadPool.
 """
 
 def gini_impurity(y):
@@ -179,12 +193,17 @@ class DecisionTreeNode:
 
 
 class DecisionTreeClassifier:
-    """CART Decision Tree from scratch."""
+    """CART Decision Tree from scratch (splitter='exact' or 'hist')."""
     
-    def __init__(self, max_depth=5, min_samples=2, criterion='gini'):
+    def __init__(self, max_depth=5, min_samples=2, criterion='gini',
+                 splitter='exact', max_bins=255, n_jobs=1):
         self.max_depth = max_depth
         self.min_samples = min_samples
+        self.criterion_name = criterion
         self.criterion = gini_impurity if criterion == 'gini' else entropy
+        self.splitter = splitter
+        self.max_bins = min(max_bins, 255)  # bins fit in uint8
+        self.n_jobs = n_jobs
         self.root = None
     
     def _best_split(self, X, y):
@@ -234,9 +253,128 @@ class DecisionTreeClassifier:
         return DecisionTreeNode(feature=feature, threshold=threshold, left=left, right=right)
     
     def fit(self, X, y):
-        self.root = self._build_tree(X, y)
+        if self.splitter == 'hist':
+            self.root = self._fit_hist(X, y)
+        else:
+            self.root = self._build_tree(X, y)
         return self
     
+    # ------------------------------------------------------------------
+    # Histogram splitter (LightGBM / HistGradientBoosting style)
+    # ------------------------------------------------------------------
+    
+    def _bin_features(self, X, subsample=200_000):
+        """Quantile bin edges per feature + X binned once as uint8."""
+        n, F = X.shape
+        X_binned = np.empty((n, F), dtype=np.uint8)
+        self.bin_edges_ = [None] * F
+        rng = np.random.default_rng(0)
+        sample = rng.choice(n, subsample, replace=False) if n > subsample else None
+
+        def bin_feature(f):
+            column = np.ascontiguousarray(X[:, f])
+            values = np.sort(column if sample is None else column[sample])
+            edges = values[np.concatenate(([True], values[1:] != values[:-1]))]   # uniques
+            if len(edges) > self.max_bins:
+                # Quantiles read straight from the sorted sample (one sort per feature)
+                positions = (np.linspace(0, 1, self.max_bins + 1)[1:] * (len(values) - 1)).astype(np.int64)
+                edges = np.unique(values[positions])
+            edges[-1] = np.inf   # values unseen in the sample still land in the last bin
+            # bin b holds edges[b-1] < x <= edges[b]  ->  "bin <= b" == "x <= edges[b]"
+            X_binned[:, f] = np.searchsorted(edges, column, side='left')
+            self.bin_edges_[f] = edges
+
+        if self._pool is None:
+            for f in range(F):
+                bin_feature(f)
+        else:
+            list(self._pool.map(bin_feature, range(F)))
+        return X_binned
+    
+    def _histogram(self, X_binned, y_codes, idx):
+        """Class-count histogram of a node: (n_features, n_bins, n_classes)."""
+        F, B, C = X_binned.shape[1], self.n_bins_, self.n_classes_
+        y_node = y_codes[idx]
+        hist = np.empty((F, B, C), dtype=np.int64)
+
+        def fill(features):
+            for f in features:
+                flat = X_binned[idx, f].astype(np.intp) * C + y_node
+                hist[f] = np.bincount(flat, minlength=B * C).reshape(B, C)
+
+        if self._pool is None:
+            fill(range(F))
+        else:
+            list(self._pool.map(fill, np.array_split(np.arange(F), self.n_jobs)))
+        return hist
+    
+    def _impurity_counts(self, counts, totals):
+        """Impurity from class counts (..., C) and node sizes (...)."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            probs = counts / np.maximum(totals, 1)[..., None]
+            if self.criterion_name == 'gini':
+                return 1 - np.sum(probs ** 2, axis=-1)
+            logs = np.where(probs > 0, np.log2(np.where(probs > 0, probs, 1)), 0)
+            return -np.sum(probs * logs, axis=-1)
+    
+    def _scan_features(self, hist, features):
+        """Best (gain, feature, bin) over a subset of features from cumulative histograms."""
+        h = hist[features]
+        left = np.cumsum(h, axis=1)                     # counts with bin <= b
+        total = left[:, -1:, :]
+        right = total - left
+        n_left, n_right = left.sum(axis=2), right.sum(axis=2)
+        n = n_left + n_right
+        weighted = (n_left * self._impurity_counts(left, n_left)
+                    + n_right * self._impurity_counts(right, n_right)) / n
+        gain = self._impurity_counts(total[:, 0], n[:, 0])[:, None] - weighted
+        gain[(n_left < self.min_samples) | (n_right < self.min_samples)] = -1
+        f, b = np.unravel_index(np.argmax(gain), gain.shape)
+        return gain[f, b], features[f], b
+    
+    def _best_split_hist(self, hist):
+        n_features = hist.shape[0]
+        if self._pool is None:
+            return self._scan_features(hist, np.arange(n_features))
+        chunks = np.array_split(np.arange(n_features), self.n_jobs)
+        results = self._pool.map(lambda fs: self._scan_features(hist, fs), [c for c in chunks if len(c)])
+        return max(results, key=lambda r: r[0])
+    
+    def _build_hist(self, X_binned, y_codes, idx, hist, depth):
+        class_counts = hist[0].sum(axis=0)
+        if depth >= self.max_depth or np.count_nonzero(class_counts) == 1 or len(idx) < self.min_samples:
+            return DecisionTreeNode(value=self.classes_[Counter(y_codes[idx]).most_common(1)[0][0]])
+        gain, feature, b = self._best_split_hist(hist)
+        if gain <= 0:
+            return DecisionTreeNode(value=self.classes_[Counter(y_codes[idx]).most_common(1)[0][0]])
+        go_left = X_binned[idx, feature] <= b
+        idx_left, idx_right = idx[go_left], idx[~go_left]
+        # Subtraction trick: scan only the smaller child, sibling = parent - child
+        if len(idx_left) <= len(idx_right):
+            hist_left = self._histogram(X_binned, y_codes, idx_left)
+            hist_right = hist - hist_left
+        else:
+            hist_right = self._histogram(X_binned, y_codes, idx_right)
+            hist_left = hist - hist_right
+        left = self._build_hist(X_binned, y_codes, idx_left, hist_left, depth + 1)
+        right = self._build_hist(X_binned, y_codes, idx_right, hist_right, depth + 1)
+        return DecisionTreeNode(feature=feature, threshold=self.bin_edges_[feature][b],
+                                left=left, right=right)
+    
+    def _fit_hist(self, X, y):
+        self.classes_, y_codes = np.unique(y, return_inverse=True)
+        self.n_classes_ = len(self.classes_)
+        self._pool = ThreadPoolExecutor(self.n_jobs) if self.n_jobs > 1 else None
+        try:
+            X_binned = self._bin_features(X)
+            self.n_bins_ = max(len(e) for e in self.bin_edges_)
+            idx = np.arange(len(y))
+            return self._build_hist(X_binned, y_codes, idx, self._histogram(X_binned, y_codes, idx), 0)
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+            self._pool = None
+    
     def _predict_one(self, x, node):
         if node.value is not None:
             return node.value
@@ -256,6 +394,34 @@ y_pred_dt = dt.predict(X_cls)
 acc_dt = np.mean(y_pred_dt == y_cls)
 print(f"  Tree accuracy (train): {acc_dt:.4f}")
 
+dt_hist = DecisionTreeClassifier(max_depth=4, min_samples=5, splitter='hist').fit(X_cls, y_cls)
+print(f"  Hist tree accuracy (train): {np.mean(dt_hist.predict(X_cls) == y_cls):.4f}")
+
+print("\n--- Exact vs histogram splitter ---")
+
+def make_tree_data(n, n_features, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n, n_features))
+    y = ((X[:, 0] + 0.5 * X[:, 1] ** 2 - X[:, 2] * X[:, 3]
+          + 0.3 * rng.standard_normal(n)) > 0.5).astype(int)
+    return X, y
+
+X_big, y_big = make_tree_data(500, 10)
+for name, model in [("exact", DecisionTreeClassifier(max_depth=6, min_samples=20)),
+                    ("hist", DecisionTreeClassifier(max_depth=6, min_samples=20, splitter='hist'))]:
+    start = time.perf_counter()
+    model.fit(X_big, y_big)
+    t = time.perf_counter() - start
+    print(f"  500 x 10  {name:<13}: fit {t:7.3f}s | train acc {np.mean(model.predict(X_big) == y_big):.4f}")
+
+# 1M x 50: DecisionTreeClassifier(splitter='hist', n_jobs=8).fit(*make_tree_data(1_000_000, 50))
+X_big, y_big = make_tree_data(50_000, 20)
+for n_jobs in (1, 4):
+    start = time.perf_counter()
+    DecisionTreeClassifier(max_depth=6, min_samples=20, splitter='hist', n_jobs=n_jobs).fit(X_big, y_big)
+    print(f"  50K x 20  hist n_jobs={n_jobs}: fit {time.perf_counter() - start:7.3f}s")
+# n_jobs solo ayuda con varios cores (sort y searchsorted liberan el GIL)
+
 
 # =====================================================================
 #   PARTE 3: KNN
@@ -272,27 +438,86 @@ K-Nearest Neighbors:
   - Distance: euclidean, manhattan, cosine.
 """
 
+def kneighbors_chunked(Q, R, k, memory_mb=64, dtype=None):
+    """
+    K nearest rows of R for every row of Q, tiled so that each distance block
+    fits in memory_mb. Uses ||a||² + ||b||² - 2a·b (BLAS matmul) and keeps a
+    running top-k per query with argpartition. Returns (dist_sq, idx) sorted.
+
+    Q and R are centred on R's mean before the identity: with large feature
+    offsets the three terms cancel catastrophically. dtype=None keeps float64
+    inputs in float64; float32 halves memory once the data is centred.
+    """
+    Q, R = np.asarray(Q), np.asarray(R)
+    if dtype is None:
+        dtype = np.result_type(Q.dtype, R.dtype, np.float32)
+    centro = R.mean(axis=0, dtype=np.float64)
+
+    def centrar(A, filas=4096):
+        # Row blocks straight into `dtype`: no full float64 copy of A - centro
+        C = np.empty(A.shape, dtype=dtype)
+        for s in range(0, len(A), filas):
+            np.subtract(A[s:s + filas], centro, out=C[s:s + filas], casting='unsafe')
+        return C
+
+    Q, R = centrar(Q), centrar(R)
+    q_sq, r_sq = np.einsum('ij,ij->i', Q, Q), np.einsum('ij,ij->i', R, R)
+    k = min(k, len(R))
+    budget = max(1, int(memory_mb * 2**20 // Q.dtype.itemsize))
+    br = min(len(R), max(1, budget // 64))
+    bq = min(len(Q), max(1, budget // br))
+    dist = np.empty((len(Q), k), dtype=Q.dtype)
+    idx = np.empty((len(Q), k), dtype=np.int64)
+    for i in range(0, len(Q), bq):
+        fin = min(i + bq, len(Q))
+        best_d = np.full((fin - i, k), np.inf, dtype=Q.dtype)
+        best_i = np.zeros((fin - i, k), dtype=np.int64)
+        for j in range(0, len(R), br):
+            fin_j = min(j + br, len(R))
+            block = Q[i:fin] @ R[j:fin_j].T
+            block *= -2
+            block += q_sq[i:fin, None]
+            block += r_sq[None, j:fin_j]
+            cand_d = np.hstack([best_d, block])
+            cand_i = np.hstack([best_i, np.broadcast_to(np.arange(j, fin_j), block.shape)])
+            sel = np.argpartition(cand_d, k - 1, axis=1)[:, :k]
+            best_d = np.take_along_axis(cand_d, sel, axis=1)
+            best_i = np.take_along_axis(cand_i, sel, axis=1)
+        order = np.argsort(best_d, axis=1, kind='stable')
+        dist[i:fin] = np.take_along_axis(best_d, order, axis=1)
+        idx[i:fin] = np.take_along_axis(best_i, order, axis=1)
+    return dist, idx
+
+
 class KNNClassifier:
-    """KNN from scratch."""
+    """KNN from scratch (batched, memory-bounded predict)."""
     
-    def __init__(self, k=5):
+    def __init__(self, k=5, memory_mb=64):
         self.k = k
+        self.memory_mb = memory_mb
         self.X_train = None
         self.y_train = None
     
     def fit(self, X, y):
         self.X_train = X.copy()
         self.y_train = y.copy()
+        self.classes_, self._codes = np.unique(self.y_train, return_inverse=True)
         return self
     
     def _predict_one(self, x):
-        distances = np.sqrt(np.sum((self.X_train - x) ** 2, axis=1))
-        k_idx = np.argsort(distances)[:self.k]
-        k_labels = self.y_train[k_idx]
-        return Counter(k_labels).most_common(1)[0][0]
+        return self.predict(x[None, :])[0]
     
     def predict(self, X):
-        return np.array([self._predict_one(x) for x in X])
+        _, k_idx = kneighbors_chunked(X, self.X_train, self.k, self.memory_mb)
+        k_codes = self._codes[k_idx]                      # (n, k), nearest first
+        n, k = k_codes.shape
+        rows = np.arange(n)[:, None]
+        counts = np.zeros((n, len(self.classes_)), dtype=np.int64)
+        np.add.at(counts, (rows, k_codes), 1)
+        # Tie-break like Counter.most_common: the class seen first (nearest) wins
+        first = np.full((n, len(self.classes_)), k, dtype=np.int64)
+        np.minimum.at(first, (rows, k_codes), np.broadcast_to(np.arange(k), (n, k)))
+        return self.classes_[np.argmax(counts * (k + 1) + (k - first), axis=1)]
 
 print("\n--- KNN con diferentes K ---")
 
@@ -25,7 +25,10 @@
 
 import numpy as np
 import time
-from collections import Counter
+import multiprocessing as mp
+from abc import ABC, abstractmethod
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 
 
 # =====================================================================
@@ -48,28 +51,99 @@ Algoritmo:
 Complejidad: O(n * k * d * iterations)
 """
 
+def _sq_dists(X, C, C_sq=None):
+    """||x - c||² por GEMM: ||x||² - 2 x·c + ||c||² (≥ 0), en el dtype de X."""
+    if C_sq is None:
+        C_sq = np.einsum('ij,ij->i', C, C)
+    d2 = np.einsum('ij,ij->i', X, X)[:, None] - 2 * (X @ C.T) + C_sq
+    return np.maximum(d2, 0, out=d2)
+
+
+def _assign_chunked(X, C, chunk_size=65_536):
+    """Centroide mas cercano + distancias (1ª y 2ª) por bloques de filas."""
+    n = len(X)
+    C_sq = np.einsum('ij,ij->i', C, C)
+    labels = np.empty(n, dtype=np.intp)
+    d1 = np.empty(n, dtype=X.dtype)
+    d2 = np.full(n, np.inf, dtype=X.dtype)
+    for s in range(0, n, chunk_size):
+        D = _sq_dists(X[s:s + chunk_size], C, C_sq)
+        if len(C) > 1:
+            part = np.argpartition(D, 1, axis=1)[:, :2]
+            dp = np.take_along_axis(D, part, axis=1)
+            swap = dp[:, 1] < dp[:, 0]
+            part[swap] = part[swap][:, ::-1]
+            dp[swap] = dp[swap][:, ::-1]
+            labels[s:s + chunk_size] = part[:, 0]
+            d1[s:s + chunk_size] = dp[:, 0]
+            d2[s:s + chunk_size] = dp[:, 1]
+        else:
+            labels[s:s + chunk_size] = 0
+            d1[s:s + chunk_size] = D[:, 0]
+    return labels, np.sqrt(d1), np.sqrt(d2)
+
+
+# Datos compartidos con los workers: con 'fork' los hereda cada proceso hijo
+# sin serializar X (copy-on-write), solo viaja la semilla de cada restart.
+# Sin 'fork' (Windows, macOS por defecto) los restarts corren en serie: con
+# 'spawn' cada worker re-importaria este script entero como __main__.
+_KMEANS_X = None
+
+
+def _kmeans_restart(args):
+    model, seed = args
+    rng = np.random.RandomState(seed)
+    return model._fit_once(_KMEANS_X, rng)
+
+
 class KMeans:
-    """K-Means from scratch."""
+    """
+    K-Means from scratch.
+
+    algorithm='hamerly' (Hamerly 2010): por punto, una cota SUPERIOR de la
+    distancia a su centroide y una INFERIOR a cualquier otro. Tras mover los
+    centroides, las cotas se corrigen con el desplazamiento (desigualdad
+    triangular); si u <= max(l, s/2) el punto no puede cambiar de cluster y
+    no se calcula NINGUNA distancia. Memoria O(n) (Elkan usaria O(n·k)).
+    Mismo resultado que 'lloyd' (que recalcula n x k distancias siempre).
+
+    n_jobs > 1: los restarts de n_init corren en un pool de procesos
+    (solo con 'fork'; si no esta disponible, en serie).
+    dtype=np.float32 + chunk_size acotan la memoria (10M x 64 en float32
+    ocupa 2.6GB; las cotas y etiquetas O(n) suman ~160MB).
+    """
     
-    def __init__(self, k=3, max_iter=100, tol=1e-4, n_init=10):
+    def __init__(self, k=3, max_iter=100, tol=1e-4, n_init=10,
+                 algorithm='hamerly', n_jobs=None, dtype=None, chunk_size=65_536):
         self.k = k
         self.max_iter = max_iter
         self.tol = tol
         self.n_init = n_init
+        self.algorithm = algorithm
+        self.n_jobs = n_jobs
+        self.dtype = dtype
+        self.chunk_size = chunk_size
         self.centroids = None
         self.labels = None
         self.inertia = None
+        self.n_distances = 0
     
-    def _init_centroids(self, X):
-        """K-Means++ initialization."""
+    def _init_centroids(self, X, rng=np.random):
+        """K-Means++ initialization (min-distancia acumulada: O(n·k))."""
         n = len(X)
-        centroids = [X[np.random.randint(n)]]
+        centroids = [X[rng.randint(n)]]
+        distances = np.empty(n, dtype=X.dtype)
+        for s in range(0, n, self.chunk_size):
+            distances[s:s + self.chunk_size] = np.sum((X[s:s + self.chunk_size] - centroids[0])**2, axis=1)
         
         for _ in range(1, self.k):
-            distances = np.min([np.sum((X - c)**2, axis=1) for c in centroids], axis=0)
             probs = distances / distances.sum()
-            idx = np.random.choice(n, p=probs)
+            idx = rng.choice(n, p=probs)
             centroids.append(X[idx])
+            for s in range(0, n, self.chunk_size):
+                np.minimum(distances[s:s + self.chunk_size],
+                           np.sum((X[s:s + self.chunk_size] - X[idx])**2, axis=1),
+                           out=distances[s:s + self.chunk_size])
         
         return np.array(centroids)
     
@@ -77,18 +151,27 @@ class KMeans:
         distances = np.array([np.sum((X - c)**2, axis=1) for c in centroids])
         return np.argmin(distances, axis=0)
     
-    def _update(self, X, labels):
+    def _update(self, X, labels, rng=np.random):
         centroids = np.array([X[labels == k].mean(axis=0) if np.sum(labels == k) > 0
-                              else X[np.random.randint(len(X))]
+                              else X[rng.randint(len(X))]
                               for k in range(self.k)])
         return centroids
     
-    def _fit_once(self, X):
-        centroids = self._init_centroids(X)
+    def _inertia(self, X, centroids, labels):
+        return sum(float(np.sum((X[s:s + self.chunk_size] - centroids[labels[s:s + self.chunk_size]])**2))
+                   for s in range(0, len(X), self.chunk_size))
+    
+    def _fit_once(self, X, rng=np.random):
+        centroids = self._init_centroids(X, rng)
+        if self.algorithm == 'hamerly':
+            centroids, labels, n_dist = self._hamerly(X, centroids, rng)
+            return centroids, labels, self._inertia(X, centroids, labels), n_dist
         
+        n_dist = 0
         for _ in range(self.max_iter):
             labels = self._assign(X, centroids)
-            new_centroids = self._update(X, labels)
+            n_dist += len(X) * self.k
+            new_centroids = self._update(X, labels, rng)
             
             if np.max(np.abs(new_centroids - centroids)) < self.tol:
                 break
@@ -96,13 +179,87 @@ class KMeans:
         
         inertia = sum(np.sum((X[labels == k] - centroids[k])**2)
                       for k in range(self.k))
-        return centroids, labels, inertia
+        return centroids, labels, inertia, n_dist
+    
+    def _hamerly(self, X, centroids, rng):
+        n, k = len(X), self.k
+        labels, upper, lower = _assign_chunked(X, centroids, self.chunk_size)
+        n_dist = n * k
+        # Sumas por cluster: se mantienen con deltas de los puntos que cambian
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros((k, X.shape[1]))
+        for s in range(0, n, self.chunk_size):
+            np.add.at(sums, labels[s:s + self.chunk_size], X[s:s + self.chunk_size])
+        
+        for _ in range(self.max_iter):
+            new_centroids = np.array([sums[j] / counts[j] if counts[j] > 0
+                                      else X[rng.randint(n)] for j in range(k)],
+                                     dtype=X.dtype)
+            if np.max(np.abs(new_centroids - centroids)) < self.tol:
+                break
+            shift = np.linalg.norm(new_centroids - centroids, axis=1).astype(X.dtype)
+            centroids = new_centroids
+            
+            # Cotas tras el movimiento: u crece con su centroide, l baja con el
+            # mayor desplazamiento de los OTROS centroides
+            upper += shift[labels]
+            if k > 1:
+                orden = np.argsort(shift)
+                j_max, p1, p2 = orden[-1], shift[orden[-1]], shift[orden[-2]]
+                lower -= np.where(labels == j_max, p2, p1)
+                cc = np.sqrt(_sq_dists(centroids, centroids))
+                np.fill_diagonal(cc, np.inf)
+                s_half = 0.5 * cc.min(axis=1)
+            else:
+                s_half = np.full(1, np.inf, dtype=X.dtype)
+            bound = np.maximum(s_half[labels], lower)
+            
+            cand = np.flatnonzero(upper > bound)
+            if cand.size == 0:
+                continue
+            # 1) Ajustar la cota superior con la distancia real (1 por punto)
+            upper[cand] = np.linalg.norm(X[cand] - centroids[labels[cand]], axis=1)
+            n_dist += cand.size
+            cand = cand[upper[cand] > bound[cand]]
+            if cand.size == 0:
+                continue
+            # 2) Solo estos puntos necesitan las k distancias
+            new_labels, d1, d2 = _assign_chunked(X[cand], centroids, self.chunk_size)
+            n_dist += cand.size * k
+            cambia = new_labels != labels[cand]
+            if cambia.any():
+                idx, old, new = cand[cambia], labels[cand][cambia], new_labels[cambia]
+                np.subtract.at(sums, old, X[idx])
+                np.add.at(sums, new, X[idx])
+                counts += np.bincount(new, minlength=k) - np.bincount(old, minlength=k)
+            labels[cand] = new_labels
+            upper[cand] = d1
+            lower[cand] = d2
+        
+        return centroids, labels, n_dist
     
     def fit(self, X):
-        best_inertia = float('inf')
+        if self.dtype is not None:
+            X = np.asarray(X, dtype=self.dtype)
         
-        for _ in range(self.n_init):
-            centroids, labels, inertia = self._fit_once(X)
+        if (self.n_jobs and self.n_jobs > 1 and self.n_init > 1
+                and 'fork' in mp.get_all_start_methods()):
+            global _KMEANS_X
+            seeds = np.random.randint(0, 2**31 - 1, self.n_init)
+            ctx = mp.get_context('fork')
+            _KMEANS_X = X
+            try:
+                with ProcessPoolExecutor(self.n_jobs, mp_context=ctx) as pool:
+                    results = list(pool.map(_kmeans_restart, [(self, s) for s in seeds]))
+            finally:
+                _KMEANS_X = None
+        else:
+            results = (self._fit_once(X) for _ in range(self.n_init))
+        
+        best_inertia = float('inf')
+        self.n_distances = 0
+        for centroids, labels, inertia, n_dist in results:
+            self.n_distances += n_dist
             if inertia < best_inertia:
                 best_inertia = inertia
                 self.centroids = centroids
@@ -112,7 +269,8 @@ class KMeans:
         return self
     
     def predict(self, X):
-        return self._assign(X, self.centroids)
+        return _assign_chunked(np.asarray(X, dtype=self.centroids.dtype),
+                               self.centroids, self.chunk_size)[0]
 
 
 print("\n--- Datos sinteticos ---")
@@ -143,6 +301,41 @@ for i, c in enumerate(km.centroids):
     print(f"    Cluster {i}: center=({c[0]:.2f}, {c[1]:.2f}), n={n_points}")
 
 
+print("\n--- Hamerly vs Lloyd a escala ---")
+
+# El benchmark usa su propia semilla; se restaura el estado global despues
+estado_rng = np.random.get_state()
+rng_km = np.random.default_rng(0)
+centros_km = rng_km.uniform(-10, 10, (20, 16))
+X_km_big = (centros_km[rng_km.integers(0, 20, 10_000)]
+            + rng_km.standard_normal((10_000, 16)) * 1.5)
+
+resultados_km = {}
+for algoritmo in ('lloyd', 'hamerly'):
+    np.random.seed(1)
+    modelo = KMeans(k=20, n_init=2, algorithm=algoritmo)
+    inicio = time.perf_counter()
+    modelo.fit(X_km_big)
+    resultados_km[algoritmo] = (modelo, time.perf_counter() - inicio)
+
+(lloyd, t_lloyd), (hamerly, t_hamerly) = resultados_km['lloyd'], resultados_km['hamerly']
+print(f"  10,000 x 16, k=20, n_init=2:")
+print(f"    lloyd:   {t_lloyd:6.2f}s, {lloyd.n_distances:>12,} distancias")
+print(f"    hamerly: {t_hamerly:6.2f}s, {hamerly.n_distances:>12,} distancias "
+      f"({hamerly.n_distances / lloyd.n_distances:.1%}) → {t_lloyd / t_hamerly:.1f}x")
+print(f"    Mismas etiquetas: {np.array_equal(lloyd.labels, hamerly.labels)}, "
+      f"inercia {lloyd.inertia:,.1f} vs {hamerly.inertia:,.1f}")
+
+import os
+np.random.seed(1)
+inicio = time.perf_counter()
+km_par = KMeans(k=20, n_init=4, n_jobs=2, dtype=np.float32).fit(X_km_big)
+t_par = time.perf_counter() - inicio
+print(f"    float32, n_init=4 en 2 procesos: {t_par:.2f}s (CPUs: {os.cpu_count()}), "
+      f"inercia {km_par.inertia:,.1f}, dtype {km_par.centroids.dtype}")
+np.random.set_state(estado_rng)
+
+
 # =====================================================================
 #   PARTE 2: ELBOW METHOD
 # =====================================================================
@@ -190,8 +383,8 @@ Silhouette score: medir calidad del clustering.
   Rango: [-1, 1]. 1 = perfecto, 0 = overlap, -1 = misassigned.
 """
 
-def silhouette_score(X, labels):
-    """Silhouette score from scratch."""
+def silhouette_score_naive(X, labels):
+    """Silhouette score from scratch (referencia O(n²·k) con bucles)."""
     n = len(X)
     unique_labels = np.unique(labels)
     scores = np.zeros(n)
@@ -219,6 +412,146 @@ def silhouette_score(X, labels):
     
     return np.mean(scores)
 
+
+"""
+Silhouette exacta por bloques:
+  - Se procesan B filas a la vez: distancias B×n con una GEMM.
+  - Sumas por cluster con UNA llamada a bincount sobre indices fila*k + label.
+  - B se elige para que el bloque (distancias + indices) quepa en memory_mb.
+  Sigue siendo O(n²·d) en flops (la silhouette exacta lo exige), pero sin
+  bucles Python por punto ni mascaras repetidas, y con memoria acotada.
+"""
+
+def silhouette_samples(X, labels, idx=None, memory_mb=64):
+    """
+    s(i) exacta para las filas idx (todas por defecto), contra todo X.
+    Clusters de un solo punto → s(i) = 0 (convencion de Rousseeuw).
+    """
+    X = np.asarray(X, dtype=float)
+    n = len(X)
+    _, y = np.unique(labels, return_inverse=True)
+    k = y.max() + 1
+    counts = np.bincount(y, minlength=k)
+    idx = np.arange(n) if idx is None else np.asarray(idx)
+    
+    X_sq = np.einsum('ij,ij->i', X, X)
+    # Por fila del bloque: n distancias float64 + n indices int64
+    block = max(1, min(len(idx), int(memory_mb * 2**20 // (16 * n))))
+    s = np.empty(len(idx))
+    D_buf = np.empty((block, n))
+    
+    for start in range(0, len(idx), block):
+        rows = idx[start:start + block]
+        m = len(rows)
+        # D construida in situ: ningun otro temporal m x n aparte de `flat`
+        D = np.matmul(X[rows], X.T, out=D_buf[:m])
+        D *= -2
+        D += X_sq[rows, None]
+        D += X_sq[None, :]
+        np.sqrt(np.maximum(D, 0, out=D), out=D)
+        D[np.arange(m), rows] = 0.0
+        
+        flat = (np.arange(m)[:, None] * k + y[None, :]).ravel()
+        sums = np.bincount(flat, weights=D.ravel(), minlength=m * k).reshape(m, k)
+        
+        own = y[rows]
+        own_n = counts[own]
+        a = sums[np.arange(m), own] / np.maximum(own_n - 1, 1)
+        mean_other = sums / counts
+        mean_other[np.arange(m), own] = np.inf
+        b = mean_other.min(axis=1)
+        
+        denom = np.maximum(a, b)
+        s_blk = np.where(denom > 0, (b - a) / np.where(denom > 0, denom, 1), 0.0)
+        s_blk[own_n == 1] = 0.0
+        s[start:start + m] = s_blk
+    return s
+
+
+def silhouette_score(X, labels, memory_mb=64):
+    """Silhouette score exacto (bloques + bincount)."""
+    return float(silhouette_samples(X, labels, memory_mb=memory_mb).mean())
+
+
+def silhouette_score_sampled(X, labels, n_samples=2000, confidence=0.95,
+                             random_state=None, memory_mb=64):
+    """
+    Estimacion estratificada de la silhouette con intervalo de confianza.
+    
+    Muestreo por cluster (asignacion proporcional, minimo 2 por estrato);
+    cada s(i) muestreada es exacta contra todo X. El estimador es la media
+    estratificada y su varianza incluye la correccion por poblacion finita.
+    Coste: O(n_samples · n · d) en vez de O(n² · d).
+    """
+    from statistics import NormalDist
+    rng = np.random.default_rng(random_state)
+    n = len(X)
+    _, y = np.unique(labels, return_inverse=True)
+    counts = np.bincount(y)
+    
+    alloc = np.minimum(counts, np.maximum(2, np.round(n_samples * counts / n).astype(int)))
+    estratos = [rng.choice(np.flatnonzero(y == c), alloc[c], replace=False)
+                for c in range(len(counts))]
+    s = silhouette_samples(X, labels, np.concatenate(estratos), memory_mb=memory_mb)
+    
+    w = counts / n
+    medias = np.empty(len(counts))
+    varianzas = np.empty(len(counts))
+    pos = 0
+    for c, m in enumerate(alloc):
+        s_c = s[pos:pos + m]
+        pos += m
+        medias[c] = s_c.mean()
+        fpc = 1 - m / counts[c]
+        varianzas[c] = s_c.var(ddof=1) / m * fpc if m > 1 else 0.0
+    
+    estimate = float(w @ medias)
+    se = float(np.sqrt(w**2 @ varianzas))
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    return estimate, (estimate - z * se, estimate + z * se)
+
+
+"""
+Alternativas O(n·k) para bucles de seleccion de modelo:
+  Davies-Bouldin:    media de max_j (S_i + S_j) / ||c_i - c_j||. Menor = mejor.
+  Calinski-Harabasz: (dispersion entre / (k-1)) / (dispersion dentro / (n-k)).
+                     Mayor = mejor.
+Solo necesitan centroides y distancias punto→centroide propio.
+"""
+
+def _cluster_centroids(X, labels):
+    _, y = np.unique(labels, return_inverse=True)
+    k = y.max() + 1
+    counts = np.bincount(y, minlength=k)
+    sums = np.zeros((k, X.shape[1]))
+    np.add.at(sums, y, X)
+    return y, counts, sums / counts[:, None]
+
+
+def davies_bouldin_score(X, labels):
+    """Davies-Bouldin index (menor = mejor)."""
+    X = np.asarray(X, dtype=float)
+    y, counts, centroids = _cluster_centroids(X, labels)
+    # S_i: distancia media de cada cluster a su centroide
+    dist_c = np.sqrt(np.sum((X - centroids[y])**2, axis=1))
+    S = np.bincount(y, weights=dist_c, minlength=len(counts)) / counts
+    M = np.sqrt(np.sum((centroids[:, None, :] - centroids[None, :, :])**2, axis=-1))
+    np.fill_diagonal(M, np.inf)
+    R = (S[:, None] + S[None, :]) / M
+    return float(R.max(axis=1).mean())
+
+
+def calinski_harabasz_score(X, labels):
+    """Calinski-Harabasz index (mayor = mejor)."""
+    X = np.asarray(X, dtype=float)
+    y, counts, centroids = _cluster_centroids(X, labels)
+    n, k = len(X), len(counts)
+    if k < 2:
+        return 0.0
+    between = float(counts @ np.sum((centroids - X.mean(axis=0))**2, axis=1))
+    within = float(np.sum((X - centroids[y])**2))
+    return between * (n - k) / (within * (k - 1)) if within > 0 else float('inf')
+
 print("\n--- Silhouette for different K ---")
 
 for k in [2, 3, 4, 5]:
@@ -229,6 +562,60 @@ for k in [2, 3, 4, 5]:
     print(f"  K={k}: silhouette={score:.4f}")
 
 
+print("\n--- Silhouette exacta por bloques vs bucle ---")
+
+# Semillas propias; se restaura el estado global despues
+estado_rng = np.random.get_state()
+rng_sil = np.random.default_rng(3)
+np.random.seed(3)
+km_sil = KMeans(k=3, n_init=2).fit(X_cluster)
+sub = rng_sil.choice(len(X_cluster), 300, replace=False)
+
+start = time.perf_counter()
+s_naive = silhouette_score_naive(X_cluster[sub], km_sil.labels[sub])
+t_naive = time.perf_counter() - start
+start = time.perf_counter()
+s_block = silhouette_score(X_cluster[sub], km_sil.labels[sub])
+t_block = time.perf_counter() - start
+print(f"  n=300: bucle {s_naive:.6f} ({t_naive:.3f}s) | bloques {s_block:.6f} ({t_block:.4f}s) "
+      f"→ {t_naive / t_block:.0f}x, diff={abs(s_naive - s_block):.1e}")
+
+centros_sil = rng_sil.uniform(-8, 8, (6, 8))
+y_sil = rng_sil.integers(0, 6, 6_000)
+X_sil = centros_sil[y_sil] + rng_sil.standard_normal((6_000, 8)) * 1.5
+
+start = time.perf_counter()
+s_exact = silhouette_score(X_sil, y_sil, memory_mb=64)
+t_exact = time.perf_counter() - start
+print(f"  n=6,000 exacta (64 MB por bloque): {s_exact:.4f} en {t_exact:.2f}s")
+print(f"    Bucle estimado: ~{t_naive / 300**2 * 6_000**2 * 2:.0f}s (O(n²·k) con mascaras)")
+
+start = time.perf_counter()
+s_est, (lo, hi) = silhouette_score_sampled(X_sil, y_sil, n_samples=1000, random_state=0)
+t_est = time.perf_counter() - start
+print(f"  Muestreo estratificado (1000): {s_est:.4f}, IC95=[{lo:.4f}, {hi:.4f}] "
+      f"en {t_est:.2f}s, contiene exacta: {lo <= s_exact <= hi}")
+
+
+print("\n--- Davies-Bouldin y Calinski-Harabasz para elegir K ---")
+
+print(f"  {'K':>3} {'silhouette':>11} {'DB (min)':>9} {'CH (max)':>10}")
+for k in range(2, 9):
+    np.random.seed(k)
+    lab = KMeans(k=k, n_init=2).fit(X_sil).labels
+    s_k, _ = silhouette_score_sampled(X_sil, lab, n_samples=1000, random_state=k)
+    print(f"  {k:>3} {s_k:>11.4f} {davies_bouldin_score(X_sil, lab):>9.4f} "
+          f"{calinski_harabasz_score(X_sil, lab):>10.1f}")
+print(f"  Clusters reales: 6")
+
+start = time.perf_counter()
+db_t = davies_bouldin_score(X_sil, y_sil)
+ch_t = calinski_harabasz_score(X_sil, y_sil)
+print(f"  DB + CH sobre 6,000 puntos: {(time.perf_counter() - start) * 1e3:.1f} ms "
+      f"(vs {t_exact:.2f}s silhouette exacta)")
+np.random.set_state(estado_rng)
+
+
 # =====================================================================
 #   PARTE 4: PCA
 # =====================================================================
@@ -249,17 +636,96 @@ Algoritmo:
 5. Proyectar datos.
 """
 
+def randomized_svd(X, n_components, n_oversamples=10, n_iter=4,
+                   mean=None, random_state=None, chunk_size=4_096):
+    """
+    SVD truncada aleatorizada (Halko, Martinsson & Tropp 2011).
+
+    1. Y = A @ Omega, Omega gaussiana (d, k + oversampling): Y captura el
+       rango dominante de A.
+    2. Power iterations (A A^T)^q Y, re-ortogonalizando con QR en cada paso,
+       separan los valores singulares cuando el espectro decae lento.
+    3. B = Q^T A es pequeña (l, d): su SVD exacta da la de A.
+
+    Coste O(n·d·l) por pasada en vez de O(d³). Con `mean`, A = X - mean se
+    centra por bloques de chunk_size filas: nunca se materializa X centrada
+    entera. (X @ M - mean @ M sería aún más barato pero, con offsets grandes
+    en float32, la resta cancela casi todos los digitos.)
+    Conserva el dtype de X (float32 → todo en float32).
+    """
+    rng = np.random.default_rng(random_state)
+    n, d = X.shape
+    l = min(n_components + n_oversamples, n, d)
+
+    def A_dot(M):                      # (X - mean) @ M
+        if mean is None:
+            return X @ M
+        out = np.empty((n, M.shape[1]), dtype=np.result_type(X, M))
+        for s in range(0, n, chunk_size):
+            out[s:s + chunk_size] = (X[s:s + chunk_size] - mean) @ M
+        return out
+
+    def At_dot(M):                     # (X - mean).T @ M
+        if mean is None:
+            return X.T @ M
+        out = np.zeros((d, M.shape[1]), dtype=np.result_type(X, M))
+        for s in range(0, n, chunk_size):
+            out += (X[s:s + chunk_size] - mean).T @ M[s:s + chunk_size]
+        return out
+
+    Omega = rng.standard_normal((d, l)).astype(X.dtype, copy=False)
+    Q, _ = np.linalg.qr(A_dot(Omega))
+    for _ in range(n_iter):
+        Q, _ = np.linalg.qr(At_dot(Q))
+        Q, _ = np.linalg.qr(A_dot(Q))
+
+    B = At_dot(Q).T                    # (l, d) = Q^T A
+    U_b, S, Vt = np.linalg.svd(B, full_matrices=False)
+    U = Q @ U_b
+    return U[:, :n_components], S[:n_components], Vt[:n_components]
+
+
+def _svd_flip(Vt, U=None):
+    """Signo deterministico: la mayor |componente| de cada fila de Vt es > 0."""
+    signs = np.sign(Vt[np.arange(len(Vt)), np.abs(Vt).argmax(axis=1)])
+    signs[signs == 0] = 1
+    Vt *= signs[:, None]
+    if U is not None:
+        U *= signs
+    return Vt, U
+
+
 class PCA:
-    """PCA from scratch."""
+    """
+    PCA from scratch.
+
+    svd_solver='full': covarianza + eigh, O(d³) y todo X en memoria.
+    svd_solver='randomized': randomized_svd sobre X centrada implicitamente,
+    O(n·d·k); es el camino para d grande (TF-IDF de 100K columnas).
+    dtype=np.float32 reduce a la mitad memoria y ancho de banda.
+    """
     
-    def __init__(self, n_components=2):
+    def __init__(self, n_components=2, svd_solver='full', n_oversamples=10,
+                 n_iter=4, random_state=None, dtype=None):
         self.n_components = n_components
+        self.svd_solver = svd_solver
+        self.n_oversamples = n_oversamples
+        self.n_iter = n_iter
+        self.random_state = random_state
+        self.dtype = dtype
         self.components = None
         self.mean = None
         self.explained_variance = None
         self.explained_variance_ratio = None
     
     def fit(self, X):
+        if self.dtype is not None:
+            X = np.asarray(X, dtype=self.dtype)
+        if self.svd_solver == 'randomized':
+            return self._fit_randomized(X)
+        if self.svd_solver != 'full':
+            raise ValueError(f"svd_solver debe ser 'full' o 'randomized', no {self.svd_solver!r}")
+
         self.mean = X.mean(axis=0)
         X_centered = X - self.mean
         
@@ -280,6 +746,25 @@ class PCA:
         
         return self
     
+    def _fit_randomized(self, X, chunk_size=4_096):
+        n = X.shape[0]
+        self.mean = X.mean(axis=0, dtype=np.float64).astype(X.dtype, copy=False)
+        _, S, Vt = randomized_svd(X, self.n_components, self.n_oversamples,
+                                  self.n_iter, mean=self.mean,
+                                  random_state=self.random_state,
+                                  chunk_size=chunk_size)
+        Vt, _ = _svd_flip(Vt)
+        # Varianza total = traza de la covarianza, sin formarla: O(n·d).
+        # Suma de (X - mean)² por bloques, acumulada en float64: la formula
+        # sum(x²) - n·mean² cancela catastroficamente con offsets grandes.
+        total_var = sum(float(np.einsum('ij,ij->', C, C, dtype=np.float64))
+                        for C in (X[s:s + chunk_size] - self.mean
+                                  for s in range(0, n, chunk_size))) / (n - 1)
+        self.components = Vt.T
+        self.explained_variance = S ** 2 / (n - 1)
+        self.explained_variance_ratio = self.explained_variance / total_var
+        return self
+    
     def transform(self, X):
         X_centered = X - self.mean
         return X_centered @ self.components
@@ -292,6 +777,79 @@ class PCA:
         return X_reduced @ self.components.T + self.mean
 
 
+class IncrementalPCA:
+    """
+    PCA por mini-batches (Ross et al. 2008): solo un batch en memoria.
+
+    partial_fit mantiene media/varianza por columna (Chan) y la SVD de un
+    resumen pequeño: [S·V^T previos; batch centrado; correccion de media].
+    Cada actualizacion es O(b·d·k) con b = filas del batch. Misma API que
+    PCA (components (d, k), transform, inverse_transform,
+    explained_variance_ratio).
+    """
+
+    def __init__(self, n_components=2, batch_size=None, dtype=None):
+        self.n_components = n_components
+        self.batch_size = batch_size
+        self.dtype = dtype
+        self.components = None
+        self.mean = None
+        self.var = None
+        self.singular_values = None
+        self.explained_variance = None
+        self.explained_variance_ratio = None
+        self.n_samples_seen = 0
+
+    def partial_fit(self, X):
+        X = np.asarray(X, dtype=self.dtype or X.dtype)
+        n_b = X.shape[0]
+        k = self.n_components
+        mean_b = X.mean(axis=0)
+        var_b = X.var(axis=0)
+
+        if self.n_samples_seen == 0:
+            if n_b < k:
+                raise ValueError(f"El primer batch necesita >= {k} filas")
+            self.mean, self.var = mean_b, var_b
+            resumen = X - mean_b
+        else:
+            n_a = self.n_samples_seen
+            n_t = n_a + n_b
+            delta = mean_b - self.mean
+            # Chan et al.: combinar media y varianza de dos particiones
+            self.var = (n_a * self.var + n_b * var_b + delta ** 2 * n_a * n_b / n_t) / n_t
+            correccion = np.sqrt(n_a * n_b / n_t) * (self.mean - mean_b)
+            self.mean = self.mean + delta * (n_b / n_t)
+            resumen = np.vstack([self.singular_values[:, None] * self.components.T,
+                                 X - mean_b, correccion[None, :]])
+
+        _, S, Vt = np.linalg.svd(resumen, full_matrices=False)
+        Vt, _ = _svd_flip(Vt)
+        self.n_samples_seen += n_b
+        n = self.n_samples_seen
+        self.singular_values = S[:k]
+        self.components = Vt[:k].T
+        self.explained_variance = S[:k] ** 2 / (n - 1)
+        self.explained_variance_ratio = S[:k] ** 2 / (self.var.sum() * n)
+        return self
+
+    def fit(self, X):
+        batch = self.batch_size or 5 * X.shape[1]
+        self.n_samples_seen = 0
+        for start in range(0, len(X), batch):
+            self.partial_fit(X[start:start + batch])
+        return self
+
+    def transform(self, X):
+        return (X - self.mean) @ self.components
+
+    def fit_transform(self, X):
+        return self.fit(X).transform(X)
+
+    def inverse_transform(self, X_reduced):
+        return X_reduced @ self.components.T + self.mean
+
+
 print("\n--- PCA en datos de alta dimension ---")
 
 np.random.seed(42)
@@ -317,6 +875,62 @@ print(f"\n  Reduced: {pca3.shape}")
 print(f"  Variance retained: {sum(PCA(3).fit(X_high).explained_variance_ratio):.4f}")
 
 
+print("\n--- PCA a escala: randomized SVD e IncrementalPCA ---")
+
+
+def similitud_subespacio(A, B):
+    """Cosenos de angulos principales entre subespacios (columnas); 1 = igual."""
+    Qa, _ = np.linalg.qr(A)
+    Qb, _ = np.linalg.qr(B)
+    return np.linalg.svd(Qa.T @ Qb, compute_uv=False).min()
+
+
+rng_pca = np.random.default_rng(0)
+pca_rand = PCA(n_components=3, svd_solver='randomized', random_state=0).fit(X_high)
+print(f"  Randomized vs full (10D): ratio {np.round(pca_rand.explained_variance_ratio, 4)}, "
+      f"subespacio cos_min={similitud_subespacio(pca_rand.components, PCA(3).fit(X_high).components):.6f}")
+
+# Matriz ancha estilo TF-IDF: rango efectivo bajo + ruido, float32
+n_wide, d_wide, k_wide = 1_200, 1_200, 10
+escalas = np.linspace(10, 3, k_wide)[:, None]
+X_wide = ((rng_pca.standard_normal((n_wide, k_wide)) @ (escalas * rng_pca.standard_normal((k_wide, d_wide))))
+          + rng_pca.standard_normal((n_wide, d_wide))).astype(np.float32)
+
+inicio = time.perf_counter()
+pca_full = PCA(n_components=k_wide).fit(X_wide.astype(np.float64))
+t_full = time.perf_counter() - inicio
+inicio = time.perf_counter()
+pca_r32 = PCA(n_components=k_wide, svd_solver='randomized', random_state=0,
+              dtype=np.float32).fit(X_wide)
+t_rand = time.perf_counter() - inicio
+print(f"  {n_wide:,} x {d_wide:,} (k={k_wide}):")
+print(f"    full (cov {d_wide}x{d_wide} float64 = {d_wide**2 * 8 / 1e6:.0f} MB + eigh): {t_full:.2f}s")
+print(f"    randomized float32 (sin cov, centrado por bloques): {t_rand:.2f}s → {t_full / t_rand:.0f}x")
+print(f"    varianza explicada: full={pca_full.explained_variance_ratio.sum():.4f}, "
+      f"randomized={pca_r32.explained_variance_ratio.sum():.4f}, "
+      f"cos_min={similitud_subespacio(pca_full.components, pca_r32.components.astype(np.float64)):.5f}")
+print(f"    dtype componentes: {pca_r32.components.dtype}, "
+      f"transform: {pca_r32.transform(X_wide[:5]).shape}")
+X_offset = X_wide[:, :500] + np.float32(1e4)     # features lejos de 0, en float32
+print(f"    offset 1e4 float32: ratio full={PCA(k_wide).fit(X_offset.astype(np.float64)).explained_variance_ratio.sum():.4f}, "
+      f"randomized={PCA(k_wide, svd_solver='randomized', random_state=0).fit(X_offset).explained_variance_ratio.sum():.4f}")
+print(f"    Con d=100K la covarianza ocuparia {100_000**2 * 8 / 1e9:.0f} GB: solo randomized es viable")
+
+# Streaming: los datos llegan en chunks de 1,000 filas
+X_stream = (rng_pca.standard_normal((50_000, 5)) @ rng_pca.standard_normal((5, 200))
+            + 0.1 * rng_pca.standard_normal((50_000, 200)))
+ipca = IncrementalPCA(n_components=5)
+for start in range(0, len(X_stream), 1_000):
+    ipca.partial_fit(X_stream[start:start + 1_000])
+pca_ref = PCA(n_components=5).fit(X_stream)
+recons = ipca.inverse_transform(ipca.transform(X_stream[:1_000]))
+print(f"  IncrementalPCA, 50 chunks de 1,000 x 200:")
+print(f"    ratio ipca={np.round(ipca.explained_variance_ratio, 4)}")
+print(f"    ratio full={np.round(pca_ref.explained_variance_ratio, 4)}")
+print(f"    subespacio cos_min={similitud_subespacio(ipca.components, pca_ref.components):.6f}, "
+      f"MSE reconstruccion={np.mean((X_stream[:1_000] - recons) ** 2):.4f}")
+
+
 # =====================================================================
 #   PARTE 5: ANOMALY DETECTION
 # =====================================================================
@@ -541,8 +1155,8 @@ Tipos de puntos:
   - Noise: ni core ni border.
 """
 
-class DBSCAN:
-    """DBSCAN from scratch."""
+class DBSCANSimple:
+    """DBSCAN from scratch (version didactica: O(N^2), una query por punto)."""
     
     def __init__(self, eps=0.5, min_samples=5):
         self.eps = eps
@@ -597,6 +1211,179 @@ class DBSCAN:
         distances = np.sqrt(np.sum((X - X[idx])**2, axis=1))
         return list(np.where(distances <= self.eps)[0])
 
+
+"""
+Problemas de DBSCANSimple a escala (ej: 200K pings GPS diarios):
+  - _region_query calcula la distancia a TODOS los puntos: O(N) por llamada,
+    O(N^2) en total.
+  - `n not in seed_set` busca en una LISTA: O(len(seed_set)) por vecino,
+    cuadratico otra vez dentro de cada cluster.
+
+Solucion:
+  1. Indice espacial. Los puntos se ordenan en un arbol binario donde cada
+     nodo guarda una cota de su region:
+       - KD-tree: caja alineada con los ejes (lo, hi). Muy eficaz en pocas
+         dimensiones (2D/3D: GPS, imagenes, embeddings reducidos).
+       - Ball tree: esfera (centro, radio). Se degrada menos al crecer d,
+         porque la cota no depende de cada eje por separado.
+     Si la distancia minima de una query a la region del nodo es > eps,
+     se descarta el subarbol entero.
+  2. Queries de radio EN LOTE: el recorrido baja por el arbol con TODAS
+     las queries a la vez (array de indices por nodo) y las cotas se
+     calculan vectorizadas. Resultado: vecindarios en formato CSR
+     (indptr, indices), como scipy.sparse.
+  3. Expansion con deque usando el array de etiquetas como bitmap de
+     visitados: cada punto entra como mucho una vez en la cola. O(1) por
+     comprobacion.
+"""
+
+
+class _ArbolEspacial(ABC):
+    """Arbol binario sobre un array de puntos (base comun de KD-tree y ball tree)."""
+    
+    def __init__(self, X, leaf_size=40):
+        self.X = np.ascontiguousarray(X, dtype=np.float64)
+        self.leaf_size = leaf_size
+        self.idx = np.arange(len(X))                     # permutacion de puntos
+        self.inicio, self.fin, self.hijos = [], [], []   # nodo -> rango en idx, (izq, der)
+        self._construir(0, len(X))
+        self.inicio = np.array(self.inicio)
+        self.fin = np.array(self.fin)
+        self._calcular_cotas()
+    
+    def _construir(self, inicio, fin):
+        nodo = len(self.inicio)
+        self.inicio.append(inicio)
+        self.fin.append(fin)
+        self.hijos.append(None)
+        if fin - inicio > self.leaf_size:
+            pts = self.X[self.idx[inicio:fin]]
+            dim = np.argmax(pts.max(axis=0) - pts.min(axis=0))   # eje de mayor extension
+            mitad = (fin - inicio) // 2
+            orden = np.argpartition(pts[:, dim], mitad)
+            self.idx[inicio:fin] = self.idx[inicio:fin][orden]
+            izq = self._construir(inicio, inicio + mitad)
+            der = self._construir(inicio + mitad, fin)
+            self.hijos[nodo] = (izq, der)
+        return nodo
+    
+    @abstractmethod
+    def _calcular_cotas(self):
+        """Cota geometrica (caja o esfera) de cada nodo, tras construir el arbol."""
+    
+    @abstractmethod
+    def _dist_min_sq(self, Q, nodo):
+        """Cota inferior de ||q - p||^2 para todo p del nodo (vectorizada sobre Q)."""
+    
+    def query_radius(self, Q, r):
+        """
+        Vecinos a distancia <= r de cada fila de Q, en lote.
+        Devuelve (indptr, indices) en formato CSR: vecinos de i = indices[indptr[i]:indptr[i+1]].
+        """
+        Q = np.asarray(Q, dtype=np.float64)
+        r_sq = r * r
+        pares_q, pares_p = [], []
+        pila = [(0, np.arange(len(Q)))]
+        while pila:
+            nodo, qs = pila.pop()
+            qs = qs[self._dist_min_sq(Q[qs], nodo) <= r_sq]
+            if len(qs) == 0:
+                continue
+            if self.hijos[nodo] is None:
+                puntos = self.idx[self.inicio[nodo]:self.fin[nodo]]
+                diff = Q[qs][:, None, :] - self.X[puntos][None, :, :]
+                fila, col = np.nonzero(np.einsum('ijk,ijk->ij', diff, diff) <= r_sq)
+                pares_q.append(qs[fila])
+                pares_p.append(puntos[col])
+            else:
+                pila.extend((hijo, qs) for hijo in self.hijos[nodo])
+        if not pares_q:
+            return np.zeros(len(Q) + 1, dtype=np.int64), np.empty(0, dtype=np.int64)
+        pares_q = np.concatenate(pares_q)
+        pares_p = np.concatenate(pares_p)
+        orden = np.lexsort((pares_p, pares_q))            # por query y luego por punto
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(pares_q, minlength=len(Q)))))
+        return indptr, pares_p[orden]
+
+
+class KDTree(_ArbolEspacial):
+    """KD-tree: cada nodo guarda su caja envolvente [lo, hi]."""
+    
+    def _calcular_cotas(self):
+        self.lo = np.array([self.X[self.idx[a:b]].min(axis=0) for a, b in zip(self.inicio, self.fin)])
+        self.hi = np.array([self.X[self.idx[a:b]].max(axis=0) for a, b in zip(self.inicio, self.fin)])
+    
+    def _dist_min_sq(self, Q, nodo):
+        fuera = np.maximum(self.lo[nodo] - Q, 0) + np.maximum(Q - self.hi[nodo], 0)
+        return np.einsum('ij,ij->i', fuera, fuera)
+
+
+class BallTree(_ArbolEspacial):
+    """Ball tree: cada nodo guarda una esfera (centroide, radio) que contiene sus puntos."""
+    
+    def _calcular_cotas(self):
+        self.centros = np.array([self.X[self.idx[a:b]].mean(axis=0) for a, b in zip(self.inicio, self.fin)])
+        self.radios = np.array([
+            np.sqrt(((self.X[self.idx[a:b]] - c) ** 2).sum(axis=1).max())
+            for a, b, c in zip(self.inicio, self.fin, self.centros)
+        ])
+    
+    def _dist_min_sq(self, Q, nodo):
+        diff = Q - self.centros[nodo]
+        d = np.sqrt(np.einsum('ij,ij->i', diff, diff)) - self.radios[nodo]
+        return np.maximum(d, 0) ** 2
+
+
+class DBSCAN:
+    """DBSCAN con indice espacial (KD-tree / ball tree) y queries de radio en lote."""
+    
+    def __init__(self, eps=0.5, min_samples=5, algorithm='auto', leaf_size=40):
+        self.eps = eps
+        self.min_samples = min_samples
+        self.algorithm = algorithm
+        self.leaf_size = leaf_size
+    
+    def _indice(self, X):
+        algorithm = self.algorithm
+        if algorithm == 'auto':
+            algorithm = 'kd_tree' if X.shape[1] <= 16 else 'ball_tree'
+        if algorithm == 'kd_tree':
+            return KDTree(X, self.leaf_size)
+        if algorithm == 'ball_tree':
+            return BallTree(X, self.leaf_size)
+        raise ValueError(f"algorithm desconocido: {algorithm}")
+    
+    def fit(self, X):
+        n = len(X)
+        # 1. Todos los vecindarios de una vez (CSR)
+        indptr, vecinos = self._indice(X).query_radius(X, self.eps)
+        es_core = np.diff(indptr) >= self.min_samples
+        
+        # 2. Expansion BFS: cada punto se etiqueta (y encola) una sola vez
+        # labels == -1 hace de bitmap de "no visitado": O(1) en vez de `in lista`
+        labels = np.full(n, -1)
+        cluster_id = 0
+        for i in range(n):
+            if labels[i] != -1 or not es_core[i]:
+                continue
+            labels[i] = cluster_id
+            cola = deque([i])
+            while cola:
+                q = cola.popleft()
+                if not es_core[q]:
+                    continue   # border: pertenece al cluster pero no lo expande
+                vecinos_q = vecinos[indptr[q]:indptr[q + 1]]
+                nuevos = vecinos_q[labels[vecinos_q] == -1]
+                labels[nuevos] = cluster_id
+                cola.extend(nuevos.tolist())
+            cluster_id += 1
+        
+        self.labels = labels
+        self.core_sample_mask = es_core
+        self.n_clusters = cluster_id
+        self.n_noise = np.sum(labels == -1)
+        return self
+
 print("\n--- DBSCAN fit ---")
 
 db = DBSCAN(eps=1.0, min_samples=5).fit(X_cluster)
@@ -605,6 +1392,37 @@ print(f"  Noise points: {db.n_noise}")
 for c in range(db.n_clusters):
     print(f"    Cluster {c}: {np.sum(db.labels == c)} points")
 
+db_simple = DBSCANSimple(eps=1.0, min_samples=5).fit(X_cluster)
+print(f"  Mismas etiquetas que DBSCANSimple: {np.array_equal(db.labels, db_simple.labels)}")
+db_ball = DBSCAN(eps=1.0, min_samples=5, algorithm='ball_tree').fit(X_cluster)
+print(f"  Mismas etiquetas con ball tree:    {np.array_equal(db.labels, db_ball.labels)}")
+
+print("\n--- DBSCAN scaling: simple vs KD-tree ---")
+
+def benchmark_dbscan(tamanos, eps=0.05, min_samples=10, max_simple=5_000):
+    """Tiempo de fit sobre pings sinteticos 2D (puntos calientes + ruido)."""
+    rng = np.random.default_rng(0)
+    for n in tamanos:
+        # Densidad constante: el area y el numero de puntos calientes crecen con N
+        lado, n_centros = np.sqrt(n / 1_000), max(1, n // 2_000)
+        centros = rng.uniform(0, lado, size=(n_centros, 2))
+        X_gps = np.vstack([
+            centros[rng.integers(0, n_centros, int(n * 0.9))] + 0.3 * rng.standard_normal((int(n * 0.9), 2)),
+            rng.uniform(0, lado, size=(n - int(n * 0.9), 2)),
+        ])
+        start = time.perf_counter()
+        modelo = DBSCAN(eps=eps, min_samples=min_samples).fit(X_gps)
+        t_kd = time.perf_counter() - start
+        linea = f"  N={n:>9,}: kd_tree {t_kd:7.2f}s ({modelo.n_clusters} clusters)"
+        if n <= max_simple:
+            start = time.perf_counter()
+            DBSCANSimple(eps=eps, min_samples=min_samples).fit(X_gps)
+            linea += f" | simple {time.perf_counter() - start:7.2f}s"
+        print(linea)
+
+# 1M pings: benchmark_dbscan([1_000_000]) (~25s con kd_tree; simple no termina)
+benchmark_dbscan([1_000, 2_000, 20_000, 100_000], max_simple=2_000)
+
 
 # =====================================================================
 #   PARTE 9: T-SNE CONCEPTUAL
@@ -769,17 +1587,17 @@ usar un mini-batch random.
 """
 
 class MiniBatchKMeans:
-    def __init__(self, k=3, batch_size=100, max_iter=100):
+    def __init__(self, k=3, batch_size=100, max_iter=100, chunk_size=65_536):
         self.k = k
         self.batch_size = batch_size
         self.max_iter = max_iter
+        self.chunk_size = chunk_size
         self.centroids = None
     
     def fit(self, X):
         n = len(X)
-        # Init with K-Means++
-        idx = np.random.choice(n, self.k, replace=False)
-        self.centroids = X[idx].copy()
+        # Init with K-Means++ (vectorizado, por bloques)
+        self.centroids = KMeans(self.k, chunk_size=self.chunk_size)._init_centroids(X).astype(float)
         counts = np.ones(self.k)
         
         for _ in range(self.max_iter):
@@ -787,23 +1605,23 @@ class MiniBatchKMeans:
             batch_idx = np.random.choice(n, min(self.batch_size, n), replace=False)
             batch = X[batch_idx]
             
-            # Assign
-            dists = np.array([np.sum((batch - c)**2, axis=1) for c in self.centroids])
-            labels = np.argmin(dists, axis=0)
+            # Assign: una GEMM en vez de k pasadas sobre el batch
+            labels = _sq_dists(batch, self.centroids).argmin(axis=1)
             
-            # Update
-            for k in range(self.k):
-                mask = labels == k
-                if mask.sum() > 0:
-                    counts[k] += mask.sum()
-                    lr = 1.0 / counts[k]
-                    self.centroids[k] = (1 - lr) * self.centroids[k] + lr * batch[mask].mean(axis=0)
+            # Update: medias por cluster del batch en una pasada
+            n_k = np.bincount(labels, minlength=self.k)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, labels, batch)
+            hay = n_k > 0
+            counts[hay] += n_k[hay]
+            lr = (1.0 / counts[hay])[:, None]
+            self.centroids[hay] = (1 - lr) * self.centroids[hay] + lr * sums[hay] / n_k[hay, None]
         
         # Final labels
-        dists = np.array([np.sum((X - c)**2, axis=1) for c in self.centroids])
-        self.labels = np.argmin(dists, axis=0)
-        self.inertia = sum(np.sum((X[self.labels == k] - self.centroids[k])**2)
-                          for k in range(self.k))
+        self.labels = _assign_chunked(X, self.centroids, self.chunk_size)[0]
+        self.inertia = sum(float(np.sum((X[s:s + self.chunk_size]
+                                         - self.centroids[self.labels[s:s + self.chunk_size]])**2))
+                           for s in range(0, n, self.chunk_size))
         return self
 
 start = time.perf_counter()
@@ -1009,13 +1827,19 @@ print("=" * 80)
 RESUMEN DE UNSUPERVISED:
 
 1. K-Means: simple, rapido, necesita K, asume clusters esfericos.
-2. K-Means++: mejor inicializacion.
+2. K-Means++: mejor inicializacion (vectorizada, O(n·k)).
+   Hamerly: cotas por desigualdad triangular, casi sin distancias tras las
+   primeras iteraciones; restarts en paralelo; float32 + chunks.
 3. Elbow + Silhouette: seleccionar K optimo.
+   Silhouette exacta por bloques (bincount, memoria acotada) o muestreo
+   estratificado con IC; Davies-Bouldin / Calinski-Harabasz en O(n·k).
 4. PCA: reduccion lineal, preservar varianza.
+   A escala: randomized SVD (Halko) o IncrementalPCA.partial_fit por chunks.
 5. Anomaly: Z-score, Mahalanobis, Isolation Forest.
 6. GMM: soft clustering, probabilistico.
 7. Hierarchical: dendrogram, no necesita K a priori.
 8. DBSCAN: density-based, detecta outliers, forma arbitraria.
+   A escala: KD-tree/ball tree + queries de radio en lote, nunca O(N^2).
 
 FIN DEL MODULO 13: ML FUNDAMENTOS.
 """
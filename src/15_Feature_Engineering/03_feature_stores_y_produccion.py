@@ -31,12 +31,17 @@
 # ===========================================================================
 
 import numpy as np
+import os
+import sys
 import time
 import json
+import pickle
 import hashlib
+import threading
 from datetime import datetime, timedelta
-from collections import OrderedDict
+from collections import Counter, OrderedDict, deque
 from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -46,6 +51,12 @@ try:
 except ImportError:
     HAS_PANDAS = False
 
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
 try:
     from sklearn.preprocessing import StandardScaler, MinMaxScaler
     from sklearn.model_selection import train_test_split
@@ -150,9 +161,13 @@ class FeatureDefinition:
         self.version = 1
         self._history: List[Dict] = []
 
-    def compute(self, data: Any) -> Any:
-        """Ejecuta la funcion de calculo sobre los datos."""
-        result = self.compute_fn(data)
+    def compute(self, data: Any, upstream: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Ejecuta la funcion de calculo sobre los datos. Las features con
+        dependencias reciben ademas los resultados de sus upstream:
+        compute_fn(data, upstream).
+        """
+        result = self.compute_fn(data) if upstream is None else self.compute_fn(data, upstream)
         self._history.append({
             'timestamp': datetime.now(),
             'n_records': len(result) if hasattr(result, '__len__') else 1,
@@ -188,6 +203,181 @@ class FeatureDefinition:
         return f"Feature({self.name}, v{self.version}, {self.dtype})"
 
 
+def _hash_into(h, obj: Any) -> None:
+    """Alimenta el hasher con el CONTENIDO de obj (buffers, no repr por fila)."""
+    if HAS_PANDAS and isinstance(obj, pd.DataFrame):
+        h.update(repr((list(obj.columns), obj.shape)).encode())
+        _hash_into(h, obj.index)
+        for col in obj.columns:
+            _hash_into(h, obj[col])
+    elif HAS_PANDAS and isinstance(obj, pd.Series):
+        h.update(repr((obj.name, str(obj.dtype))).encode())
+        _hash_into(h, obj.index)
+        if isinstance(obj.dtype, pd.CategoricalDtype):
+            _hash_into(h, obj.cat.codes.to_numpy())
+            _hash_into(h, obj.cat.categories.to_numpy())
+        else:
+            _hash_into(h, obj.to_numpy())
+    elif HAS_PANDAS and isinstance(obj, pd.RangeIndex):
+        h.update(repr(('range', obj.start, obj.stop, obj.step)).encode())
+    elif HAS_PANDAS and isinstance(obj, pd.Index):
+        _hash_into(h, obj.to_numpy())
+    elif isinstance(obj, np.ndarray):
+        h.update(repr((obj.dtype.str, obj.shape)).encode())
+        if obj.dtype == object:
+            # Objetos Python: hash vectorizado de pandas si esta disponible
+            valores = (pd.util.hash_array(obj.ravel()) if HAS_PANDAS
+                       else np.array([hash(v) for v in obj.ravel()]))
+            h.update(valores.tobytes())
+        else:
+            h.update(memoryview(np.ascontiguousarray(obj)).cast('B'))
+    else:
+        h.update(repr(obj).encode())
+
+
+def fingerprint_data(data: Any) -> str:
+    """
+    Huella del contenido de data: xxh3-128 si esta instalado (~10 GB/s);
+    si no, sha256 (acelerado por hardware en CPUs modernas, ~1 GB/s).
+    """
+    h = xxhash.xxh3_128() if HAS_XXHASH else hashlib.sha256()
+    _hash_into(h, data)
+    return h.hexdigest()
+
+
+class FeatureCache:
+    """
+    Cache LRU con presupuesto de entradas y de bytes, y un tier opcional
+    en disco (Parquet para pandas, .npy para arrays). Lo que sale de
+    memoria por el presupuesto se escribe a disco en vez de perderse.
+    El disco tiene su propio presupuesto LRU (entradas y bytes en disco):
+    al superarlo se borran los ficheros menos usados.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 256 * 2**20,
+                 disk_dir: Optional[str] = None, max_disk_entries: int = 4096,
+                 max_disk_bytes: int = 4 * 2**30):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max_disk_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._mem: OrderedDict = OrderedDict()    # key -> (valor, nbytes)
+        self._disk: OrderedDict = OrderedDict()   # key -> (path, bytes en disco)
+        self._bytes = 0
+        self._disk_bytes = 0
+        self.stats = Counter()
+        self._lock = threading.RLock()           # compute_batch calcula en paralelo
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def _nbytes(value: Any) -> int:
+        if HAS_PANDAS and isinstance(value, (pd.Series, pd.DataFrame)):
+            return int(np.sum(value.memory_usage(index=True, deep=False)))
+        if isinstance(value, np.ndarray):
+            return value.nbytes
+        return sys.getsizeof(value)
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key: Tuple) -> Tuple[bool, Any]:
+        if key in self._mem:
+            self._mem.move_to_end(key)
+            self.stats['memory_hits'] += 1
+            return True, self._mem[key][0]
+        if key in self._disk:
+            self._disk.move_to_end(key)
+            value = self._load(self._disk[key][0])
+            self.stats['disk_hits'] += 1
+            self._put(key, value)                # promover de vuelta a memoria
+            return True, value
+        self.stats['misses'] += 1
+        return False, None
+
+    def put(self, key: Tuple, value: Any):
+        with self._lock:
+            self._put(key, value)
+
+    def _put(self, key: Tuple, value: Any):
+        if key in self._mem:
+            self._bytes -= self._mem.pop(key)[1]
+        nbytes = self._nbytes(value)
+        self._mem[key] = (value, nbytes)
+        self._bytes += nbytes
+        while self._mem and (len(self._mem) > self.max_entries or self._bytes > self.max_bytes):
+            old_key, (old_value, old_bytes) = self._mem.popitem(last=False)
+            self._bytes -= old_bytes
+            self.stats['evictions'] += 1
+            if self.disk_dir and old_key not in self._disk:
+                path = self._spill(old_key, old_value)
+                self._disk[old_key] = (path, os.path.getsize(path))
+                self._disk_bytes += self._disk[old_key][1]
+                self._evict_disk()
+
+    def _evict_disk(self):
+        while self._disk and (len(self._disk) > self.max_disk_entries
+                              or self._disk_bytes > self.max_disk_bytes):
+            _, (path, size) = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.stats['disk_evictions'] += 1
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _spill(self, key: Tuple, value: Any) -> str:
+        base = os.path.join(self.disk_dir, hashlib.blake2b(repr(key).encode(),
+                                                           digest_size=12).hexdigest())
+        if isinstance(value, np.ndarray):
+            np.save(base + '.npy', value, allow_pickle=False)
+            return base + '.npy'
+        if HAS_PANDAS and isinstance(value, (pd.Series, pd.DataFrame)):
+            frame = value.to_frame() if isinstance(value, pd.Series) else value
+            try:
+                frame.to_parquet(base + '.parquet')
+                return base + '.parquet'
+            except (ImportError, ValueError):
+                pass  # sin pyarrow/fastparquet (o columnas no-str): pickle
+        with open(base + '.pkl', 'wb') as fh:
+            pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        return base + '.pkl'
+
+    @staticmethod
+    def _load(path: str) -> Any:
+        if path.endswith('.npy'):
+            return np.load(path)
+        if path.endswith('.parquet'):
+            frame = pd.read_parquet(path)
+            return frame.iloc[:, 0] if frame.shape[1] == 1 else frame
+        with open(path, 'rb') as fh:
+            return pickle.load(fh)
+
+    def invalidate(self, predicate: Callable[[Tuple], bool]):
+        with self._lock:
+            for key in [k for k in self._mem if predicate(k)]:
+                self._bytes -= self._mem.pop(key)[1]
+            for key in [k for k in self._disk if predicate(k)]:
+                path, size = self._disk.pop(key)
+                self._disk_bytes -= size
+                os.remove(path)
+
+    def clear(self):
+        self.invalidate(lambda k: True)
+
+    def __len__(self):
+        return len(self._mem) + len(self._disk)
+
+    def __contains__(self, key):
+        return key in self._mem or key in self._disk
+
+    def info(self) -> Dict:
+        return {'memory_entries': len(self._mem), 'disk_entries': len(self._disk),
+                'memory_bytes': self._bytes, 'disk_bytes': self._disk_bytes, **self.stats}
+
+
 class FeatureStore:
     """
     Feature Store en memoria.
@@ -200,12 +390,22 @@ class FeatureStore:
     5. Proveer lineage (quien uso que).
     """
 
-    def __init__(self, name: str = "default"):
+    def __init__(self, name: str = "default", max_cache_entries: int = 256,
+                 max_cache_bytes: int = 256 * 2**20, cache_dir: Optional[str] = None,
+                 max_disk_entries: int = 4096, max_disk_bytes: int = 4 * 2**30,
+                 access_log_size: int = 10_000):
         self.name = name
         self._features: Dict[str, FeatureDefinition] = {}
-        self._cache: Dict[str, Any] = {}
-        self._access_log: List[Dict] = []
+        # Clave: (feature, version, huella de los datos) → nunca sirve
+        # resultados calculados sobre OTRO dataset.
+        self._cache = FeatureCache(max_cache_entries, max_cache_bytes, cache_dir,
+                                   max_disk_entries, max_disk_bytes)
+        self._access_log = deque(maxlen=access_log_size)   # ultimos N accesos
+        self._access_counts = Counter()                    # (feature, action) -> total
         self._validators: Dict[str, List[Callable]] = {}
+        self._dependencies: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self.last_timings: List[Dict] = []
 
     def register(self, feature_def: FeatureDefinition) -> None:
         """Registra una feature en el store."""
@@ -218,27 +418,42 @@ class FeatureStore:
 
     def register_quick(self, name: str, compute_fn: Callable,
                        dtype: str = "float64", description: str = "",
-                       owner: str = "unknown") -> FeatureDefinition:
+                       owner: str = "unknown",
+                       depends_on: Optional[List[str]] = None) -> FeatureDefinition:
         """Atajo para registrar features rapidamente."""
         feat = FeatureDefinition(name, dtype, compute_fn, description, owner)
         self.register(feat)
+        if depends_on:
+            self._dependencies[name] = list(depends_on)
         return feat
 
     def compute(self, feature_name: str, data: Any,
-                use_cache: bool = True) -> Any:
-        """Computa una feature, opcionalmente usando cache."""
+                use_cache: bool = True, fingerprint: Optional[str] = None,
+                upstream: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Computa una feature, opcionalmente usando cache. `fingerprint` permite
+        reutilizar la huella de `data` ya calculada (ver compute_batch).
+        """
+        # upstream viene del DAG executor (que puede incluir deps del registry)
+        deps = list(upstream) if upstream is not None else self._dependencies.get(feature_name)
+        if deps and upstream is None:
+            # Llamada directa a una feature derivada: resolver su sub-DAG
+            upstream = self.compute_batch(deps, data, use_cache)
         if feature_name not in self._features:
             raise KeyError(f"Feature '{feature_name}' no registrada. "
                            f"Disponibles: {self.list_features()}")
 
-        cache_key = f"{feature_name}_v{self._features[feature_name].version}"
-
-        if use_cache and cache_key in self._cache:
-            self._log_access(feature_name, "cache_hit")
-            return self._cache[cache_key]
+        if use_cache:
+            cache_key = (feature_name, self._features[feature_name].version,
+                         fingerprint or fingerprint_data(data),
+                         tuple((d, self._features[d].version) for d in deps or ()))
+            hit, cached = self._cache.get(cache_key)
+            if hit:
+                self._log_access(feature_name, "cache_hit")
+                return cached
 
         feat = self._features[feature_name]
-        result = feat.compute(data)
+        result = feat.compute(data, {d: upstream[d] for d in deps} if deps else None)
 
         # Validar si hay validators registrados
         if feature_name in self._validators:
@@ -246,17 +461,24 @@ class FeatureStore:
                 validator(result, feature_name)
 
         if use_cache:
-            self._cache[cache_key] = result
+            self._cache.put(cache_key, result)
 
         self._log_access(feature_name, "computed")
         return result
 
     def compute_batch(self, feature_names: List[str], data: Any,
-                      use_cache: bool = True) -> Dict[str, Any]:
-        """Computa multiples features de una vez."""
-        results = {}
-        for name in feature_names:
-            results[name] = self.compute(name, data, use_cache)
+                      use_cache: bool = True, max_workers: int = 4,
+                      registry: Optional['FeatureRegistry'] = None,
+                      on_computed: Optional[Callable[[str, Any], None]] = None
+                      ) -> Dict[str, Any]:
+        """
+        Computa multiples features respetando sus dependencias (DAG): las
+        independientes en paralelo, cada intermedio una sola vez, y la
+        huella de data calculada una vez. Timing por nodo en last_timings.
+        """
+        executor = FeatureDAGExecutor(self, registry, max_workers)
+        results = executor.run(feature_names, data, use_cache, on_computed)
+        self.last_timings = executor.timings
         return results
 
     def add_validator(self, feature_name: str, validator_fn: Callable):
@@ -279,18 +501,26 @@ class FeatureStore:
                 if log['feature'] == feature_name]
 
     def _log_access(self, feature_name: str, action: str):
+        with self._lock:
+            self._access_counts[(feature_name, action)] += 1
         self._access_log.append({
             'feature': feature_name,
             'action': action,
             'timestamp': datetime.now(),
         })
 
+    def access_counts(self, feature_name: str = None) -> Dict[str, int]:
+        """Contadores agregados por accion (no se pierden al rotar el log)."""
+        counts = Counter()
+        for (feat, action), n in self._access_counts.items():
+            if feature_name is None or feat == feature_name:
+                counts[action] += n
+        return dict(counts)
+
     def invalidate_cache(self, feature_name: str = None):
         """Invalida cache de una feature o todas."""
         if feature_name:
-            keys = [k for k in self._cache if k.startswith(feature_name)]
-            for k in keys:
-                del self._cache[k]
+            self._cache.invalidate(lambda key: key[0] == feature_name)
         else:
             self._cache.clear()
 
@@ -299,13 +529,120 @@ class FeatureStore:
         print(f"\n  Feature Store: '{self.name}'")
         print(f"  Features registradas: {len(self._features)}")
         print(f"  Cache entries: {len(self._cache)}")
-        print(f"  Total accesos: {len(self._access_log)}")
+        print(f"  Total accesos: {sum(self._access_counts.values())}")
         for name, feat in self._features.items():
             meta = feat.get_metadata()
             print(f"    - {name} (v{meta['version']}, {meta['dtype']}, "
                   f"computed {meta['n_computations']}x) [{meta['owner']}]")
 
 
+class FeatureDAGExecutor:
+    """
+    Ejecuta un conjunto de features como DAG de dependencias.
+
+    - Las dependencias salen del store (register_quick(depends_on=...)) y,
+      si se pasa, del FeatureRegistry (add_dependency). Las del registry son
+      de linaje: solo ordenan la ejecucion; upstream se pasa unicamente a
+      las features registradas con depends_on.
+    - Orden topologico (Kahn): cada nodo se lanza en el pool en cuanto
+      terminan sus upstream, asi las ramas independientes corren a la vez.
+    - Cada intermedio se calcula UNA vez por ejecucion y se pasa a todos
+      sus consumidores.
+    - `on_computed(name, valor)` corre en la MISMA tarea que el calculo
+      (p.ej. validacion + drift), sin otra pasada sobre los resultados.
+      Solo se llama para las features pedidas (no para intermedios) y
+      desde los hilos del pool: debe ser thread-safe.
+    """
+
+    def __init__(self, store: 'FeatureStore', registry: Optional['FeatureRegistry'] = None,
+                 max_workers: int = 4):
+        self.store = store
+        self.max_workers = max_workers
+        # inputs: lo que compute_fn(data, upstream) recibe
+        self.inputs = dict(store._dependencies)
+        # dependencies: aristas de orden (inputs + linaje del registry)
+        self.dependencies = {n: list(d) for n, d in self.inputs.items()}
+        if registry is not None:
+            for nodo, deps in registry._dependencies.items():
+                orden = self.dependencies.setdefault(nodo, [])
+                orden.extend(d for d in deps if d in store._features and d not in orden)
+        self.timings: List[Dict] = []
+
+    def plan(self, feature_names: List[str]) -> List[str]:
+        """Cierre de dependencias de feature_names en orden topologico."""
+        nodos, pendientes = set(), list(feature_names)
+        while pendientes:
+            nodo = pendientes.pop()
+            if nodo not in nodos:
+                nodos.add(nodo)
+                pendientes.extend(self.dependencies.get(nodo, []))
+        grado = {n: len(self.dependencies.get(n, [])) for n in nodos}
+        orden = [n for n in sorted(nodos) if grado[n] == 0]
+        for nodo in orden:                       # la lista crece mientras se recorre
+            for hijo in sorted(nodos):
+                if nodo in self.dependencies.get(hijo, []):
+                    grado[hijo] -= 1
+                    if grado[hijo] == 0:
+                        orden.append(hijo)
+        if len(orden) != len(nodos):
+            raise ValueError(f"Ciclo de dependencias entre: {sorted(set(nodos) - set(orden))}")
+        return orden
+
+    def run(self, feature_names: List[str], data: Any, use_cache: bool = True,
+            on_computed: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+        orden = self.plan(feature_names)
+        pedidas = set(feature_names)
+        fingerprint = fingerprint_data(data) if use_cache else None
+        hijos: Dict[str, List[str]] = {n: [] for n in orden}
+        faltan = {}
+        for nodo in orden:
+            deps = self.dependencies.get(nodo, [])
+            faltan[nodo] = len(deps)
+            for d in deps:
+                hijos[d].append(nodo)
+
+        resultados: Dict[str, Any] = {}
+        t0 = time.perf_counter()
+
+        def tarea(nodo: str):
+            inicio = time.perf_counter()
+            upstream = {d: resultados[d] for d in self.inputs.get(nodo, [])}
+            valor = self.store.compute(nodo, data, use_cache, fingerprint,
+                                       upstream if upstream else None)
+            fin_compute = time.perf_counter()
+            if on_computed is not None and nodo in pedidas:
+                on_computed(nodo, valor)
+            fin = time.perf_counter()
+            self.timings.append({
+                'feature': nodo, 'thread': threading.current_thread().name,
+                'start_ms': (inicio - t0) * 1000, 'compute_ms': (fin_compute - inicio) * 1000,
+                'hooks_ms': (fin - fin_compute) * 1000,
+            })
+            return nodo, valor
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            en_vuelo = {pool.submit(tarea, n) for n in orden if faltan[n] == 0}
+            while en_vuelo:
+                hechas, en_vuelo = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                for futuro in hechas:
+                    nodo, valor = futuro.result()      # propaga excepciones del nodo
+                    resultados[nodo] = valor
+                    for hijo in hijos[nodo]:
+                        faltan[hijo] -= 1
+                        if faltan[hijo] == 0:
+                            en_vuelo.add(pool.submit(tarea, hijo))
+
+        return {n: resultados[n] for n in feature_names}
+
+    def export_chrome_trace(self, path: str):
+        """Timing por nodo en formato chrome://tracing / Perfetto."""
+        eventos = [{'name': t['feature'], 'ph': 'X', 'pid': 0, 'tid': t['thread'],
+                    'ts': t['start_ms'] * 1000, 'dur': (t['compute_ms'] + t['hooks_ms']) * 1000}
+                   for t in self.timings]
+        with open(path, 'w') as fh:
+            json.dump({'traceEvents': eventos}, fh)
+
+
 # --- Demo del Feature Store ---
 
 print("\n--- Construyendo Feature Store ---")
@@ -343,7 +680,7 @@ if HAS_PANDAS:
         owner="data_team"
     )
 
-    store.register_quick(
+    income_log = store.register_quick(
         name="income_log",
         compute_fn=lambda df: np.log1p(df['income']),
         dtype="float64",
@@ -378,6 +715,51 @@ if HAS_PANDAS:
     features_cached = store.compute('avg_order_value', df_customers)
     print(f"  Segunda llamada usa cache (sin recomputar)")
 
+    # La clave incluye la huella de los datos: otro dataset NO reutiliza el resultado
+    df_otro = df_customers.copy()
+    df_otro.loc[0, 'total_spent'] += 1.0                  # un solo valor distinto
+    features_otro = store.compute('avg_order_value', df_otro)
+    print(f"  Dataset modificado en 1 celda → recalcula: "
+          f"{features_otro.iloc[0] != features_cached.iloc[0]}")
+    print(f"  Accesos avg_order_value: {store.access_counts('avg_order_value')}")
+
+    # Presupuesto de bytes + tier en disco
+    import tempfile
+    with tempfile.TemporaryDirectory(prefix="feature_cache_") as cache_dir:
+        store_small = FeatureStore("budget", max_cache_bytes=10_000,
+                                   cache_dir=os.path.join(cache_dir, "budget"))
+        store_small.register(income_log)
+        for n_rows in (500, 600, 700, 500):            # el primero se re-pide al final
+            store_small.compute('income_log', df_customers.head(n_rows))
+        print(f"  Cache con 10KB de presupuesto: {store_small._cache.info()}")
+        # El disco tambien esta acotado: con 2 entradas max se borran los .npy/.parquet viejos
+        dir_lru = os.path.join(cache_dir, "lru")
+        store_disk = FeatureStore("disk_budget", max_cache_entries=1, cache_dir=dir_lru,
+                                  max_disk_entries=2)
+        store_disk.register(income_log)
+        for n_rows in (100, 200, 300, 400, 500):
+            store_disk.compute('income_log', df_customers.head(n_rows))
+        info_disk = store_disk._cache.info()
+        print(f"  Disco con max 2 entradas: disk_entries={info_disk['disk_entries']}, "
+              f"disk_evictions={info_disk['disk_evictions']}, "
+              f"ficheros={len(os.listdir(dir_lru))}")
+
+    # Coste de la huella frente al calculo
+    df_grande = pd.DataFrame(np.random.rand(1_000_000, 6),
+                             columns=['income', 'n_purchases', 'total_spent',
+                                      'days_since_last', 'age', 'is_premium'])
+    inicio = time.perf_counter()
+    fingerprint_data(df_grande)
+    t_huella = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    income_log.compute_fn(df_grande)
+    t_calculo = time.perf_counter() - inicio
+    print(f"  Huella de 1M x 6 ({'xxh3' if HAS_XXHASH else 'sha256'}): {t_huella*1000:.1f}ms "
+          f"vs calculo income_log: {t_calculo*1000:.1f}ms")
+    # Para features baratas la huella cuesta mas que recalcular: compute_batch la
+    # calcula UNA vez para todas las features del mismo dataset, y features
+    # triviales pueden registrarse con use_cache=False.
+
     store.summary()
 
 
@@ -512,6 +894,78 @@ print(f"\n  Features sin usar: {registry.get_unused_features()}")
 registry.summary()
 
 
+# --- DAG de features: dependencias del registry → ejecucion ---
+print("\n--- DAG executor: dependencias del registry ---")
+
+if HAS_PANDAS:
+    # clv_score consume avg_order_value y purchase_frequency (depends_on);
+    # el registry documenta el mismo linaje con add_dependency
+    store.register_quick(
+        name="clv_score",
+        compute_fn=lambda df, up: up['avg_order_value'] * up['purchase_frequency'] * 12,
+        description="Customer lifetime value aproximado", owner="ml_team",
+        depends_on=['avg_order_value', 'purchase_frequency']
+    )
+    dag = FeatureDAGExecutor(store, registry)
+    print(f"  Plan topologico: {dag.plan(['clv_score', 'income_log'])}")
+    clv = store.compute_batch(['clv_score', 'income_log'], df_customers, registry=registry)
+    print(f"  clv_score: mean={clv['clv_score'].mean():.2f}")
+    for t_nodo in sorted(store.last_timings, key=lambda x: x['start_ms']):
+        print(f"    {t_nodo['feature']:<20} start={t_nodo['start_ms']:6.2f}ms "
+              f"compute={t_nodo['compute_ms']:6.2f}ms [{t_nodo['thread']}]")
+    # Aristas de linaje (add_dependency) solo ordenan: customer_segment sigue
+    # siendo compute_fn(data) aunque el registry lo haga depender de otra feature
+    seg = store.compute_batch(['customer_segment'], df_customers, registry=registry)
+    print(f"  customer_segment con linaje del registry: "
+          f"{pd.Series(seg['customer_segment']).value_counts().sort_index().to_dict()}")
+
+    # Intermedio caro compartido por 4 features: secuencial ingenuo vs DAG
+    n_filas = 2_000_000
+    df_eventos = pd.DataFrame({'customer_id': np.random.randint(0, 50_000, n_filas),
+                               'amount': np.random.lognormal(3, 1, n_filas)})
+    conteo = Counter()
+
+    def totales_por_cliente(df):
+        conteo['totales'] += 1
+        return df.groupby('customer_id')['amount'].agg(['sum', 'count', 'max'])
+
+    dag_store = FeatureStore("dag_bench")
+    dag_store.register_quick('totales', totales_por_cliente, dtype='frame')
+    derivadas = {
+        'gasto_total': lambda df, up: up['totales']['sum'],
+        'ticket_medio': lambda df, up: up['totales']['sum'] / up['totales']['count'],
+        'ticket_max': lambda df, up: up['totales']['max'],
+        'gasto_log': lambda df, up: np.log1p(up['totales']['sum']),
+    }
+    for nombre, fn in derivadas.items():
+        dag_store.register_quick(nombre, fn, depends_on=['totales'])
+
+    inicio = time.perf_counter()
+    for fn in derivadas.values():                   # cada feature recalcula su intermedio
+        fn(df_eventos, {'totales': totales_por_cliente(df_eventos)})
+    t_ingenuo = time.perf_counter() - inicio
+
+    conteo.clear()
+    inicio = time.perf_counter()
+    dag_store.compute_batch(list(derivadas), df_eventos, use_cache=False)
+    t_dag = time.perf_counter() - inicio
+    print(f"\n  4 features sobre un groupby de {n_filas:,} filas:")
+    print(f"    Secuencial ingenuo: {t_ingenuo:.2f}s (intermedio calculado 4 veces)")
+    print(f"    DAG executor:       {t_dag:.2f}s (intermedio calculado {conteo['totales']} vez)")
+
+    import tempfile
+    dag_bench = FeatureDAGExecutor(dag_store, max_workers=4)
+    hooks = []                                      # list.append es thread-safe
+    dag_bench.run(list(derivadas), df_eventos, use_cache=False,
+                  on_computed=lambda nombre, valor: hooks.append(nombre))
+    with tempfile.TemporaryDirectory() as dir_traza:
+        traza = os.path.join(dir_traza, 'features_trace.json')
+        dag_bench.export_chrome_trace(traza)
+        print(f"    Traza por nodo (chrome://tracing): {len(dag_bench.timings)} eventos en "
+              f"{os.path.basename(traza)}")
+    print(f"    on_computed solo en las pedidas (no en 'totales'): {sorted(hooks)}")
+
+
 # =====================================================================
 #   PARTE 4: VERSIONADO DE FEATURES
 # =====================================================================
@@ -945,6 +1399,8 @@ class PointInTimeFeatureComputer:
 
     def __init__(self):
         self._feature_fns: Dict[str, Callable] = {}
+        self._windows: Dict[str, Tuple[pd.Timedelta, str, Optional[str]]] = {}
+        self._events = None
 
     def register(self, name: str, compute_fn: Callable):
         """
@@ -958,6 +1414,112 @@ class PointInTimeFeatureComputer:
         """Computa una feature con datos hasta cutoff_date."""
         return self._feature_fns[feature_name](data, cutoff_date)
 
+    # -- Modo bulk: as-of join vectorizado ----------------------------
+
+    def register_window(self, name: str, window: timedelta, agg: str = 'count',
+                        value_col: Optional[str] = None):
+        """
+        Agregado en ventana [cutoff - window, cutoff): 'count', 'sum' o 'mean'
+        de value_col. Se calcula para TODAS las filas de labels a la vez.
+        """
+        if agg not in ('count', 'sum', 'mean'):
+            raise ValueError(f"agg debe ser count/sum/mean, no {agg!r}")
+        if agg != 'count' and value_col is None:
+            raise ValueError(f"agg={agg!r} necesita value_col")
+        self._windows[name] = (pd.Timedelta(window), agg, value_col)
+
+    def set_events(self, events: pd.DataFrame, entity_col: str, ts_col: str):
+        """
+        Ordena los eventos UNA vez por (entidad, timestamp). Las sumas
+        acumuladas de cada columna de valor se construyen al primer uso en
+        compute_as_of (y se reutilizan): cualquier ventana se resuelve como
+        diferencia de dos prefijos. register_window puede llamarse antes o
+        despues de set_events.
+
+        Las columnas numericas se copian ya ordenadas: mutar `events`
+        despues no cambia los features calculados.
+        """
+        codes, entidades = pd.factorize(events[entity_col], sort=True)
+        ts = events[ts_col].to_numpy(dtype='datetime64[ns]')
+        orden = np.lexsort((ts, codes))
+        self._events = {
+            'entidades': pd.Index(entidades),
+            'codes': codes[orden],
+            'ts': ts[orden],
+            'valores': {col: events[col].to_numpy(float)[orden]
+                        for col in events.select_dtypes('number').columns
+                        if col not in (entity_col, ts_col)},
+            'prefijos': {},
+        }
+
+    def _prefijo(self, col: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (suma, n) acumulados de los i primeros eventos ordenados, con
+        prefijo[0] = 0. Los NaN suman 0 y no cuentan en n: un valor nulo
+        no envenena la suma de todas las entidades que vienen detras.
+        """
+        ev = self._events
+        if col not in ev['prefijos']:
+            if col not in ev['valores']:
+                raise KeyError(f"value_col {col!r} no es una columna numerica de los eventos")
+            valores = ev['valores'][col]
+            ev['prefijos'][col] = (
+                np.concatenate([[0.0], np.cumsum(np.nan_to_num(valores, nan=0.0))]),
+                np.concatenate([[0], np.cumsum(~np.isnan(valores))]),
+            )
+        return ev['prefijos'][col]
+
+    def compute_as_of(self, labels_df: pd.DataFrame, entity_col: str,
+                      ts_col: str) -> pd.DataFrame:
+        """
+        Matriz de features para cada fila (entidad, cutoff) de labels_df,
+        usando SOLO eventos con timestamp < cutoff (sin leakage).
+
+        Claves enteras exactas: los tiempos de evento se mapean al rango de
+        los tiempos de consulta (2i = consulta i, impar = entre dos consultas),
+        asi (entidad, tiempo) cabe en un int64 y un searchsorted resuelve
+        todas las filas: count = pos(cutoff) - pos(cutoff - window).
+        """
+        ev = self._events
+        if ev is None:
+            raise RuntimeError("Llama a set_events() antes de compute_as_of()")
+
+        label_codes = ev['entidades'].get_indexer(labels_df[entity_col])
+        cutoffs = labels_df[ts_col].to_numpy(dtype='datetime64[ns]')
+        consultas = {name: cutoffs - np.timedelta64(w.value, 'ns')
+                     for name, (w, _, _) in self._windows.items()}
+        tiempos_q = np.unique(np.concatenate([cutoffs, *consultas.values()]))
+
+        idx = np.searchsorted(tiempos_q, ev['ts'], side='left')
+        exacto = (idx < len(tiempos_q)) & (tiempos_q[np.minimum(idx, len(tiempos_q) - 1)] == ev['ts'])
+        rango_ev = np.where(exacto, 2 * idx, 2 * idx - 1)          # en [-1, 2Q]
+        base = 2 * len(tiempos_q) + 2
+        claves_ev = ev['codes'].astype(np.int64) * base + rango_ev + 1
+
+        def posiciones(tiempos: np.ndarray) -> np.ndarray:
+            rango_q = 2 * np.searchsorted(tiempos_q, tiempos)
+            claves_q = np.maximum(label_codes, 0).astype(np.int64) * base + rango_q + 1
+            return np.searchsorted(claves_ev, claves_q, side='left')   # eventos < tiempo
+
+        hasta = posiciones(cutoffs)
+        desconocida = label_codes < 0
+        out = {}
+        for name, (_, agg, value_col) in self._windows.items():
+            desde = posiciones(consultas[name])
+            count = np.where(desconocida, 0, hasta - desde)
+            if agg == 'count':
+                out[name] = count
+                continue
+            suma, n = self._prefijo(value_col)
+            total = np.where(desconocida, 0.0, suma[hasta] - suma[desde])
+            if agg == 'sum':
+                out[name] = total
+            else:
+                # La media divide por los valores no nulos, como pandas
+                n_validos = np.where(desconocida, 0, n[hasta] - n[desde])
+                out[name] = np.where(n_validos > 0, total / np.maximum(n_validos, 1), np.nan)
+        return pd.DataFrame(out, index=labels_df.index)
+
 
 # Demo
 print("\n--- Point-in-Time Features ---")
@@ -1002,6 +1564,63 @@ if HAS_PANDAS:
     print(f"  Purchases 30d (cutoff=Jun 1): {p30_jun.mean():.1f} promedio")
     print(f"  Mismo feature, distinto momento → distinto resultado (correcto)")
 
+    # Modo bulk: un as-of join para TODAS las filas de labels
+    print("\n--- As-of join vectorizado (compute_as_of) ---")
+    pit.register_window('purchases_last_30d', timedelta(days=30), 'count')
+    pit.set_events(df_txns, 'customer_id', 'date')
+    # Ventanas registradas despues de set_events: el prefijo se crea al usarlo
+    pit.register_window('avg_amount_last_30d', timedelta(days=30), 'mean', 'amount')
+
+    rng_pit = np.random.default_rng(0)
+    labels = pd.DataFrame({
+        'customer_id': rng_pit.integers(0, 105, 300),        # incluye clientes sin historial
+        'date': pd.Timestamp('2024-01-15') + pd.to_timedelta(rng_pit.integers(0, 300 * 24, 300), 'h'),
+    })
+    bulk = pit.compute_as_of(labels, 'customer_id', 'date')
+
+    # Referencia: una pasada de filtro por fila con las funciones de arriba
+    inicio = time.perf_counter()
+    ref_count, ref_mean = [], []
+    for cid, cutoff in zip(labels['customer_id'], labels['date']):
+        ref_count.append(purchases_last_30d(df_txns, cutoff).get(cid, 0))
+        ref_mean.append(avg_amount_last_30d(df_txns, cutoff).get(cid, np.nan))
+    t_por_fila = (time.perf_counter() - inicio) / len(labels)
+    iguales = (np.array_equal(bulk['purchases_last_30d'], ref_count)
+               and np.allclose(bulk['avg_amount_last_30d'], ref_mean, equal_nan=True))
+    print(f"  300 labels: identico a compute_at fila a fila: {iguales}")
+
+    # Importes nulos: solo afectan a su propia ventana (la media ignora NaN)
+    df_nan = df_txns.copy()
+    df_nan.loc[rng_pit.choice(n_txns, 200, replace=False), 'amount'] = np.nan
+    labels_nan = labels.iloc[:60]
+    ref_nan = [avg_amount_last_30d(df_nan, cutoff).get(cid, np.nan)
+               for cid, cutoff in zip(labels_nan['customer_id'], labels_nan['date'])]
+    pit.set_events(df_nan, 'customer_id', 'date')
+    df_nan['amount'] = 0.0                  # set_events ya copio los valores
+    bulk_nan = pit.compute_as_of(labels_nan, 'customer_id', 'date')
+    iguales = np.allclose(bulk_nan['avg_amount_last_30d'], ref_nan, equal_nan=True)
+    print(f"  Con 10% de amounts nulos (y events mutado tras set_events): "
+          f"identico a fila a fila: {iguales}")
+
+    # Escala: 1M filas de labels sobre 500K transacciones
+    n_ev, n_labels = 500_000, 1_000_000
+    df_txns_big = pd.DataFrame({
+        'customer_id': rng_pit.integers(0, 50_000, n_ev),
+        'date': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng_pit.integers(0, 365 * 86400, n_ev), 's'),
+        'amount': rng_pit.lognormal(3, 1, n_ev),
+    })
+    labels_big = pd.DataFrame({
+        'customer_id': rng_pit.integers(0, 50_000, n_labels),
+        'date': pd.Timestamp('2023-02-01') + pd.to_timedelta(rng_pit.integers(0, 330 * 86400, n_labels), 's'),
+    })
+    inicio = time.perf_counter()
+    pit.set_events(df_txns_big, 'customer_id', 'date')
+    matriz_pit = pit.compute_as_of(labels_big, 'customer_id', 'date')
+    t_bulk = time.perf_counter() - inicio
+    print(f"  {n_labels:,} labels x {n_ev:,} eventos: {t_bulk:.2f}s "
+          f"(filtro por fila estimado: {t_por_fila * n_labels / 3600:.1f}h)")
+    print(f"  Media purchases_last_30d: {matriz_pit['purchases_last_30d'].mean():.2f}")
+
 
 # =====================================================================
 #   PARTE 8: FEATURE SERVING (ONLINE VS OFFLINE)
@@ -1032,43 +1651,163 @@ PATRON:
 """
 
 
+class _ServingSnapshot:
+    """
+    Estado inmutable del servidor: indice entity_id -> fila, feature ->
+    columna y una matriz columnar con capacidad de sobra (filas y columnas
+    libres en NaN). La ultima fila es toda NaN y sirve de destino para
+    entidades desconocidas (fila -1).
+    """
+
+    def __init__(self, index: Dict[str, int], columns: Dict[str, int],
+                 matrix: np.ndarray, freshness: Dict[str, Tuple[float, Optional[float]]]):
+        self.index = index
+        self.columns = columns
+        self.matrix = matrix
+        self.freshness = freshness      # feature -> (materializado_en, ttl_seconds)
+
+
 class OnlineFeatureServer:
-    """Simula un servidor de features online con cache."""
+    """
+    Simula un servidor de features online con almacenamiento columnar.
+
+    Cada materialize construye un snapshot nuevo y lo publica con una sola
+    asignacion (swap atomico): los lectores nunca ven un estado a medias.
+    La matriz NO se copia en cada materialize: la feature se escribe en una
+    columna libre (invisible para los snapshots anteriores) y solo al
+    agotar la capacidad se crece x2 compactando las columnas vivas. Coste
+    amortizado O(N) por feature en vez de O(N·F).
+    get_features_batch resuelve N entidades x F features con un gather.
+    """
 
-    def __init__(self, max_latency_ms: float = 100):
-        self._store: Dict[str, Dict[str, float]] = {}
+    def __init__(self, max_latency_ms: float = 100,
+                 default_ttl_seconds: Optional[float] = None,
+                 latency_window: int = 10_000):
         self.max_latency_ms = max_latency_ms
-        self._stats = {'hits': 0, 'misses': 0, 'total_latency_ms': 0}
+        self.default_ttl_seconds = default_ttl_seconds
+        self._snapshot = _ServingSnapshot({}, {}, np.full((1, 0), np.nan), {})
+        self._slots_usados = 0          # columnas de la matriz ya escritas
+        self._latencies_ms = deque(maxlen=latency_window)
+        self._stats = {'hits': 0, 'misses': 0, 'stale': 0}
 
     def materialize(self, feature_name: str,
-                    entity_values: Dict[str, float]):
+                    entity_values: Dict[str, float],
+                    ttl_seconds: Optional[float] = None):
         """Pre-computa y almacena features (batch process)."""
-        self._store[feature_name] = entity_values
+        self.materialize_arrays(feature_name, list(entity_values.keys()),
+                                np.fromiter(entity_values.values(), dtype=float,
+                                            count=len(entity_values)),
+                                ttl_seconds)
+
+    def materialize_arrays(self, feature_name: str, entity_ids: List[str],
+                           values: np.ndarray, ttl_seconds: Optional[float] = None):
+        """Materializa una feature desde arrays (sin dict intermedio)."""
+        actual = self._snapshot
+        index = dict(actual.index)
+        for entity_id in entity_ids:
+            if entity_id not in index:
+                index[entity_id] = len(index)
+
+        matrix = actual.matrix
+        columns = dict(actual.columns)
+        col = self._slots_usados
+        if len(index) + 1 > matrix.shape[0] or col >= matrix.shape[1]:
+            # Sin capacidad: matriz nueva x2, copiando solo las columnas vivas
+            vivas = [(f, c) for f, c in columns.items() if f != feature_name]
+            cap_filas = (matrix.shape[0] if len(index) + 1 <= matrix.shape[0]
+                         else max(len(index) + 1, 2 * matrix.shape[0]))
+            cap_cols = max(4, 2 * (len(vivas) + 1))
+            nueva = np.full((cap_filas, cap_cols), np.nan)
+            n_old = len(actual.index)
+            nueva[:n_old, :len(vivas)] = matrix[:n_old, [c for _, c in vivas]]
+            matrix = nueva
+            columns = {f: j for j, (f, _) in enumerate(vivas)}
+            col = len(vivas)
+        # Columna libre (toda NaN): reemplazo completo de la feature sin
+        # tocar nada que lean los snapshots anteriores
+        columns[feature_name] = col
+        self._slots_usados = col + 1
+        filas = np.fromiter((index[e] for e in entity_ids), dtype=np.intp, count=len(entity_ids))
+        matrix[filas, col] = values
+
+        freshness = dict(actual.freshness)
+        freshness[feature_name] = (time.time(), ttl_seconds if ttl_seconds is not None
+                                   else self.default_ttl_seconds)
+        self._snapshot = _ServingSnapshot(index, columns, matrix, freshness)   # swap atomico
+
+    def get_features_batch(self, entity_ids: List[str],
+                           feature_names: List[str]) -> np.ndarray:
+        """
+        Sirve features para N entidades de una vez: array (N, F) con NaN
+        donde la entidad/feature no existe o la materializacion expiro.
+        """
+        start = time.perf_counter()
+        snap = self._snapshot                           # referencia estable durante la lectura
+        filas = np.fromiter((snap.index.get(e, -1) for e in entity_ids),
+                            dtype=np.intp, count=len(entity_ids))
+        cols = [snap.columns.get(f, -1) for f in feature_names]
+        presentes = [j for j, c in enumerate(cols) if c >= 0]
+
+        result = np.full((len(filas), len(cols)), np.nan)
+        if presentes:
+            result[:, presentes] = snap.matrix[np.ix_(filas, [cols[j] for j in presentes])]
+
+        ahora = time.time()
+        vencidas = [j for j in presentes if self._expired(snap, feature_names[j], ahora)]
+        if vencidas:
+            self._stats['stale'] += int(np.count_nonzero(~np.isnan(result[:, vencidas])))
+            result[:, vencidas] = np.nan
+
+        hits = int(np.count_nonzero(~np.isnan(result)))
+        self._record(hits, result.size - hits, start)
+        return result
+
+    @staticmethod
+    def _expired(snap: _ServingSnapshot, feature_name: str, ahora: float) -> bool:
+        materializado_en, ttl = snap.freshness[feature_name]
+        return ttl is not None and ahora - materializado_en > ttl
+
+    def _record(self, hits: int, misses: int, start: float):
+        self._stats['hits'] += hits
+        self._stats['misses'] += misses
+        self._latencies_ms.append((time.perf_counter() - start) * 1000)
 
     def get_features(self, entity_id: str,
                      feature_names: List[str]) -> Dict[str, Optional[float]]:
         """Sirve features para una entidad (online, baja latencia)."""
-        start = time.time()
+        start = time.perf_counter()
+        snap = self._snapshot
+        fila = snap.matrix[snap.index.get(entity_id, -1)]
+        ahora = time.time()
 
         result = {}
         for fname in feature_names:
-            if fname in self._store and entity_id in self._store[fname]:
-                result[fname] = self._store[fname][entity_id]
-                self._stats['hits'] += 1
-            else:
-                result[fname] = None
-                self._stats['misses'] += 1
-
-        latency = (time.time() - start) * 1000
-        self._stats['total_latency_ms'] += latency
+            col = snap.columns.get(fname)
+            value = None if col is None else float(fila[col])
+            if value is not None and self._expired(snap, fname, ahora):
+                self._stats['stale'] += 1
+                value = None
+            result[fname] = None if value is None or np.isnan(value) else value
+
+        hits = sum(v is not None for v in result.values())
+        self._record(hits, len(result) - hits, start)
         return result
 
+    def latency_percentiles(self) -> Dict[str, float]:
+        """avg/p50/p99 sobre la misma ventana de las ultimas `latency_window` llamadas."""
+        if not self._latencies_ms:
+            return {'avg': 0.0, 'p50': 0.0, 'p99': 0.0}
+        lat = np.fromiter(self._latencies_ms, dtype=float)
+        return {'avg': float(lat.mean()),
+                'p50': float(np.percentile(lat, 50)), 'p99': float(np.percentile(lat, 99))}
+
     def stats(self):
         total = self._stats['hits'] + self._stats['misses']
         hit_rate = self._stats['hits'] / max(total, 1)
-        avg_latency = self._stats['total_latency_ms'] / max(total, 1)
+        pct = self.latency_percentiles()
         print(f"  Online server: {total} lookups, "
-              f"hit_rate={hit_rate:.2%}, avg_latency={avg_latency:.3f}ms")
+              f"hit_rate={hit_rate:.2%}, avg_latency={pct['avg']:.3f}ms, "
+              f"p99={pct['p99']:.3f}ms, stale={self._stats['stale']}")
 
 
 # Demo
@@ -1094,6 +1833,46 @@ for entity_id in ['0', '42', '99', '999']:
 
 server.stats()
 
+# TTL: una materializacion vencida deja de servirse
+server.materialize('risk_score', {'0': 0.7, '42': 0.1}, ttl_seconds=0.01)
+time.sleep(0.02)
+print(f"  risk_score tras expirar el TTL: {server.get_features('0', ['risk_score'])}")
+
+# Batch multi-get: 10K entidades x 20 features
+print("\n--- Batch multi-get (columnar) ---")
+
+n_entities, n_feats = 100_000, 20
+rng_serving = np.random.default_rng(0)
+ids_serving = [str(i) for i in range(n_entities)]
+nombres_feats = [f"f{j}" for j in range(n_feats)]
+big_server = OnlineFeatureServer()
+dict_store = {}                                    # layout anterior: un dict por feature
+t_materialize = 0.0
+for fname in nombres_feats:
+    valores = rng_serving.random(n_entities)
+    inicio = time.perf_counter()
+    big_server.materialize_arrays(fname, ids_serving, valores)
+    t_materialize += time.perf_counter() - inicio
+    dict_store[fname] = dict(zip(ids_serving, valores.tolist()))
+print(f"  materialize_arrays de {n_feats} features x {n_entities:,} entidades: "
+      f"{t_materialize*1000:.0f} ms (columna libre, sin copiar la matriz)")
+
+request_ids = [str(i) for i in rng_serving.integers(0, n_entities, 10_000)]
+
+inicio = time.perf_counter()
+filas_dict = [{f: dict_store[f].get(e) for f in nombres_feats} for e in request_ids]
+t_dict = time.perf_counter() - inicio
+
+inicio = time.perf_counter()
+matriz = big_server.get_features_batch(request_ids, nombres_feats)
+t_batch = time.perf_counter() - inicio
+
+assert np.allclose(matriz[:, 3], [fila['f3'] for fila in filas_dict])
+print(f"  10K entidades x {n_feats} features:")
+print(f"    dict por feature (10K x F lookups): {t_dict*1000:7.2f} ms")
+print(f"    get_features_batch (un gather):     {t_batch*1000:7.2f} ms "
+      f"→ {t_dict/t_batch:.0f}x, shape={matriz.shape}")
+
 
 # =====================================================================
 #   PARTE 9: TESTING DE FEATURE PIPELINES
@@ -1257,34 +2036,34 @@ class ProductionFeaturePipeline:
 
     def register_feature(self, name: str, compute_fn: Callable,
                          dtype: str = "float64", description: str = "",
-                         owner: str = "unknown"):
+                         owner: str = "unknown",
+                         depends_on: Optional[List[str]] = None):
         """Registra feature con validacion y monitoring automatico."""
-        self.store.register_quick(name, compute_fn, dtype, description, owner)
+        self.store.register_quick(name, compute_fn, dtype, description, owner, depends_on)
 
     def run(self, data: Any, feature_names: List[str] = None) -> Dict[str, Any]:
         """Ejecuta pipeline completo: compute → validate → monitor."""
         self._status = "running"
         names = feature_names or self.store.list_features()
 
-        # 1. Computar features
-        results = self.store.compute_batch(names, data)
+        # compute → validate → drift en la MISMA tarea por feature (DAG paralelo)
+        estado = {'validation_passed': True}
 
-        # 2. Validar
-        validation_passed = True
-        for name, values in results.items():
+        def validar_y_monitorear(name: str, values: Any):
             val_result = self.validator.validate(name, values)
             if not val_result['passed']:
-                validation_passed = False
+                estado['validation_passed'] = False
                 print(f"  [ALERT] Feature '{name}' fallo validacion")
 
-        # 3. Monitorear drift (si hay baseline)
-        for name, values in results.items():
             if name in self.drift_monitor._baselines:
                 drift = self.drift_monitor.check_drift(name, np.array(values))
                 if drift['psi'] > 0.25:
                     print(f"  [ALERT] Drift detectado en '{name}': "
                           f"PSI={drift['psi']:.4f}")
 
+        results = self.store.compute_batch(names, data, on_computed=validar_y_monitorear)
+        validation_passed = estado['validation_passed']
+
         self._status = "completed" if validation_passed else "completed_with_warnings"
         return results
 
@@ -1383,15 +2162,18 @@ print("""
 
   6. POINT-IN-TIME: features calculadas respetando temporalidad.
      → Evitar leakage temporal (el error mas comun y sutil).
+     → Bulk: as-of join sobre eventos ordenados + sumas acumuladas.
 
   7. SERVING: offline (batch) vs online (real-time).
      → Misma feature, dos modos de acceso.
+     → Online: layout columnar, multi-get en un gather, TTL por materializacion.
 
   8. TESTING: unit, schema, statistical, integration.
      → Features son codigo y necesitan tests.
 
   9. PIPELINE E2E: compute → validate → monitor → serve.
      → Automatizacion completa.
+     → DAG de dependencias: ramas en paralelo, intermedios una vez.
 
   HERRAMIENTAS REALES:
     - Feast (open source)
@@ -31,8 +31,9 @@ import numpy as np
 import time
 from datetime import datetime, timedelta
 from collections import deque
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 import warnings
+from abc import ABC, abstractmethod
 warnings.filterwarnings('ignore')
 
 try:
@@ -293,6 +294,318 @@ if HAS_SKLEARN:
             print(f"    {k}: {v:.4f}")
 
 
+# =====================================================================
+#   STREAMING METRICS: O(1) POR EVENTO
+# =====================================================================
+
+"""
+PROBLEMA: get_ml_metrics() copia los deques a listas y re-ejecuta
+sklearn sobre TODA la ventana en cada llamada. Un dashboard que
+hace polling cada segundo sobre decenas de modelos paga
+O(window) x modelos x segundo solo para re-calcular lo mismo.
+
+SOLUCION: mantener los AGREGADOS, no recalcularlos.
+  - Confusion matrix: contadores tp/fp/fn/tn (+1 al entrar, -1 al salir).
+  - Log-loss: suma acumulada de -log(p) por evento.
+  - AUC: histograma de scores por clase (B bins fijos).
+  - Latencia: DDSketch con conteos por bucket logaritmico, que
+    admite BORRAR valores (ventana deslizante) y da cuantiles con
+    error relativo acotado.
+  - Distribucion de predicciones: sumas y sumas de cuadrados.
+
+Cada evento que sale de la ventana se resta en O(1) leyendo el
+ring buffer. snapshot() cuesta O(B), independiente del tamaño
+de la ventana.
+"""
+
+import math
+
+
+class SlidingDDSketch:
+    """
+    DDSketch con borrado: buckets logaritmicos de razon gamma.
+    Cualquier cuantil se estima con error relativo <= relative_accuracy.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01,
+                 min_value: float = 1e-3, max_value: float = 1e6):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        self.n_buckets = int(math.ceil(math.log(max_value / min_value) / self._log_gamma)) + 1
+        self.counts = np.zeros(self.n_buckets, dtype=np.int64)
+        self.count = 0
+        # Valor representativo de cada bucket (punto medio relativo)
+        self._valores = min_value * 2 * self.gamma ** np.arange(self.n_buckets) / (self.gamma + 1)
+
+    def _bucket(self, x: float) -> int:
+        if x <= self.min_value:
+            return 0
+        return min(int(math.ceil(math.log(x / self.min_value) / self._log_gamma)),
+                   self.n_buckets - 1)
+
+    def add(self, x: float):
+        self.counts[self._bucket(x)] += 1
+        self.count += 1
+
+    def remove(self, x: float):
+        self.counts[self._bucket(x)] -= 1
+        self.count -= 1
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return float('nan')
+        rank = q * (self.count - 1)
+        idx = int(np.searchsorted(np.cumsum(self.counts), rank, side='right'))
+        return float(self._valores[idx])
+
+
+class StreamingMetricsTracker:
+    """
+    Mismo API que ProductionMetricsTracker, pero cada log_prediction
+    actualiza agregados en O(1) y snapshot() no depende del tamaño
+    de la ventana.
+    """
+
+    EPS = 1e-15
+
+    def __init__(self, model_name: str, window_size: int = 1000,
+                 auc_bins: int = 1000, history_size: int = 1000):
+        self.model_name = model_name
+        self.window_size = window_size
+        self.auc_bins = auc_bins
+
+        # Ring buffers: (prediction, probability, latency, error) y
+        # (prediction, actual, probability) para eventos con label.
+        self._eventos: List[Optional[Tuple]] = [None] * window_size
+        self._n_eventos = 0
+        self._etiquetados: List[Optional[Tuple]] = [None] * window_size
+        self._n_etiquetados = 0
+
+        # Agregados de la ventana completa
+        self._sum_pred = 0
+        self._sum_prob = 0.0
+        self._sum_prob_sq = 0.0
+        self._n_high_conf = 0
+        self._n_errors = 0
+        self._sum_latency = 0.0
+        self._latency_sketch = SlidingDDSketch()
+
+        # Agregados de la ventana etiquetada
+        self._tp = self._fp = self._fn = self._tn = 0
+        self._sum_logloss = 0.0
+        self._auc_pos = np.zeros(auc_bins, dtype=np.int64)
+        self._auc_neg = np.zeros(auc_bins, dtype=np.int64)
+
+        # Las sumas float acumulan error al sumar/restar millones de veces:
+        # se recalculan desde los buffers cada window_size desalojos
+        # (coste amortizado O(1) por evento).
+        self._desalojos = 0
+
+        self._version = 0
+        self._cache: Optional[Tuple[int, Dict]] = None
+        self._metric_history = deque(maxlen=history_size)
+
+    # -- Actualizacion incremental --------------------------------------
+
+    def _aplicar_evento(self, evento: Tuple, signo: int):
+        pred, prob, latency, error = evento
+        self._sum_pred += signo * pred
+        self._sum_prob += signo * prob
+        self._sum_prob_sq += signo * prob * prob
+        self._n_high_conf += signo * (prob > 0.9 or prob < 0.1)
+        self._n_errors += signo * error
+        self._sum_latency += signo * latency
+        if signo > 0:
+            self._latency_sketch.add(latency)
+        else:
+            self._latency_sketch.remove(latency)
+
+    def _aplicar_etiquetado(self, evento: Tuple, signo: int):
+        pred, actual, prob = evento
+        if actual == 1:
+            if pred == 1:
+                self._tp += signo
+            else:
+                self._fn += signo
+            self._auc_pos[min(int(prob * self.auc_bins), self.auc_bins - 1)] += signo
+        else:
+            if pred == 1:
+                self._fp += signo
+            else:
+                self._tn += signo
+            self._auc_neg[min(int(prob * self.auc_bins), self.auc_bins - 1)] += signo
+        self._sum_logloss += signo * self._logloss_term(actual, prob)
+
+    def _logloss_term(self, actual: int, prob: float) -> float:
+        p = min(max(prob, self.EPS), 1 - self.EPS)
+        return -math.log(p) if actual == 1 else -math.log(1 - p)
+
+    def _recalcular_sumas(self):
+        eventos = [e for e in self._eventos if e is not None]
+        etiquetados = [e for e in self._etiquetados if e is not None]
+        self._sum_prob = math.fsum(e[1] for e in eventos)
+        self._sum_prob_sq = math.fsum(e[1] * e[1] for e in eventos)
+        self._sum_latency = math.fsum(e[2] for e in eventos)
+        self._sum_logloss = math.fsum(self._logloss_term(a, p) for _, a, p in etiquetados)
+        self._desalojos = 0
+
+    def log_prediction(self, prediction: int, probability: float,
+                       latency_ms: float, actual: Optional[int] = None,
+                       error: bool = False):
+        """Registra una prediccion: O(1)."""
+        evento = (int(prediction), float(probability), float(latency_ms), bool(error))
+        slot = self._n_eventos % self.window_size
+        if self._eventos[slot] is not None:
+            self._aplicar_evento(self._eventos[slot], -1)
+            self._desalojos += 1
+        self._eventos[slot] = evento
+        self._aplicar_evento(evento, +1)
+        self._n_eventos += 1
+
+        if actual is not None:
+            etiquetado = (int(prediction), int(actual), float(probability))
+            slot = self._n_etiquetados % self.window_size
+            if self._etiquetados[slot] is not None:
+                self._aplicar_etiquetado(self._etiquetados[slot], -1)
+                self._desalojos += 1
+            self._etiquetados[slot] = etiquetado
+            self._aplicar_etiquetado(etiquetado, +1)
+            self._n_etiquetados += 1
+
+        if self._desalojos >= self.window_size:
+            self._recalcular_sumas()
+        self._version += 1
+
+    # -- Lectura: O(B), independiente de la ventana ----------------------
+
+    def _binned_auc(self) -> Optional[float]:
+        n_pos, n_neg = int(self._auc_pos.sum()), int(self._auc_neg.sum())
+        if n_pos == 0 or n_neg == 0:
+            return None
+        # Pares (pos, neg) con score_pos > score_neg, empates (mismo bin) cuentan 0.5
+        neg_debajo = np.cumsum(self._auc_neg) - self._auc_neg
+        ganados = np.dot(self._auc_pos, neg_debajo) + 0.5 * np.dot(self._auc_pos, self._auc_neg)
+        return float(ganados / (n_pos * n_neg))
+
+    def get_ml_metrics(self) -> Dict:
+        n = min(self._n_etiquetados, self.window_size)
+        if n < 10:
+            return {'status': 'insufficient_data'}
+
+        tp, fp, fn, tn = self._tp, self._fp, self._fn, self._tn
+        metrics = {
+            'accuracy': (tp + tn) / n,
+            'f1': 2 * tp / (2 * tp + fp + fn) if tp else 0.0,
+            'precision': tp / (tp + fp) if tp + fp else 0.0,
+            'recall': tp / (tp + fn) if tp + fn else 0.0,
+            'positive_rate': (tp + fp) / n,
+            'n_samples': n,
+        }
+        auc = self._binned_auc()
+        if auc is not None:
+            metrics['auc'] = auc
+            metrics['log_loss'] = self._sum_logloss / n
+        return metrics
+
+    def get_operational_metrics(self) -> Dict:
+        n = min(self._n_eventos, self.window_size)
+        if n == 0:
+            return {'status': 'no_data'}
+
+        sketch = self._latency_sketch
+        return {
+            'latency_p50': sketch.quantile(0.50),
+            'latency_p95': sketch.quantile(0.95),
+            'latency_p99': sketch.quantile(0.99),
+            'latency_mean': self._sum_latency / n,
+            'error_rate': self._n_errors / n,
+            'throughput': n,
+        }
+
+    def get_prediction_distribution(self) -> Dict:
+        n = min(self._n_eventos, self.window_size)
+        if n == 0:
+            return {'status': 'no_data'}
+
+        pred_mean = self._sum_pred / n
+        prob_mean = self._sum_prob / n
+        return {
+            'prediction_mean': pred_mean,
+            'prediction_std': math.sqrt(max(pred_mean - pred_mean ** 2, 0.0)),
+            'probability_mean': prob_mean,
+            'probability_std': math.sqrt(max(self._sum_prob_sq / n - prob_mean ** 2, 0.0)),
+            'pct_positive': pred_mean,
+            'pct_high_confidence': self._n_high_conf / n,
+        }
+
+    def snapshot(self) -> Dict:
+        """Snapshot en tiempo constante; si no hubo eventos nuevos, reutiliza el ultimo."""
+        if self._cache is None or self._cache[0] != self._version:
+            self._cache = (self._version, {
+                'ml_metrics': self.get_ml_metrics(),
+                'operational': self.get_operational_metrics(),
+                'prediction_dist': self.get_prediction_distribution(),
+            })
+        snap = {'model': self.model_name, 'timestamp': datetime.now(), **self._cache[1]}
+        self._metric_history.append(snap)
+        return snap
+
+
+# Demo
+print("\n--- Streaming Metrics Tracker (O(1) por evento) ---")
+
+if HAS_SKLEARN:
+    streaming = StreamingMetricsTracker("churn_model_v1")
+    # Mismo stream que recibio el tracker clasico
+    for p, pr, lat, y_true in zip(tracker._predictions, tracker._probabilities,
+                                  tracker._latencies_ms, tracker._actuals):
+        streaming.log_prediction(p, pr, lat, actual=y_true)
+
+    snap_stream = streaming.snapshot()
+    print(f"\n  {'metrica':<22} {'sklearn/numpy':>14} {'streaming':>12}")
+    for seccion in ('ml_metrics', 'operational', 'prediction_dist'):
+        for k, v in snap[seccion].items():
+            if isinstance(v, float):
+                print(f"  {k:<22} {v:>14.4f} {snap_stream[seccion][k]:>12.4f}")
+
+    # Benchmark: coste de snapshot() segun el tamaño de la ventana
+    print(f"\n  {'ventana':>9} {'snapshot sklearn':>17} {'snapshot streaming':>19} {'log_prediction':>15}")
+    rng_metrics = np.random.default_rng(0)
+    for window in (1_000, 10_000, 100_000):
+        n_eventos = window + window // 2       # ventana llena y desplazandose
+        actuals = rng_metrics.integers(0, 2, n_eventos)
+        probs = np.clip(actuals * 0.3 + rng_metrics.random(n_eventos) * 0.7, 0, 1)
+        preds = (probs > 0.5).astype(int)
+        lats = rng_metrics.lognormal(0.5, 0.6, n_eventos)
+        ingesta = list(zip(preds.tolist(), probs.tolist(), lats.tolist(), actuals.tolist()))
+
+        clasico = ProductionMetricsTracker("bench", window_size=window)
+        incremental = StreamingMetricsTracker("bench", window_size=window)
+        for p, pr, lat, a in ingesta:
+            clasico.log_prediction(p, pr, lat, actual=a)
+
+        inicio = time.perf_counter()
+        for p, pr, lat, a in ingesta:
+            incremental.log_prediction(p, pr, lat, actual=a)
+        t_log = (time.perf_counter() - inicio) / n_eventos
+
+        inicio = time.perf_counter()
+        for _ in range(3):
+            clasico.snapshot()
+        t_clasico = (time.perf_counter() - inicio) / 3
+
+        inicio = time.perf_counter()
+        for _ in range(100):
+            incremental._version += 1          # forzar recalculo (sin cache)
+            incremental.snapshot()
+        t_stream = (time.perf_counter() - inicio) / 100
+
+        print(f"  {window:>9,} {t_clasico*1000:>14.2f} ms {t_stream*1000:>16.3f} ms "
+              f"{t_log*1e6:>12.1f} us")
+
+
+
 # =====================================================================
 #   PARTE 3: DATA DRIFT DETECTION
 # =====================================================================
@@ -328,14 +641,157 @@ METODOS DE DETECCION:
 
 
 class DataDriftDetector:
-    """Detecta drift en features usando multiples metodos."""
-
-    def __init__(self):
-        self._reference: Dict[str, np.ndarray] = {}
+    """
+    Detecta drift en features usando multiples metodos.
+
+    La referencia NO se guarda cruda: set_reference la resume una vez en
+    un sketch por feature (n_quantiles+1 cuantiles, y en cada uno el conteo
+    y la integral de la CDF). PSI, KS y Wasserstein se calculan contra ese
+    sketch, y check_matrix evalua todas las features a la vez en una pasada
+    2-D por bloques de filas. La memoria no depende del tamaño de la referencia.
+    """
+
+    def __init__(self, n_bins: int = 10, n_quantiles: int = 100,
+                 chunk_elements: int = 4_000_000):
+        if n_quantiles % n_bins:
+            raise ValueError("n_quantiles debe ser multiplo de n_bins")
+        self.n_bins = n_bins
+        self.n_quantiles = n_quantiles
+        self.chunk_elements = chunk_elements
+        # feature -> (grid de cuantiles, conteos acumulados, integral de la CDF
+        #             por celda, media, n)
+        self._reference: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray, float, int]] = {}
+
+    # -- Resumen de columnas ordenadas --------------------------------
+
+    @staticmethod
+    def _prefijos(ordenado: np.ndarray, grids: np.ndarray):
+        """
+        Para cada fila ordenada de `ordenado` (f, m) y cada punto de su grid
+        (f, Q+1): cuantos valores son < g (C) y cuanto suman (P).
+
+        Un unico searchsorted para TODAS las features: cada fila se
+        normaliza con el rango de su grid y se desplaza a [3j - 0.5, 3j + 1.5],
+        asi el array aplanado queda globalmente ordenado.
+        """
+        f, m = ordenado.shape
+        lo, hi = grids[:, :1], grids[:, -1:]
+        escala = np.where(hi > lo, hi - lo, 1.0)
+        offset = 3.0 * np.arange(f)[:, None]
+        claves = np.clip((ordenado - lo) / escala, -0.5, 1.5) + offset
+        bordes = (grids - lo) / escala + offset
+        C = (np.searchsorted(claves.ravel(), bordes.ravel(), side='left').reshape(bordes.shape)
+             - m * np.arange(f)[:, None])
+        acumulada = np.zeros((f, m + 1))
+        np.cumsum(ordenado, axis=1, dtype=float, out=acumulada[:, 1:])
+        P = np.take_along_axis(acumulada, C, axis=1)
+        return C, P, acumulada[:, -1]
+
+    @staticmethod
+    def _integral_cdf(grids: np.ndarray, C: np.ndarray, P: np.ndarray,
+                      n: np.ndarray) -> np.ndarray:
+        """
+        Integral exacta de la CDF empirica en cada celda [g_k, g_k+1]:
+        (1/n) * [C_k * ancho + sum_{g_k <= x < g_k+1} (g_k+1 - x)].
+        """
+        ancho = np.diff(grids, axis=1)
+        dentro = np.diff(C, axis=1)
+        return (C[:, :-1] * ancho + dentro * grids[:, 1:] - np.diff(P, axis=1)) / n
+
+    # -- Sketch de referencia -----------------------------------------
 
     def set_reference(self, feature_name: str, values: np.ndarray):
         """Establece distribucion de referencia (training data)."""
-        self._reference[feature_name] = np.array(values, dtype=float)
+        self.set_reference_matrix(np.asarray(values, dtype=float).reshape(-1, 1),
+                                  [feature_name])
+
+    def set_reference_matrix(self, X: np.ndarray, feature_names: List[str]):
+        """Resume las columnas de X (n, f) en sketches, por bloques de features."""
+        X = np.asarray(X)
+        n = len(X)
+        niveles = np.linspace(0, 1, self.n_quantiles + 1) * (n - 1)
+        izq = np.floor(niveles).astype(int)
+        der = np.minimum(izq + 1, n - 1)
+        frac = niveles - izq
+        columnas = max(1, self.chunk_elements // n)
+        for start in range(0, len(feature_names), columnas):
+            ordenado = np.sort(np.ascontiguousarray(X[:, start:start + columnas].T), axis=1)
+            # Cuantiles con interpolacion lineal (= np.percentile) sobre la fila ordenada
+            grids = ordenado[:, izq] * (1 - frac) + ordenado[:, der] * frac
+            C, P, total = self._prefijos(ordenado, grids)
+            integral = self._integral_cdf(grids, C, P, n)
+            for j, name in enumerate(feature_names[start:start + columnas]):
+                self._reference[name] = (grids[j], C[j], integral[j], float(total[j] / n), n)
+
+    # -- Pasada 2-D sobre los datos actuales --------------------------
+
+    def check_matrix(self, X: np.ndarray, feature_names: List[str]) -> List[Dict]:
+        """Drift de todas las features de X (n, f) contra sus sketches."""
+        X = np.asarray(X)
+        n, f = X.shape
+        grids = np.stack([self._reference[name][0] for name in feature_names])
+        C_ref = np.stack([self._reference[name][1] for name in feature_names])
+        int_ref = np.stack([self._reference[name][2] for name in feature_names])
+        ref_mean = np.array([self._reference[name][3] for name in feature_names])
+        n_ref = np.array([self._reference[name][4] for name in feature_names], dtype=float)[:, None]
+
+        # Conteos y sumas acumuladas son aditivos: se suman bloque a bloque
+        C = np.zeros(grids.shape, dtype=np.int64)
+        P = np.zeros(grids.shape)
+        total = np.zeros(f)
+        filas = max(1, self.chunk_elements // f)
+        for start in range(0, n, filas):
+            ordenado = np.sort(np.ascontiguousarray(X[start:start + filas].T), axis=1)
+            C_b, P_b, total_b = self._prefijos(ordenado, grids)
+            C += C_b
+            P += P_b
+            total += total_b
+
+        # PSI: deciles de la referencia con extremos abiertos (-inf, inf)
+        cortes = np.arange(0, self.n_quantiles + 1, self.n_quantiles // self.n_bins)
+        def por_bin(acum, n_total):
+            acum = acum[:, cortes].astype(float)
+            acum[:, 0], acum[:, -1] = 0, n_total.ravel()
+            return np.diff(acum, axis=1)
+        ref_pct = (por_bin(C_ref, n_ref) + 1) / (n_ref + self.n_bins)
+        cur_pct = (por_bin(C, np.full(f, n)) + 1) / (n + self.n_bins)
+        psi = np.sum((cur_pct - ref_pct) * np.log(cur_pct / ref_pct), axis=1)
+
+        # KS ~ sup |F_ref - F_cur| sobre los cuantiles; p-valor asintotico
+        ks_stat = np.abs(C_ref / n_ref - C / n).max(axis=1)
+        en = np.sqrt(n_ref.ravel() * n / (n_ref.ravel() + n))
+        ks_p = stats.kstwobign.sf(en * ks_stat)
+
+        # Wasserstein = integral |F_ref - F_cur| dx, celda a celda + colas
+        lo, hi = grids[:, 0], grids[:, -1]
+        cola_lo = (C[:, 0] * lo - P[:, 0]) / n
+        cola_hi = ((total - P[:, -1]) - (n - C[:, -1]) * hi) / n
+        wass = (np.abs(int_ref - self._integral_cdf(grids, C, P, n)).sum(axis=1)
+                + cola_lo + cola_hi)
+
+        cur_mean = total / n
+        drift_signals = (psi > 0.1).astype(int) + (ks_p < 0.05) + (psi > 0.25)
+
+        results = []
+        for j, name in enumerate(feature_names):
+            results.append({
+                'feature': name,
+                'psi': float(psi[j]),
+                'ks_statistic': float(ks_stat[j]),
+                'ks_pvalue': float(ks_p[j]),
+                'wasserstein': float(wass[j]),
+                'drift_signals': int(drift_signals[j]),
+                'verdict': 'DRIFT' if drift_signals[j] >= 2 else
+                           'WARNING' if drift_signals[j] >= 1 else 'OK',
+                'ref_mean': float(ref_mean[j]),
+                'cur_mean': float(cur_mean[j]),
+                'mean_shift_pct': float(
+                    abs(cur_mean[j] - ref_mean[j]) / (abs(ref_mean[j]) + 1e-10) * 100
+                ),
+            })
+        return sorted(results, key=lambda x: x['psi'], reverse=True)
+
+    # -- Tests exactos sobre muestras crudas (utiles para auditar) ----
 
     def psi(self, reference: np.ndarray, current: np.ndarray,
             n_bins: int = 10) -> float:
@@ -364,45 +820,17 @@ class DataDriftDetector:
         """Ejecuta todos los tests para una feature."""
         if feature_name not in self._reference:
             return {'error': f'No reference for {feature_name}'}
-
-        ref = self._reference[feature_name]
-        cur = np.array(current, dtype=float)
-
-        psi_val = self.psi(ref, cur)
-        ks = self.ks_test(ref, cur)
-        wass = self.wasserstein(ref, cur)
-
-        # Verdict
-        drift_signals = 0
-        if psi_val > 0.1:
-            drift_signals += 1
-        if ks['drift']:
-            drift_signals += 1
-        if psi_val > 0.25:
-            drift_signals += 1
-
-        return {
-            'feature': feature_name,
-            'psi': psi_val,
-            'ks_statistic': ks['statistic'],
-            'ks_pvalue': ks['p_value'],
-            'wasserstein': wass,
-            'drift_signals': drift_signals,
-            'verdict': 'DRIFT' if drift_signals >= 2 else
-                       'WARNING' if drift_signals >= 1 else 'OK',
-            'ref_mean': float(np.mean(ref)),
-            'cur_mean': float(np.mean(cur)),
-            'mean_shift_pct': float(
-                abs(np.mean(cur) - np.mean(ref)) / (abs(np.mean(ref)) + 1e-10) * 100
-            ),
-        }
+        cur = np.asarray(current, dtype=float).reshape(-1, 1)
+        return self.check_matrix(cur, [feature_name])[0]
 
     def check_all(self, current_data: Dict[str, np.ndarray]) -> List[Dict]:
         """Verifica drift en todas las features."""
-        results = []
-        for name, values in current_data.items():
-            if name in self._reference:
-                results.append(self.check_feature(name, values))
+        names = [name for name in current_data if name in self._reference]
+        if len({len(current_data[name]) for name in names}) == 1:
+            X = np.column_stack([np.asarray(current_data[name], dtype=float)
+                                 for name in names])
+            return self.check_matrix(X, names)
+        results = [self.check_feature(name, current_data[name]) for name in names]
         return sorted(results, key=lambda x: x.get('psi', 0), reverse=True)
 
 
@@ -450,6 +878,50 @@ if HAS_SKLEARN:
               f"KS_p={result['ks_pvalue']:.3f}, "
               f"mean_shift={result['mean_shift_pct']:.1f}% → {result['verdict']}")
 
+    # Sketch vs tests exactos sobre las muestras crudas
+    print(f"\n  Sketch vs exacto (income, escenario 2):")
+    aprox = detector.check_feature('income', current_drift['income'])
+    ref_raw, cur_raw = ref_features['income'], current_drift['income']
+    print(f"    PSI:         {aprox['psi']:.4f} vs {detector.psi(ref_raw, cur_raw):.4f}")
+    print(f"    KS stat:     {aprox['ks_statistic']:.4f} vs "
+          f"{detector.ks_test(ref_raw, cur_raw)['statistic']:.4f}")
+    print(f"    Wasserstein: {aprox['wasserstein']:.1f} vs "
+          f"{detector.wasserstein(ref_raw, cur_raw):.1f}")
+
+    # Benchmark: muchas features a la vez
+    n_feat, n_ref, n_cur = 500, 100_000, 200_000
+    rng_drift = np.random.default_rng(0)
+    escalas = rng_drift.uniform(0.5, 5, n_feat).astype(np.float32)
+    X_ref = rng_drift.standard_normal((n_ref, n_feat), dtype=np.float32) * escalas
+    X_cur = rng_drift.standard_normal((n_cur, n_feat), dtype=np.float32) * escalas
+    X_cur[:, :25] += 0.5 * escalas[:25]                 # drift en 25 features
+    nombres = [f"f{j}" for j in range(n_feat)]
+
+    bench = DataDriftDetector()
+    inicio = time.perf_counter()
+    bench.set_reference_matrix(X_ref, nombres)
+    t_ref = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    resultados_bench = bench.check_matrix(X_cur, nombres)
+    t_vec = time.perf_counter() - inicio
+    n_drift = sum(r['verdict'] == 'DRIFT' for r in resultados_bench)
+
+    # Camino anterior (percentile + ks_2samp + wasserstein por feature), medido en 5
+    inicio = time.perf_counter()
+    for j in range(5):
+        detector.psi(X_ref[:, j], X_cur[:, j])
+        detector.ks_test(X_ref[:, j], X_cur[:, j])
+        detector.wasserstein(X_ref[:, j], X_cur[:, j])
+    t_loop = (time.perf_counter() - inicio) / 5 * n_feat
+
+    sketch_kb = sum(g.nbytes + c.nbytes + i.nbytes
+                    for g, c, i, _, _ in bench._reference.values()) / 1024
+    print(f"\n  {n_feat} features, referencia {n_ref:,} filas, actual {n_cur:,} filas:")
+    print(f"    Sketch de referencia: {t_ref:.2f}s, {sketch_kb:.0f} KB "
+          f"(vs {X_ref.nbytes / 2**20:.0f} MB crudos)")
+    print(f"    check_matrix vectorizado: {t_vec:.2f}s → {n_drift} features con DRIFT (25 inyectadas)")
+    print(f"    Loop exacto por feature (estimado): {t_loop:.1f}s")
+
 
 # =====================================================================
 #   PARTE 4: CONCEPT DRIFT
@@ -481,20 +953,48 @@ DETECCION:
 
 
 class ConceptDriftDetector:
-    """Detecta concept drift monitoreando performance en ventanas."""
+    """
+    Detecta concept drift monitoreando performance en ventanas.
+
+    Con detector=None compara dos mitades de una ventana fija. Con un
+    StreamingDriftDetector (ADWIN, PageHinkley, DDM, EDDM) cada update
+    cuesta O(1)/O(log W) y check() solo devuelve la ultima senal.
+    """
 
-    def __init__(self, window_size: int = 200, threshold: float = 0.05):
+    def __init__(self, window_size: int = 200, threshold: float = 0.05,
+                 detector: Optional['StreamingDriftDetector'] = None):
         self.window_size = window_size
         self.threshold = threshold
+        self.detector = detector
         self._errors = deque(maxlen=window_size * 2)
+        self._last_signal: Optional['DriftSignal'] = None
         self._alerts: List[Dict] = []
 
-    def update(self, actual: int, predicted: int):
+    def update(self, actual: int, predicted: int) -> Optional['DriftSignal']:
         """Agrega una observacion."""
-        self._errors.append(int(actual != predicted))
+        error = int(actual != predicted)
+        if self.detector is None:
+            self._errors.append(error)
+            return None
+        signal = self.detector.update(error)
+        self._last_signal = signal
+        if signal.drift:
+            self._alerts.append({**signal._asdict(), 'timestamp': datetime.now()})
+        return signal
 
     def check(self) -> Dict:
         """Compara error rate de la primera y segunda mitad."""
+        if self.detector is not None:
+            if self._last_signal is None:
+                return {'status': 'insufficient_data', 'drift': False}
+            return {
+                'detector': type(self.detector).__name__,
+                'error_rate': float(self._last_signal.estimate),
+                'drift': self._last_signal.drift,
+                'warning': self._last_signal.warning,
+                'n_samples': self._last_signal.n_samples,
+            }
+
         errors = list(self._errors)
         if len(errors) < self.window_size:
             return {'status': 'insufficient_data', 'drift': False}
@@ -553,6 +1053,343 @@ if HAS_SKLEARN:
     print(f"    Drift: {result_drift['drift']}")
 
 
+# =====================================================================
+#   DETECTORES DE CAMBIO EN STREAMING (ADWIN, PAGE-HINKLEY, DDM, EDDM)
+# =====================================================================
+
+"""
+ConceptDriftDetector.check() copia la ventana a una lista y compara dos
+mitades fijas: O(window) por check y una sola escala temporal. Un drift
+lento se diluye en la ventana; uno brusco tarda window/2 en verse.
+
+Los detectores clasicos trabajan en streaming con memoria acotada:
+
+  Page-Hinkley  suma acumulada de desviaciones sobre la media.     O(1)
+  DDM           error rate p y su std s; alarma si p+s supera
+                min(p+s) + 3*min(s). Warning a 2*min(s).           O(1)
+  EDDM          igual que DDM pero sobre la DISTANCIA entre
+                errores (detecta mejor drifts graduales).          O(1)
+  ADWIN         ventana ADAPTATIVA con histogramas exponenciales:
+                corta la parte vieja cuando dos sub-ventanas
+                difieren mas de lo que permite Hoeffding.          O(log W)
+
+Interfaz comun: update(x) -> DriftSignal.
+"""
+
+
+class DriftSignal(NamedTuple):
+    drift: bool
+    warning: bool
+    estimate: float     # error rate / media que el detector cree actual
+    n_samples: int      # observaciones desde el ultimo reset
+
+
+class StreamingDriftDetector(ABC):
+    """
+    Base: cada subclase implementa update(x) -> DriftSignal y reset(), que
+    vuelve el estado aprendido al inicial (los hiperparametros se conservan).
+    """
+
+    @abstractmethod
+    def update(self, x: float) -> DriftSignal:
+        """Procesa una observacion; tras un drift el detector se resetea solo."""
+
+    @abstractmethod
+    def reset(self):
+        """Olvida todo lo observado desde el ultimo reset."""
+
+
+class PageHinkley(StreamingDriftDetector):
+    """Detecta aumentos de la media: m_t = sum(x - media - delta), alarma si m_t - min(m) > lambda."""
+
+    def __init__(self, delta: float = 0.005, threshold: float = 50.0,
+                 min_samples: int = 30):
+        self.delta = delta
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.mean = 0.0
+        self.cum = 0.0
+        self.min_cum = 0.0
+
+    def update(self, x: float) -> DriftSignal:
+        self.n += 1
+        self.mean += (x - self.mean) / self.n
+        self.cum += x - self.mean - self.delta
+        self.min_cum = min(self.min_cum, self.cum)
+        drift = self.n >= self.min_samples and self.cum - self.min_cum > self.threshold
+        signal = DriftSignal(drift, False, self.mean, self.n)
+        if drift:
+            self.reset()
+        return signal
+
+
+class DDM(StreamingDriftDetector):
+    """Drift Detection Method (Gama et al. 2004) sobre bits de error."""
+
+    def __init__(self, warning_level: float = 2.0, drift_level: float = 3.0,
+                 min_samples: int = 30):
+        self.warning_level = warning_level
+        self.drift_level = drift_level
+        self.min_samples = min_samples
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.p = 0.0
+        self.p_min = float('inf')
+        self.s_min = float('inf')
+
+    def update(self, x: float) -> DriftSignal:
+        self.n += 1
+        self.p += (x - self.p) / self.n
+        s = math.sqrt(self.p * (1 - self.p) / self.n)
+        if self.n < self.min_samples:
+            return DriftSignal(False, False, self.p, self.n)
+
+        if self.p + s <= self.p_min + self.s_min:
+            self.p_min, self.s_min = self.p, s
+        drift = self.p + s > self.p_min + self.drift_level * self.s_min
+        warning = self.p + s > self.p_min + self.warning_level * self.s_min
+        signal = DriftSignal(drift, warning, self.p, self.n)
+        if drift:
+            self.reset()
+        return signal
+
+
+class EDDM(StreamingDriftDetector):
+    """
+    Early DDM (Baena-Garcia et al. 2006): media/std de la distancia entre errores.
+
+    Ruidoso con los valores del paper (min_errors=30, 0.95/0.90): max_score
+    se fija con pocas distancias, hinchado por el ruido de la estimacion,
+    y en tramos estacionarios largos el ratio cae por azar bajo drift_level.
+    Con streams largos conviene min_errors ~100 y drift_level ~0.85.
+    """
+
+    def __init__(self, warning_level: float = 0.95, drift_level: float = 0.90,
+                 min_errors: int = 30):
+        self.warning_level = warning_level
+        self.drift_level = drift_level
+        self.min_errors = min_errors
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.n_errors = 0
+        self.last_error = 0
+        self.mean_dist = 0.0
+        self.m2_dist = 0.0          # Welford
+        self.max_score = 0.0
+
+    def update(self, x: float) -> DriftSignal:
+        self.n += 1
+        if not x:
+            return DriftSignal(False, False, self.n_errors / self.n, self.n)
+
+        self.n_errors += 1
+        dist = self.n - self.last_error
+        self.last_error = self.n
+        delta = dist - self.mean_dist
+        self.mean_dist += delta / self.n_errors
+        self.m2_dist += delta * (dist - self.mean_dist)
+        score = self.mean_dist + 2 * math.sqrt(self.m2_dist / self.n_errors)
+
+        if self.n_errors < self.min_errors:
+            return DriftSignal(False, False, self.n_errors / self.n, self.n)
+        self.max_score = max(self.max_score, score)
+        ratio = score / self.max_score
+        drift = ratio < self.drift_level
+        signal = DriftSignal(drift, ratio < self.warning_level, self.n_errors / self.n, self.n)
+        if drift:
+            self.reset()
+        return signal
+
+
+class ADWIN(StreamingDriftDetector):
+    """
+    ADaptive WINdowing (Bifet & Gavalda 2007), version con histogramas
+    exponenciales: la ventana se guarda en filas de buckets de tamaño
+    1, 2, 4, ... con a lo sumo max_buckets por fila -> O(log W) memoria.
+    Cada `clock` updates se buscan cortes entre los bordes de los buckets.
+    """
+
+    def __init__(self, delta: float = 0.002, max_buckets: int = 5,
+                 clock: int = 32, min_window: int = 5):
+        self.delta = delta
+        self.max_buckets = max_buckets
+        self.clock = clock
+        self.min_window = min_window
+        self.reset()
+
+    def reset(self):
+        self.filas: List[deque] = [deque()]   # fila i: buckets (total, varianza) de 2^i items
+        self.width = 0
+        self.total = 0.0
+        self.variance = 0.0
+        self.n = 0
+
+    def update(self, x: float) -> DriftSignal:
+        self.n += 1
+        if self.width:
+            self.variance += self.width * (x - self.total / self.width) ** 2 / (self.width + 1)
+        self.width += 1
+        self.total += x
+        self.filas[0].append((x, 0.0))
+        self._comprimir()
+
+        drift = False
+        if self.n % self.clock == 0 and self.width > self.min_window:
+            drift = self._cortar()
+        return DriftSignal(drift, False, self.total / self.width, self.width)
+
+    def _comprimir(self):
+        for nivel, fila in enumerate(self.filas):
+            if len(fila) <= self.max_buckets:
+                break
+            (t1, v1), (t2, v2) = fila.popleft(), fila.popleft()
+            n_b = 2 ** nivel
+            var = v1 + v2 + n_b * n_b * (t1 / n_b - t2 / n_b) ** 2 / (2 * n_b)
+            if nivel + 1 == len(self.filas):
+                self.filas.append(deque())
+            self.filas[nivel + 1].append((t1 + t2, var))
+
+    def _cortar(self) -> bool:
+        hubo_corte = False
+        seguir = True
+        while seguir and self.width > self.min_window:
+            seguir = False
+            n0, total0 = 0, 0.0
+            dd = math.log(2 * math.log(self.width) / self.delta)
+            v = self.variance / self.width
+            # Recorremos del bucket mas viejo (fila alta, izquierda) al mas nuevo
+            for nivel in range(len(self.filas) - 1, -1, -1):
+                n_b = 2 ** nivel
+                for total_b, _ in self.filas[nivel]:
+                    n0 += n_b
+                    total0 += total_b
+                    n1 = self.width - n0
+                    if n1 < self.min_window:
+                        break
+                    if n0 < self.min_window:
+                        continue
+                    diff = abs(total0 / n0 - (self.total - total0) / n1)
+                    m = 1 / (n0 - self.min_window + 1) + 1 / (n1 - self.min_window + 1)
+                    eps = math.sqrt(2 * m * v * dd) + 2 / 3 * dd * m
+                    if diff > eps:
+                        self._quitar_mas_viejo()
+                        hubo_corte = seguir = True
+                        break
+                if seguir or n0 >= self.width - self.min_window:
+                    break
+        return hubo_corte
+
+    def _quitar_mas_viejo(self):
+        while not self.filas[-1]:
+            self.filas.pop()
+        nivel = len(self.filas) - 1
+        total_b, var_b = self.filas[nivel].popleft()
+        n_b = 2 ** nivel
+        self.width -= n_b
+        self.total -= total_b
+        u_b = total_b / n_b
+        self.variance -= var_b + n_b * self.width * (u_b - self.total / self.width) ** 2 / (n_b + self.width)
+        self.variance = max(self.variance, 0.0)
+
+
+# Demo
+print("\n--- Detectores en streaming: ConceptDriftDetector pluggable ---")
+
+if HAS_SKLEARN:
+    # Stream corto (300 eventos tras el drift): Page-Hinkley con umbral mas bajo
+    for nombre, det in [('PageHinkley', PageHinkley(threshold=20)), ('DDM', DDM()),
+                        ('EDDM', EDDM()), ('ADWIN', ADWIN())]:
+        cdd = ConceptDriftDetector(detector=det)
+        rng_cd = np.random.default_rng(42)
+        detectado, falsas = None, 0
+        for i in range(600):
+            p_acierto = 0.85 if i < 300 else 0.65
+            actual = int(rng_cd.integers(0, 2))
+            predicted = actual if rng_cd.random() < p_acierto else 1 - actual
+            if cdd.update(actual, predicted).drift:
+                if i < 300:
+                    falsas += 1
+                elif detectado is None:
+                    detectado = i
+        print(f"  {nombre:<12} drift en t=300 → detectado en t={detectado} "
+              f"(falsas alarmas antes: {falsas})")
+
+    # Benchmark: 1M eventos con drifts inyectados
+    def replay_stream(detector, errores: np.ndarray, cambios: List[int],
+                      tolerancia: int = 50_000) -> Dict:
+        """Reproduce el stream; mide retardo de deteccion, falsas alarmas y throughput."""
+        detecciones = []
+        update = detector.update
+        inicio = time.perf_counter()
+        for t, e in enumerate(errores.tolist()):
+            if update(e).drift:
+                detecciones.append(t)
+        duracion = time.perf_counter() - inicio
+
+        retardos, usadas = [], set()
+        for c in cambios:
+            despues = [d for d in detecciones if c <= d < c + tolerancia]
+            if despues:
+                retardos.append(despues[0] - c)
+                usadas.update(despues)
+        return {
+            'detectados': len(retardos),
+            'retardo_medio': float(np.mean(retardos)) if retardos else float('nan'),
+            'falsas_alarmas': len([d for d in detecciones if d not in usadas]),
+            'eventos_s': len(errores) / duracion,
+        }
+
+    n_eventos = 1_000_000
+    cambios = [200_000, 400_000, 600_000, 800_000]
+    tasas = [0.10, 0.25, 0.12, 0.30, 0.15]          # error rate por tramo
+    rng_stream = np.random.default_rng(0)
+    tasa_t = np.repeat(tasas, np.diff([0] + cambios + [n_eventos]))
+    errores = (rng_stream.random(n_eventos) < tasa_t).astype(np.int8)
+    # PageHinkley/DDM/EDDM solo alarman cuando el error SUBE (t=200K y 600K);
+    # ADWIN es bilateral y tambien ve las bajadas.
+
+    print(f"\n  Stream de {n_eventos:,} eventos, error rate por tramo {tasas}")
+    print(f"  {'detector':<12} {'detectados':>10} {'retardo':>9} {'falsas':>7} {'eventos/s':>11}")
+    for nombre, det in [('PageHinkley', PageHinkley()), ('DDM', DDM()),
+                        ('EDDM', EDDM()),
+                        ('EDDM ajust.', EDDM(warning_level=0.90, drift_level=0.85,
+                                             min_errors=100)),
+                        ('ADWIN', ADWIN())]:
+        r = replay_stream(det, errores, cambios)
+        print(f"  {nombre:<12} {r['detectados']:>7}/{len(cambios)} {r['retardo_medio']:>9.0f} "
+              f"{r['falsas_alarmas']:>7} {r['eventos_s']:>11,.0f}")
+
+    # Referencia: ventana de dos mitades con check() en cada evento (solo 20K eventos)
+    clasico = ConceptDriftDetector(window_size=200, threshold=0.05)
+    inicio = time.perf_counter()
+    for e in errores[:20_000].tolist():
+        clasico.update(e, 0)
+        clasico.check()
+    print(f"  {'dos mitades':<12} {'':>10} {'':>9} {'':>7} "
+          f"{20_000 / (time.perf_counter() - inicio):>11,.0f}")
+
+    """
+    LECTURA DEL BENCHMARK:
+      - ADWIN: el unico bilateral y sin memoria infinita; detecta todos los
+        cambios con ~cientos de eventos de retardo. Paga O(log W) por evento.
+      - Page-Hinkley: retardo minimo en subidas, pero threshold controla
+        el trade-off retardo/falsas alarmas (bajarlo dispara las falsas).
+      - DDM/EDDM: acumulan TODO desde el ultimo reset, asi que tras un
+        tramo largo reaccionan lento. Utiles con resets frecuentes.
+      - EDDM con los umbrales del paper es ruidoso: da falsas alarmas en
+        los tramos estacionarios. Con min_errors=100 y drift 0.85 bajan a
+        un par, a cambio de no ver el cambio en streams cortos.
+    """
+
+
 # =====================================================================
 #   PARTE 5: A/B TESTING PARA MODELOS ML
 # =====================================================================
@@ -731,52 +1568,182 @@ FLUJO:
 """
 
 
-class ShadowDeployment:
-    """Simula shadow mode: champion responde, challenger solo loguea."""
+import json
+import queue
+import threading
+
 
-    def __init__(self, champion, challenger):
+class ShadowDeployment:
+    """
+    Simula shadow mode: champion responde, challenger solo loguea.
+
+    El challenger NO corre en el camino de la request: predict() solo
+    paga el champion + un put_nowait en una cola acotada. Un worker en
+    background agrupa las entradas en micro-batches y las puntua con
+    llamadas vectorizadas. Si la cola se llena, la muestra se descarta
+    (contador `dropped`) en vez de frenar al usuario. Un error del
+    challenger solo descarta su batch (contador `failed`): el worker
+    sigue vivo y flush() nunca se queda colgado. Tras close() las nuevas
+    muestras tambien cuentan como `dropped`: ya no hay worker que las saque.
+    """
+
+    def __init__(self, champion, challenger, batch_size: int = 256,
+                 max_wait_ms: float = 5.0, max_queue: int = 10_000,
+                 log_size: int = 100_000, log_path: Optional[str] = None):
         self.champion = champion
         self.challenger = challenger
-        self._log: List[Dict] = []
+        self.batch_size = batch_size
+        self.max_wait_s = max_wait_ms / 1000
+        self.log_path = log_path
+        self._log = deque(maxlen=log_size)       # ring buffer acotado
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._seq = 0
+        self._stats = {'enqueued': 0, 'dropped': 0, 'scored': 0,
+                       'batches': 0, 'failed': 0, 'failed_batches': 0,
+                       'last_error': None, 'max_lag_ms': 0.0}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
 
     def predict(self, X: np.ndarray) -> int:
         """Solo el champion responde al usuario."""
         # Champion prediction (esta se usa)
         champ_pred = self.champion.predict(X.reshape(1, -1))[0]
-        champ_prob = self.champion.predict_proba(X.reshape(1, -1))[0, 1]
-
-        # Challenger prediction (solo loguea)
-        chall_pred = self.challenger.predict(X.reshape(1, -1))[0]
-        chall_prob = self.challenger.predict_proba(X.reshape(1, -1))[0, 1]
-
-        self._log.append({
-            'champion_pred': int(champ_pred),
-            'champion_prob': float(champ_prob),
-            'challenger_pred': int(chall_pred),
-            'challenger_prob': float(chall_prob),
-            'agree': champ_pred == chall_pred,
-        })
+
+        # Challenger: solo encolar (O(1), nunca bloquea). Copia: el caller
+        # puede reutilizar su buffer antes de que el worker lo puntue.
+        # Todo bajo el lock para no encolar despues de que close() pare el worker.
+        item = (X.copy(), int(champ_pred), time.perf_counter())
+        with self._lock:
+            seq = self._seq
+            self._seq += 1
+            contador = 'dropped'
+            if not self._stop.is_set():
+                try:
+                    self._queue.put_nowait((seq, *item))
+                    contador = 'enqueued'
+                except queue.Full:
+                    pass
+            self._stats[contador] += 1
 
         return int(champ_pred)  # Solo champion responde
 
+    # -- Worker en background -----------------------------------------
+
+    def _next_batch(self) -> Optional[List[Tuple]]:
+        # Espera con timeout para poder ver la señal de parada; tras close()
+        # se sigue vaciando la cola y solo se sale cuando queda vacia.
+        while True:
+            try:
+                item = self._queue.get(timeout=0.05)
+                break
+            except queue.Empty:
+                if self._stop.is_set():
+                    # Un put anterior a close() pudo llegar tras el timeout
+                    try:
+                        item = self._queue.get_nowait()
+                        break
+                    except queue.Empty:
+                        return None
+        batch = [item]
+        deadline = time.perf_counter() + self.max_wait_s
+        while len(batch) < self.batch_size:
+            try:
+                restante = deadline - time.perf_counter()
+                item = self._queue.get(timeout=restante) if restante > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+        return batch
+
+    def _score(self, batch: List[Tuple]) -> List[Dict]:
+        X = np.vstack([x for _, x, _, _ in batch])
+        # Una llamada vectorizada por modelo y por batch
+        champ_prob = self.champion.predict_proba(X)[:, 1]
+        chall_pred = self.challenger.predict(X)
+        chall_prob = self.challenger.predict_proba(X)[:, 1]
+        return [{
+            'request_id': seq,
+            'champion_pred': champ_pred,
+            'champion_prob': float(cp),
+            'challenger_pred': int(hp),
+            'challenger_prob': float(hpr),
+            'agree': champ_pred == int(hp),
+        } for (seq, _, champ_pred, _), cp, hp, hpr
+            in zip(batch, champ_prob, chall_pred, chall_prob)]
+
+    def _run(self):
+        archivo = open(self.log_path, 'a') if self.log_path else None
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+                try:
+                    registros = self._score(batch)
+                    ahora = time.perf_counter()
+                    with self._lock:
+                        self._log.extend(registros)
+                        self._stats['scored'] += len(batch)
+                        self._stats['batches'] += 1
+                        self._stats['max_lag_ms'] = max(self._stats['max_lag_ms'],
+                                                        (ahora - batch[0][3]) * 1000)
+                    if archivo:
+                        archivo.writelines(json.dumps(r) + '\n' for r in registros)
+                except Exception as exc:
+                    # El shadow nunca debe caerse por el challenger
+                    with self._lock:
+                        self._stats['failed'] += len(batch)
+                        self._stats['failed_batches'] += 1
+                        self._stats['last_error'] = repr(exc)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        finally:
+            if archivo:
+                archivo.close()
+
+    def flush(self):
+        """Bloquea hasta que el challenger haya puntuado todo lo encolado."""
+        self._queue.join()
+
+    def close(self):
+        """Puntua lo pendiente y para el worker."""
+        with self._lock:
+            self._stop.set()
+        self._worker.join()
+
+    def stats(self) -> Dict:
+        """Contadores de lag/drop del challenger."""
+        with self._lock:
+            s = dict(self._stats)
+        s['lag'] = s['enqueued'] - s['scored'] - s['failed']   # pendientes en la cola
+        s['avg_batch'] = s['scored'] / max(s['batches'], 1)
+        return s
+
     def agreement_rate(self) -> float:
         """Porcentaje de acuerdo entre champion y challenger."""
-        if not self._log:
+        with self._lock:
+            log = list(self._log)      # copia: el worker extiende el deque
+        if not log:
             return 0.0
-        return float(np.mean([r['agree'] for r in self._log]))
+        return float(np.mean([r['agree'] for r in log]))
 
     def compare(self, actuals: List[int]) -> Dict:
-        """Compara rendimiento con actuals."""
-        n = min(len(actuals), len(self._log))
-        champ_preds = [self._log[i]['champion_pred'] for i in range(n)]
-        chall_preds = [self._log[i]['challenger_pred'] for i in range(n)]
-        acts = actuals[:n]
+        """Compara rendimiento con actuals (alineados por request_id)."""
+        with self._lock:
+            log = [r for r in self._log if r['request_id'] < len(actuals)]
+        champ_preds = [r['champion_pred'] for r in log]
+        chall_preds = [r['challenger_pred'] for r in log]
+        acts = [actuals[r['request_id']] for r in log]
 
         return {
             'champion_accuracy': float(accuracy_score(acts, champ_preds)),
             'challenger_accuracy': float(accuracy_score(acts, chall_preds)),
             'agreement_rate': self.agreement_rate(),
-            'n_predictions': n,
+            'n_predictions': len(log),
         }
 
 
@@ -789,11 +1756,69 @@ if HAS_SKLEARN:
     for i in range(len(X_test)):
         shadow.predict(X_test[i])
 
+    shadow.flush()
     comparison = shadow.compare(y_test.tolist())
     print(f"  Champion accuracy:   {comparison['champion_accuracy']:.4f}")
     print(f"  Challenger accuracy: {comparison['challenger_accuracy']:.4f}")
     print(f"  Agreement rate:      {comparison['agreement_rate']:.2%}")
     print(f"  N predictions:       {comparison['n_predictions']}")
+    s = shadow.stats()
+    print(f"  Challenger: {s['batches']} batches (media {s['avg_batch']:.0f} filas), "
+          f"dropped={s['dropped']}, max lag={s['max_lag_ms']:.1f}ms")
+    shadow.close()
+
+    # Latencia vista por el usuario: champion solo, shadow sincrono, shadow async
+    def latencias_ms(fn, n=300) -> np.ndarray:
+        tiempos = []
+        for i in range(n):
+            inicio = time.perf_counter()
+            fn(X_test[i % len(X_test)])
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        return np.array(tiempos)
+
+    def shadow_sincrono(x):
+        # Lo que hacia predict() antes: 4 llamadas fila a fila en la request
+        model_a.predict(x.reshape(1, -1)); model_a.predict_proba(x.reshape(1, -1))
+        model_b.predict(x.reshape(1, -1)); model_b.predict_proba(x.reshape(1, -1))
+
+    shadow_async = ShadowDeployment(model_a, model_b)
+    print(f"\n  {'camino':<18} {'p50 ms':>8} {'p99 ms':>8}")
+    for nombre, fn in [('solo champion', lambda x: model_a.predict(x.reshape(1, -1))),
+                       ('shadow sincrono', shadow_sincrono),
+                       ('shadow async', shadow_async.predict)]:
+        lat = latencias_ms(fn)
+        print(f"  {nombre:<18} {np.percentile(lat, 50):>8.3f} {np.percentile(lat, 99):>8.3f}")
+    shadow_async.flush()
+    s = shadow_async.stats()
+    print(f"  async: enqueued={s['enqueued']}, dropped={s['dropped']}, "
+          f"batches={s['batches']}, lag={s['lag']}, max lag={s['max_lag_ms']:.1f}ms")
+    shadow_async.close()
+
+    # Un challenger que falla no tumba el worker: se cuentan los fallos
+    class ChallengerRoto:
+        def __init__(self):
+            self.llamadas = 0
+
+        def predict(self, X):
+            self.llamadas += 1
+            if self.llamadas == 1:
+                raise ValueError("feature desconocida")
+            return model_b.predict(X)
+
+        def predict_proba(self, X):
+            return model_b.predict_proba(X)
+
+    shadow_roto = ShadowDeployment(model_a, ChallengerRoto(), batch_size=16)
+    for i in range(len(X_test)):
+        shadow_roto.predict(X_test[i])
+    shadow_roto.flush()
+    s = shadow_roto.stats()
+    print(f"  challenger con error: scored={s['scored']}, failed={s['failed']} "
+          f"({s['failed_batches']} batch), lag={s['lag']}, error={s['last_error']}")
+    shadow_roto.close()
+    shadow_roto.predict(X_test[0])      # tras close(): se descarta, flush() no se cuelga
+    shadow_roto.flush()
+    print(f"  tras close(): dropped={shadow_roto.stats()['dropped']}")
 
 
 # =====================================================================
@@ -996,15 +2021,16 @@ print("""
 
   PATRONES:
   1. A/B Testing: comparar modelos con trafico real.
-  2. Shadow Mode: zero-risk testing del challenger.
+  2. Shadow Mode: zero-risk testing del challenger (fuera del hot path).
   3. Champion-Challenger: flujo de promocion controlado.
   4. Canary: deploy gradual (1% → 10% → 50% → 100%).
 
   METRICAS CLAVE:
   - ML: accuracy, F1, AUC (en ventana deslizante).
-  - Drift: PSI, KS, Wasserstein (por feature).
+  - Drift: PSI, KS, Wasserstein (sketch de referencia, todas las features a la vez).
   - Ops: latencia p50/p95/p99, error rate.
   - Business: conversion, revenue, engagement.
+  - Streaming: agregados O(1) por evento, snapshot sin recalcular.
 
   REGLA DE ORO:
   Si no monitorizas tu modelo, no sabes si funciona.
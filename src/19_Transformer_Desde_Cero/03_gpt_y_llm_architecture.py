@@ -27,6 +27,13 @@
 
 import numpy as np
 import math
+import os
+import re
+import time
+import heapq
+import multiprocessing as mp
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -183,6 +190,36 @@ print("=== CAPITULO 3: MINI-GPT DESDE CERO ===")
 print("=" * 80)
 
 if HAS_TORCH:
+    class StaticKVCache:
+        """
+        KV-cache preasignado: un buffer fijo (B, H, max_len, d_k) de K y otro
+        de V por capa. Cada paso ESCRIBE in-place en los slots siguientes;
+        no hay torch.cat ni realocacion durante la generacion.
+        """
+
+        def __init__(self, n_layers, batch_size, n_heads, max_len, d_k,
+                     dtype=torch.float32, device=None):
+            shape = (n_layers, batch_size, n_heads, max_len, d_k)
+            self.K = torch.zeros(shape, dtype=dtype, device=device)
+            self.V = torch.zeros(shape, dtype=dtype, device=device)
+            self.max_len = max_len
+            self.length = 0  # slots ocupados (comunes a todo el batch)
+
+        def write(self, layer, K, V):
+            """Escribe K, V (B, H, T, d_k) y devuelve vistas de los slots validos."""
+            end = self.length + K.size(2)
+            if end > self.max_len:
+                raise ValueError(f"KV-cache lleno: {end} > {self.max_len}")
+            self.K[layer, :, :, self.length:end] = K
+            self.V[layer, :, :, self.length:end] = V
+            return self.K[layer, :, :, :end], self.V[layer, :, :, :end]
+
+        def advance(self, T):
+            self.length += T
+
+        def reset(self):
+            self.length = 0
+
     class MiniGPT(nn.Module):
         """GPT minimalista pero completo."""
 
@@ -244,43 +281,144 @@ if HAS_TORCH:
 
             return logits, loss
 
+        @staticmethod
+        def _sample(logits, temperature=1.0, top_k=None, top_p=None):
+            """Temperature + top-k + top-p sobre logits (B, vocab) → (B, 1)."""
+            # Temperature
+            logits = logits / temperature
+
+            # Top-k filtering
+            if top_k is not None:
+                v, _ = torch.topk(logits, top_k)
+                logits[logits < v[:, [-1]]] = float('-inf')
+
+            # Top-p (nucleus) filtering
+            if top_p is not None:
+                sorted_logits, sorted_idx = torch.sort(logits, descending=True)
+                cumulative_probs = torch.cumsum(
+                    F.softmax(sorted_logits, dim=-1), dim=-1
+                )
+                mask = cumulative_probs - F.softmax(sorted_logits, dim=-1) >= top_p
+                sorted_logits[mask] = float('-inf')
+                logits = sorted_logits.scatter(1, sorted_idx, sorted_logits)
+
+            # Sample
+            probs = F.softmax(logits, dim=-1)
+            return torch.multinomial(probs, 1)
+
         @torch.no_grad()
         def generate(self, idx, max_new_tokens, temperature=1.0,
                      top_k=None, top_p=None):
-            """Generacion autoregresiva."""
+            """Generacion autoregresiva (forward completo por token: O(T²))."""
             for _ in range(max_new_tokens):
                 # Crop a max_len
-                idx_cond = idx[:, -256:]
+                idx_cond = idx[:, -self.pos_emb.num_embeddings:]
 
                 # Forward
                 logits, _ = self(idx_cond)
                 logits = logits[:, -1, :]  # Solo ultimo paso
 
-                # Temperature
-                logits = logits / temperature
-
-                # Top-k filtering
-                if top_k is not None:
-                    v, _ = torch.topk(logits, top_k)
-                    logits[logits < v[:, [-1]]] = float('-inf')
-
-                # Top-p (nucleus) filtering
-                if top_p is not None:
-                    sorted_logits, sorted_idx = torch.sort(logits, descending=True)
-                    cumulative_probs = torch.cumsum(
-                        F.softmax(sorted_logits, dim=-1), dim=-1
-                    )
-                    mask = cumulative_probs - F.softmax(sorted_logits, dim=-1) >= top_p
-                    sorted_logits[mask] = float('-inf')
-                    logits = sorted_logits.scatter(1, sorted_idx, sorted_logits)
-
-                # Sample
-                probs = F.softmax(logits, dim=-1)
-                next_token = torch.multinomial(probs, 1)
+                next_token = self._sample(logits, temperature, top_k, top_p)
                 idx = torch.cat([idx, next_token], dim=1)
 
             return idx
 
+        def _forward_cached(self, idx, cache, pad):
+            """
+            Forward incremental: idx (B, T) ocupa los slots
+            [cache.length, cache.length + T) del cache. pad (B,) = slots de
+            relleno a la izquierda de cada secuencia. Devuelve los logits del
+            ultimo slot (B, vocab).
+            """
+            B, T = idx.shape
+            start = cache.length
+            slots = torch.arange(start, start + T, device=idx.device)
+            # Offset de posicion por secuencia: el primer token real es la posicion 0
+            pos = (slots.unsqueeze(0) - pad.unsqueeze(1)).clamp(min=0)
+            x = self.token_emb(idx) + self.pos_emb(pos)
+
+            # Causal + padding, sin bucles: el slot k es visible desde el slot i
+            # si k <= i y k no es relleno (un slot de relleno solo se ve a si
+            # mismo para que su softmax no sea NaN).
+            keys = torch.arange(start + T, device=idx.device).view(1, 1, -1)
+            queries = slots.view(1, -1, 1)
+            mask = (keys <= queries) & ((keys >= pad.view(-1, 1, 1)) | (keys == queries))
+            mask = mask.unsqueeze(1)  # (B, 1, T, S)
+
+            for layer, block in enumerate(self.blocks):
+                attn = block.attn
+                normed = block.ln1(x)
+                Q = attn.W_Q(normed).view(B, T, attn.n_heads, attn.d_k).transpose(1, 2)
+                K = attn.W_K(normed).view(B, T, attn.n_heads, attn.d_k).transpose(1, 2)
+                V = attn.W_V(normed).view(B, T, attn.n_heads, attn.d_k).transpose(1, 2)
+                K_all, V_all = cache.write(layer, K, V)
+                out, _ = scaled_dot_product_attention(Q, K_all, V_all, mask)
+                out = out.transpose(1, 2).contiguous().view(B, T, self.d_model)
+                x = x + attn.W_O(out)
+                x = x + block.ffn(block.ln2(x))
+            cache.advance(T)
+
+            return self.lm_head(self.ln_final(x[:, -1]))
+
+        @torch.no_grad()
+        def generate_cached(self, prompts, max_new_tokens, temperature=1.0,
+                            top_k=None, top_p=None, sliding_window=True,
+                            evict=None):
+            """
+            Generacion incremental con KV-cache preasignado (ver Capitulo 8).
+
+            prompts: tensor (B, T) o lista de secuencias de distinta longitud
+            (se rellenan por la izquierda, asi todas escriben en el mismo slot).
+            Cada paso procesa UN token por secuencia: O(T) en vez de O(T²).
+
+            Al llenarse el contexto (max_len): con sliding_window se desalojan
+            los `evict` slots mas antiguos y se recalcula el cache del resto
+            (las posiciones aprendidas se re-basan a 0, igual que el crop de
+            generate). Sin sliding_window, error.
+            """
+            max_len = self.pos_emb.num_embeddings
+            es_tensor = torch.is_tensor(prompts)
+            device = self.token_emb.weight.device
+            prompts = [torch.as_tensor(p, device=device)[-max_len:] for p in prompts]
+            lengths = torch.tensor([len(p) for p in prompts], device=device)
+            B, L = len(prompts), int(lengths.max())
+            evict = evict or max_len // 2
+            if not 0 < evict < max_len:
+                raise ValueError(f"evict debe estar en (0, {max_len})")
+
+            # Tokens preasignados: prompt + generados, escritos in-place
+            out = torch.zeros(B, L + max_new_tokens, dtype=torch.long, device=device)
+            pad = L - lengths
+            for b, p in enumerate(prompts):
+                out[b, pad[b]:L] = p
+
+            attn0 = self.blocks[0].attn
+            cache = StaticKVCache(len(self.blocks), B, attn0.n_heads, max_len,
+                                  attn0.d_k, dtype=self.token_emb.weight.dtype,
+                                  device=device)
+            base = 0  # indice de `out` que ocupa el slot 0 del cache
+            logits = self._forward_cached(out[:, :L], cache, pad)
+            n = L
+            for step in range(max_new_tokens):
+                out[:, n:n + 1] = self._sample(logits, temperature, top_k, top_p)
+                n += 1
+                if step == max_new_tokens - 1:
+                    break
+                if cache.length == max_len:
+                    if not sliding_window:
+                        raise ValueError(
+                            f"Contexto lleno ({max_len} tokens); usa sliding_window=True")
+                    cache.reset()
+                    base = n - 1 - (max_len - evict)
+                    self._forward_cached(out[:, base:n - 1], cache,
+                                         (pad - base).clamp(min=0))
+                logits = self._forward_cached(out[:, n - 1:n], cache,
+                                              (pad - base).clamp(min=0))
+
+            if es_tensor:
+                return out
+            return [out[b, pad[b]:] for b in range(B)]
+
     # Crear modelo
     print("\n--- Mini-GPT ---")
 
@@ -604,14 +742,9 @@ if HAS_TORCH:
             new_cache = (K, V)
 
             # Atencion (causal)
+            # Solo las ultimas T filas del triangular: diagonal desplazada
             full_len = K.size(2)
-            mask = torch.tril(torch.ones(T, full_len))
-            # Ajustar: solo las ultimas T filas del triangular
-            if kv_cache is not None:
-                mask = torch.ones(T, full_len)
-                for i in range(T):
-                    pos = full_len - T + i
-                    mask[i, pos+1:] = 0
+            mask = torch.tril(torch.ones(T, full_len), diagonal=full_len - T)
             mask = mask.unsqueeze(0).unsqueeze(0)
 
             attn_out, _ = scaled_dot_product_attention(Q, K, V, mask)
@@ -649,6 +782,46 @@ if HAS_TORCH:
     print(f"  Token-by-token (cached):   {time_with_cache*1000:.2f} ms")
     print(f"  → KV-cache evita recalcular K,V de tokens previos")
 
+    # MiniGPT: generate (forward completo) vs generate_cached (buffer in-place)
+    print("\n--- MiniGPT: KV-cache preasignado ---")
+    model_gpt.eval()
+    prompt = torch.tensor([[5, 6, 7, 8]])
+    greedy = dict(temperature=1.0, top_k=1)
+    ref = model_gpt.generate(prompt.clone(), max_new_tokens=30, **greedy)
+    fast = model_gpt.generate_cached(prompt.clone(), max_new_tokens=30, **greedy)
+    print(f"  Greedy identico (30 tokens): {torch.equal(ref, fast)}")
+
+    # Batch con longitudes distintas (relleno a la izquierda)
+    prompts_var = [torch.tensor([3, 4, 5]), torch.tensor([20, 21, 22, 23, 24, 25]),
+                   torch.tensor([40])]
+    batch_out = model_gpt.generate_cached(prompts_var, max_new_tokens=8, **greedy)
+    iguales = all(
+        torch.equal(o, model_gpt.generate(p.unsqueeze(0), 8, **greedy)[0])
+        for o, p in zip(batch_out, prompts_var)
+    )
+    print(f"  Batch de 3 prompts (longitudes 3/6/1) = generacion individual: {iguales}")
+    print(f"    {batch_out[1].tolist()}")
+
+    # Throughput: contexto completo de max_len=128
+    def tokens_por_segundo(fn, batch, n_new):
+        inicio = time.perf_counter()
+        fn(torch.randint(0, vocab_size, (batch, 8)), n_new)
+        return batch * n_new / (time.perf_counter() - inicio)
+
+    n_new = 120
+    for batch in (1, 8):
+        tps_ref = tokens_por_segundo(
+            lambda p, n: model_gpt.generate(p, n, **greedy), batch, n_new)
+        tps_kv = tokens_por_segundo(
+            lambda p, n: model_gpt.generate_cached(p, n, **greedy), batch, n_new)
+        print(f"  B={batch}, {n_new} tokens: generate {tps_ref:,.0f} tok/s | "
+              f"generate_cached {tps_kv:,.0f} tok/s → {tps_kv / tps_ref:.1f}x")
+
+    # Mas alla de max_len: ventana deslizante (desaloja la mitad mas antigua)
+    largo = model_gpt.generate_cached(prompt.clone(), max_new_tokens=300, **greedy)
+    print(f"  Sliding window: {largo.shape[1]} tokens con un buffer de "
+          f"{model_gpt.pos_emb.num_embeddings} slots")
+
 
 # =====================================================================
 #   PARTE 9: TOKENIZACION BPE
@@ -682,71 +855,203 @@ METODOS:
 print("\n--- BPE simplificado ---")
 
 
+# Pre-split estilo GPT-2: los merges nunca cruzan el limite de una palabra
+_BPE_PRESPLIT = re.compile(r" ?\w+| ?[^\s\w]+|\s+")
+
+
 class SimpleBPE:
-    """Tokenizador BPE minimalista."""
+    """
+    Tokenizador BPE a nivel de bytes.
+
+    train: conteo de pares INCREMENTAL. Las palabras unicas se guardan una vez
+    con su frecuencia; un indice par → palabras dice que palabras toca cada
+    merge y un heap (lazy) da el par mas frecuente. Cada merge solo actualiza
+    los pares de las palabras afectadas: coste ∝ ocurrencias del par, no N.
 
-    def __init__(self, vocab_size=300):
+    encode: pre-split en palabras + merges por RANGO (el par de menor rango
+    presente se fusiona primero), con cache por palabra. Equivale a aplicar
+    los merges en orden, pero cada palabra se tokeniza una sola vez.
+    """
+
+    def __init__(self, vocab_size=300, cache_size=100_000):
         self.vocab_size = vocab_size
         self.merges = {}
         self.vocab = {}
+        self.cache_size = cache_size
+        self._cache = {}
+
+    @staticmethod
+    def _palabras(text):
+        """Frecuencia de cada palabra pre-split, como tupla de bytes."""
+        freqs = Counter(_BPE_PRESPLIT.findall(text))
+        return [list(w.encode('utf-8')) for w in freqs], list(freqs.values())
+
+    def _set_merges(self, merges):
+        self.merges = dict(merges)
+        self.vocab = {i: bytes([i]) for i in range(256)}
+        for (a, b), new_id in self.merges.items():
+            self.vocab[new_id] = self.vocab[a] + self.vocab[b]
+        self._cache = {}
 
     def train(self, text):
-        """Entrena BPE en un texto."""
-        # Inicializar con bytes
-        tokens = list(text.encode('utf-8'))
-
-        # Iterar: encontrar y fusionar par mas frecuente
+        """Entrena BPE con conteo de pares incremental."""
+        words, freqs = self._palabras(text)
+
+        pair_counts = Counter()
+        where = defaultdict(set)            # par → indices de palabras que lo contienen
+        for idx, (w, f) in enumerate(zip(words, freqs)):
+            for pair in zip(w, w[1:]):
+                pair_counts[pair] += f
+                where[pair].add(idx)
+        heap = [(-c, pair) for pair, c in pair_counts.items()]
+        heapq.heapify(heap)
+
+        merges = {}
         next_id = 256  # Bytes van de 0-255
-        while next_id < self.vocab_size:
-            # Contar pares
-            pairs = {}
-            for i in range(len(tokens) - 1):
-                pair = (tokens[i], tokens[i+1])
-                pairs[pair] = pairs.get(pair, 0) + 1
+        while next_id < self.vocab_size and heap:
+            neg, best_pair = heapq.heappop(heap)
+            actual = pair_counts.get(best_pair, 0)
+            if -neg != actual:              # entrada obsoleta del heap
+                if actual > 0:
+                    heapq.heappush(heap, (-actual, best_pair))
+                continue
+            if actual < 2:
+                break
 
+            merges[best_pair] = next_id
+            a, b = best_pair
+            for idx in where.pop(best_pair):
+                w, f = words[idx], freqs[idx]
+                new_w, i = [], 0
+                while i < len(w):
+                    if i < len(w) - 1 and w[i] == a and w[i + 1] == b:
+                        new_w.append(next_id)
+                        i += 2
+                    else:
+                        new_w.append(w[i])
+                        i += 1
+                # Solo cambian los pares vecinos del merge: delta de esta palabra
+                delta = Counter(zip(new_w, new_w[1:]))
+                delta.subtract(Counter(zip(w, w[1:])))
+                for pair, d in delta.items():
+                    if d == 0 or pair == best_pair:
+                        continue
+                    pair_counts[pair] += d * f
+                    if d > 0:
+                        where[pair].add(idx)
+                        heapq.heappush(heap, (-pair_counts[pair], pair))
+                words[idx] = new_w
+            del pair_counts[best_pair]
+            next_id += 1
+
+        self._set_merges(merges)
+        print(f"  Merges aprendidos: {len(self.merges)}")
+        return self.encode(text)
+
+    def train_naive(self, text):
+        """Referencia O(merges x N): recuenta todos los pares tras cada merge."""
+        words, freqs = self._palabras(text)
+        merges = {}
+        next_id = 256
+        while next_id < self.vocab_size:
+            pairs = Counter()
+            for w, f in zip(words, freqs):
+                for pair in zip(w, w[1:]):
+                    pairs[pair] += f
             if not pairs:
                 break
-
-            # Par mas frecuente
-            best_pair = max(pairs, key=pairs.get)
+            # Mismo desempate que el heap: mayor conteo, luego par menor
+            best_pair = min(pairs, key=lambda p: (-pairs[p], p))
             if pairs[best_pair] < 2:
                 break
-
-            # Fusionar
-            self.merges[best_pair] = next_id
-            new_tokens = []
-            i = 0
-            while i < len(tokens):
-                if (i < len(tokens) - 1 and
-                    (tokens[i], tokens[i+1]) == best_pair):
-                    new_tokens.append(next_id)
-                    i += 2
-                else:
-                    new_tokens.append(tokens[i])
-                    i += 1
-            tokens = new_tokens
+            merges[best_pair] = next_id
+            words = [self._fusionar(w, best_pair, next_id) for w in words]
             next_id += 1
-
-        print(f"  Merges aprendidos: {len(self.merges)}")
+        self._set_merges(merges)
+        return merges
+
+    @staticmethod
+    def _fusionar(tokens, pair, new_id):
+        new_tokens = []
+        i = 0
+        while i < len(tokens):
+            if (i < len(tokens) - 1 and
+                (tokens[i], tokens[i+1]) == pair):
+                new_tokens.append(new_id)
+                i += 2
+            else:
+                new_tokens.append(tokens[i])
+                i += 1
+        return new_tokens
+
+    def _encode_word(self, word):
+        tokens = self._cache.get(word)
+        if tokens is not None:
+            return tokens
+        tokens = list(word.encode('utf-8'))
+        merges = self.merges
+        while len(tokens) > 1:
+            # Par presente con menor rango (= id del merge)
+            pair = min(zip(tokens, tokens[1:]),
+                       key=lambda p: merges.get(p, math.inf))
+            if pair not in merges:
+                break
+            tokens = self._fusionar(tokens, pair, merges[pair])
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[word] = tokens
         return tokens
 
     def encode(self, text):
         """Tokeniza texto con merges aprendidos."""
-        tokens = list(text.encode('utf-8'))
-        for pair, new_id in self.merges.items():
-            new_tokens = []
-            i = 0
-            while i < len(tokens):
-                if (i < len(tokens) - 1 and
-                    (tokens[i], tokens[i+1]) == pair):
-                    new_tokens.append(new_id)
-                    i += 2
-                else:
-                    new_tokens.append(tokens[i])
-                    i += 1
-            tokens = new_tokens
+        tokens = []
+        for word in _BPE_PRESPLIT.findall(text):
+            tokens.extend(self._encode_word(word))
         return tokens
 
+    def encode_naive(self, text):
+        """Referencia O(merges x N): una pasada completa por cada merge."""
+        tokens = []
+        for word in _BPE_PRESPLIT.findall(text):
+            w = list(word.encode('utf-8'))
+            for pair, new_id in self.merges.items():
+                w = self._fusionar(w, pair, new_id)
+            tokens.extend(w)
+        return tokens
+
+    def encode_batch(self, texts, n_workers=None, chunksize=64):
+        """
+        Tokeniza muchos textos en un pool de procesos (el GIL no deja
+        paralelizar con threads). Cada worker recibe los merges una vez y
+        mantiene su propia cache de palabras. Solo con 'fork': con spawn
+        cada worker re-ejecutaria este script (no tiene __main__ guard),
+        asi que sin fork se tokeniza en serie.
+        """
+        n_workers = n_workers or os.cpu_count() or 1
+        if (n_workers <= 1 or len(texts) <= chunksize
+                or 'fork' not in mp.get_all_start_methods()):
+            return [self.encode(t) for t in texts]
+        with ProcessPoolExecutor(n_workers, mp_context=mp.get_context('fork'),
+                                 initializer=_bpe_worker_init,
+                                 initargs=(self.merges, self.cache_size)) as pool:
+            return list(pool.map(_bpe_worker_encode, texts, chunksize=chunksize))
+
+    def decode(self, tokens):
+        return b''.join(self.vocab[t] for t in tokens).decode('utf-8', errors='replace')
+
+
+_BPE_WORKER = None
+
+
+def _bpe_worker_init(merges, cache_size):
+    global _BPE_WORKER
+    _BPE_WORKER = SimpleBPE(cache_size=cache_size)
+    _BPE_WORKER._set_merges(merges)
+
+
+def _bpe_worker_encode(text):
+    return _BPE_WORKER.encode(text)
+
 
 # Demo
 text = "the cat sat on the mat. the cat ate the rat."
@@ -757,6 +1062,58 @@ encoded = bpe.encode("the cat")
 print(f"  'the cat' → {encoded}")
 print(f"  Bytes: {list('the cat'.encode('utf-8'))}")
 print(f"  → BPE comprime tokens frecuentes")
+print(f"  decode(encode(text)) == text: {bpe.decode(bpe.encode(text)) == text}")
+
+# Corpus sintetico: vocabulario Zipf de "palabras" de silabas
+print("\n--- BPE incremental vs recuento completo ---")
+rng_bpe = np.random.default_rng(0)
+silabas = ['ta', 'ke', 'ro', 'mi', 'su', 'la', 'ne', 'po', 'di', 'ga', 'tra', 'ble', 'con', 'es']
+lexico = [''.join(rng_bpe.choice(silabas, rng_bpe.integers(1, 5))) for _ in range(3000)]
+pesos = 1.0 / np.arange(1, len(lexico) + 1)
+pesos /= pesos.sum()
+
+
+def texto_sintetico(n_palabras):
+    idx = rng_bpe.choice(len(lexico), n_palabras, p=pesos)
+    return ' '.join(lexico[i] for i in idx) + '.'
+
+
+corpus = texto_sintetico(30_000)
+bpe_ref = SimpleBPE(vocab_size=600)
+t0 = time.perf_counter()
+merges_ref = bpe_ref.train_naive(corpus)
+t_train_ref = time.perf_counter() - t0
+
+bpe_fast = SimpleBPE(vocab_size=600)
+t0 = time.perf_counter()
+bpe_fast.train(corpus)
+t_train_fast = time.perf_counter() - t0
+print(f"  Corpus: {len(corpus):,} chars, merges identicos: {bpe_fast.merges == merges_ref}")
+print(f"  train recuento completo: {t_train_ref:.2f}s | incremental: {t_train_fast:.3f}s "
+      f"→ {t_train_ref / t_train_fast:.0f}x")
+
+t0 = time.perf_counter()
+tok_ref = bpe_fast.encode_naive(corpus)
+t_enc_ref = time.perf_counter() - t0
+t0 = time.perf_counter()
+tok_fast = bpe_fast.encode(corpus)
+t_enc_fast = time.perf_counter() - t0
+print(f"  encode por merge: {t_enc_ref:.2f}s | por rango + cache: {t_enc_fast:.3f}s "
+      f"→ {t_enc_ref / t_enc_fast:.0f}x, tokens identicos: {tok_ref == tok_fast}")
+print(f"  Compresion: {len(corpus.encode('utf-8')) / len(tok_fast):.2f} bytes/token")
+
+# Muchos documentos: pool de procesos
+docs = [texto_sintetico(200) for _ in range(2_000)]
+t0 = time.perf_counter()
+batch_serial = [bpe_fast.encode(d) for d in docs]
+t_serial = time.perf_counter() - t0
+n_workers = max(2, os.cpu_count() or 1)
+t0 = time.perf_counter()
+batch_pool = bpe_fast.encode_batch(docs, n_workers=n_workers)
+t_pool = time.perf_counter() - t0
+print(f"  encode_batch {len(docs):,} docs: serie {t_serial:.2f}s | "
+      f"{n_workers} procesos {t_pool:.2f}s (CPUs: {os.cpu_count()}), "
+      f"identico: {batch_pool == batch_serial}")
 
 
 # =====================================================================
@@ -834,11 +1191,12 @@ print("""
   - RMSNorm > LayerNorm (mas rapido)
   - SwiGLU > GELU (mejor FFN)
   - GQA > MHA (menos KV-cache)
-  - KV-Cache: evita recalcular K,V previos
+  - KV-Cache: evita recalcular K,V previos (buffer preasignado, in-place)
   - Flash Attention (optimizacion GPU)
   - Weight tying (embedding = lm_head)
 
   TOKENIZACION: BPE / SentencePiece (30K-100K vocab)
+  BPE rapido: conteo de pares incremental + encode por rango con cache
   EVALUACION: Perplexity (menor = mejor)
 
   SCALING: mas params + mas datos = mejor modelo